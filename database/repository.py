@@ -0,0 +1,254 @@
+"""
+SQL Repository
+Persistent async store for entities on top of the database engine
+"""
+
+import dataclasses
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+
+from sqlalchemy import select, delete, update, and_, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from models.entities import (
+    Portfolio, Holding, Trade, AIRecommendation, TaxHarvest,
+    ExternalAccount, EducationalVideo, User
+)
+from database.tables import metadata, ENTITY_TABLES
+
+# Keyset cursor for trade history: (created_date, id) of the last row served
+TradeCursor = Tuple[datetime, str]
+
+class SQLRepository:
+    """
+    Entity store backed by SQLAlchemy Core on an AsyncEngine
+
+    Every query is served by an index (user_id, portfolio_id, symbol,
+    portfolio_id + created_date). Writes are upserts keyed by entity id,
+    so saving an entity twice updates it in place. Works with PostgreSQL
+    (asyncpg) in production and SQLite (aiosqlite) locally.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        dialect = engine.dialect.name
+        if dialect == "postgresql":
+            self._insert = postgresql.insert
+        elif dialect == "sqlite":
+            self._insert = sqlite.insert
+        else:
+            raise ValueError(f"Unsupported database dialect: {dialect}")
+
+    async def create_tables(self):
+        """Create missing tables and indexes"""
+        async with self.engine.begin() as conn:
+            await conn.run_sync(metadata.create_all)
+
+    async def drop_tables(self):
+        """Drop all tables (tests only)"""
+        async with self.engine.begin() as conn:
+            await conn.run_sync(metadata.drop_all)
+
+    # ===== Generic entity access =====
+
+    @staticmethod
+    def _table(entity_type: Type):
+        table = ENTITY_TABLES.get(entity_type)
+        if table is None:
+            raise TypeError(f"No table for {entity_type.__name__}")
+        return table
+
+    @staticmethod
+    def _row(entity: Any) -> Dict:
+        return {f.name: getattr(entity, f.name) for f in dataclasses.fields(entity)}
+
+    @staticmethod
+    def _entity(entity_type: Type, row) -> Any:
+        return entity_type(**row._mapping)
+
+    async def save(self, entity: Any) -> Any:
+        """Insert or update one entity"""
+        await self.save_many([entity])
+        return entity
+
+    async def save_many(self, entities: Iterable[Any]):
+        """Insert or update entities (one statement per entity type)"""
+        by_type: Dict[Type, List[Dict]] = {}
+        for entity in entities:
+            by_type.setdefault(type(entity), []).append(self._row(entity))
+        if not by_type:
+            return
+
+        async with self.engine.begin() as conn:
+            for entity_type, rows in by_type.items():
+                table = self._table(entity_type)
+                stmt = self._insert(table)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[table.c.id],
+                    set_={c.name: stmt.excluded[c.name] for c in table.columns if c.name != "id"}
+                )
+                await conn.execute(stmt, rows)
+
+    async def get(self, entity_type: Type, entity_id: str) -> Optional[Any]:
+        """Get one entity by id"""
+        table = self._table(entity_type)
+        rows = await self._fetch(select(table).where(table.c.id == entity_id))
+        return self._entity(entity_type, rows[0]) if rows else None
+
+    async def delete(self, entity_type: Type, entity_id: str) -> bool:
+        """Delete one entity by id"""
+        table = self._table(entity_type)
+        async with self.engine.begin() as conn:
+            result = await conn.execute(delete(table).where(table.c.id == entity_id))
+        return result.rowcount > 0
+
+    async def all(self, entity_type: Type) -> List[Any]:
+        """Every entity of a type (demo-scale data and tests)"""
+        table = self._table(entity_type)
+        rows = await self._fetch(select(table).order_by(table.c.created_date, table.c.id))
+        return [self._entity(entity_type, row) for row in rows]
+
+    async def _fetch(self, stmt) -> List:
+        async with self.engine.connect() as conn:
+            result = await conn.execute(stmt)
+            return result.fetchall()
+
+    async def _fetch_entities(self, entity_type: Type, stmt) -> List[Any]:
+        return [self._entity(entity_type, row) for row in await self._fetch(stmt)]
+
+    # ===== Users and portfolios =====
+
+    async def get_user(self, user_id: str) -> Optional[User]:
+        """Get a user"""
+        return await self.get(User, user_id)
+
+    async def get_user_portfolios(self, user_id: str) -> List[Portfolio]:
+        """Get a user's portfolios, oldest first"""
+        table = ENTITY_TABLES[Portfolio]
+        return await self._fetch_entities(
+            Portfolio,
+            select(table).where(table.c.user_id == user_id).order_by(table.c.created_date, table.c.id)
+        )
+
+    async def get_user_portfolio(self, user_id: str) -> Optional[Portfolio]:
+        """Get the user's primary (first created) portfolio"""
+        table = ENTITY_TABLES[Portfolio]
+        portfolios = await self._fetch_entities(
+            Portfolio,
+            select(table).where(table.c.user_id == user_id)
+            .order_by(table.c.created_date, table.c.id).limit(1)
+        )
+        return portfolios[0] if portfolios else None
+
+    # ===== Holdings =====
+
+    async def get_portfolio_holdings(self, portfolio_id: str) -> List[Holding]:
+        """Get all holdings of a portfolio"""
+        table = ENTITY_TABLES[Holding]
+        return await self._fetch_entities(
+            Holding,
+            select(table).where(table.c.portfolio_id == portfolio_id).order_by(table.c.created_date, table.c.id)
+        )
+
+    async def get_symbol_holdings(self, symbol: str) -> List[Holding]:
+        """Get all holdings of a symbol across portfolios"""
+        table = ENTITY_TABLES[Holding]
+        return await self._fetch_entities(Holding, select(table).where(table.c.symbol == symbol))
+
+    # ===== Trades =====
+
+    async def get_trade_page(
+        self,
+        portfolio_id: str,
+        limit: int = 100,
+        cursor: Optional[TradeCursor] = None
+    ) -> Tuple[List[Trade], Optional[TradeCursor]]:
+        """
+        One page of a portfolio's trades, newest first (keyset pagination)
+
+        Args:
+            portfolio_id: Portfolio to read
+            limit: Page size
+            cursor: (created_date, id) of the last trade of the previous page
+
+        Returns:
+            Tuple of (trades, cursor for the next page or None at the end)
+        """
+        table = ENTITY_TABLES[Trade]
+        stmt = select(table).where(table.c.portfolio_id == portfolio_id)
+        if cursor is not None:
+            created_date, trade_id = cursor
+            stmt = stmt.where(or_(
+                table.c.created_date < created_date,
+                and_(table.c.created_date == created_date, table.c.id < trade_id)
+            ))
+        stmt = stmt.order_by(table.c.created_date.desc(), table.c.id.desc()).limit(limit + 1)
+
+        trades = await self._fetch_entities(Trade, stmt)
+        if len(trades) <= limit:
+            return trades, None
+        trades = trades[:limit]
+        return trades, (trades[-1].created_date, trades[-1].id)
+
+    async def get_pending_trades(self) -> List[Trade]:
+        """Trades accepted but not yet placed, oldest first"""
+        table = ENTITY_TABLES[Trade]
+        stmt = select(table).where(table.c.status == "pending").order_by(table.c.created_date, table.c.id)
+        return await self._fetch_entities(Trade, stmt)
+
+    async def claim_pending_trade(self, trade: Trade) -> bool:
+        """
+        Take a pending trade for placement (compare-and-set on updated_date)
+
+        Succeeds for exactly one caller holding the stored version of the
+        trade; the winner's trade gets the new updated_date.
+        """
+        table = ENTITY_TABLES[Trade]
+        claimed_at = datetime.now()
+        stmt = update(table).where(
+            table.c.id == trade.id,
+            table.c.status == "pending",
+            table.c.updated_date == trade.updated_date
+        ).values(updated_date=claimed_at)
+        async with self.engine.begin() as conn:
+            result = await conn.execute(stmt)
+        if result.rowcount != 1:
+            return False
+        trade.updated_date = claimed_at
+        return True
+
+    # ===== Recommendations, tax harvests, accounts, videos =====
+
+    async def get_user_recommendations(self, user_id: str) -> List[AIRecommendation]:
+        """Get a user's recommendations, newest first"""
+        table = ENTITY_TABLES[AIRecommendation]
+        return await self._fetch_entities(
+            AIRecommendation,
+            select(table).where(table.c.user_id == user_id).order_by(table.c.created_date.desc())
+        )
+
+    async def get_portfolio_tax_harvests(self, portfolio_id: str) -> List[TaxHarvest]:
+        """Get a portfolio's tax harvests"""
+        table = ENTITY_TABLES[TaxHarvest]
+        return await self._fetch_entities(
+            TaxHarvest, select(table).where(table.c.portfolio_id == portfolio_id)
+        )
+
+    async def get_user_external_accounts(self, user_id: str) -> List[ExternalAccount]:
+        """Get a user's external accounts"""
+        table = ENTITY_TABLES[ExternalAccount]
+        return await self._fetch_entities(
+            ExternalAccount, select(table).where(table.c.user_id == user_id)
+        )
+
+    async def get_educational_videos(self, category: Optional[str] = None) -> List[EducationalVideo]:
+        """Get educational videos, optionally filtered by category"""
+        table = ENTITY_TABLES[EducationalVideo]
+        stmt = select(table)
+        if category:
+            stmt = stmt.where(table.c.category == category)
+        return await self._fetch_entities(EducationalVideo, stmt.order_by(table.c.created_date))
+
+# Export
+__all__ = ["SQLRepository", "TradeCursor"]
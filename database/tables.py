@@ -0,0 +1,188 @@
+"""
+Database Tables
+SQLAlchemy Core tables mirroring models/entities.py (see schema.sql)
+"""
+
+from sqlalchemy import (
+    MetaData, Table, Column, Index, String, Text, Float, Integer, Boolean,
+    Date, DateTime, JSON
+)
+
+from models.entities import (
+    Portfolio, Holding, Trade, AIRecommendation, TaxHarvest,
+    ExternalAccount, EducationalVideo, User
+)
+
+metadata = MetaData()
+
+# IDs are stored as strings so the same tables work on PostgreSQL and SQLite;
+# money columns are floats to round-trip the entity dataclasses unchanged.
+
+users = Table(
+    "users", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("email", String(255), nullable=False, unique=True),
+    Column("full_name", String(255), nullable=False),
+    Column("phone", String(50)),
+    Column("risk_tolerance", String(20)),
+    Column("investment_experience", String(20)),
+    Column("annual_income", Float, default=0.0),
+    Column("created_date", DateTime, nullable=False),
+    Column("updated_date", DateTime, nullable=False),
+)
+
+portfolios = Table(
+    "portfolios", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("user_id", String(36), nullable=False),
+    Column("name", String(255), nullable=False),
+    Column("total_value", Float, default=0.0),
+    Column("total_gain_loss", Float, default=0.0),
+    Column("total_gain_loss_percent", Float, default=0.0),
+    Column("cash_balance", Float, default=0.0),
+    Column("risk_score", Float, default=50.0),
+    Column("risk_tolerance", String(20)),
+    Column("last_rebalanced", Date),
+    Column("created_date", DateTime, nullable=False),
+    Column("updated_date", DateTime, nullable=False),
+    Index("idx_portfolios_user_id", "user_id", "created_date"),
+)
+
+holdings = Table(
+    "holdings", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("portfolio_id", String(36), nullable=False),
+    Column("symbol", String(20), nullable=False),
+    Column("company_name", String(255)),
+    Column("shares", Float, nullable=False),
+    Column("average_cost", Float, nullable=False),
+    Column("current_price", Float, default=0.0),
+    Column("total_value", Float, default=0.0),
+    Column("total_gain_loss", Float, default=0.0),
+    Column("total_gain_loss_percent", Float, default=0.0),
+    Column("sector", String(100)),
+    Column("asset_class", String(50)),
+    Column("created_date", DateTime, nullable=False),
+    Column("updated_date", DateTime, nullable=False),
+    Index("idx_holdings_portfolio_id", "portfolio_id"),
+    Index("idx_holdings_symbol", "symbol"),
+)
+
+trades = Table(
+    "trades", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("portfolio_id", String(36), nullable=False),
+    Column("symbol", String(20), nullable=False),
+    Column("trade_type", String(10)),
+    Column("order_type", String(10)),
+    Column("shares", Float, nullable=False),
+    Column("price", Float),
+    Column("limit_price", Float),
+    Column("stop_price", Float),
+    Column("total_amount", Float),
+    Column("status", String(20)),
+    Column("executed_at", DateTime),
+    Column("notes", Text),
+    Column("created_date", DateTime, nullable=False),
+    Column("updated_date", DateTime, nullable=False),
+    # Serves keyset pagination: WHERE portfolio_id = ? AND (created_date, id) < cursor
+    Index("idx_trades_portfolio_created", "portfolio_id", "created_date", "id"),
+    Index("idx_trades_symbol", "symbol"),
+    Index("idx_trades_status", "status"),
+)
+
+ai_recommendations = Table(
+    "ai_recommendations", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("user_id", String(36), nullable=False),
+    Column("title", String(500), nullable=False),
+    Column("description", Text, nullable=False),
+    Column("recommendation_type", String(50)),
+    Column("symbol", String(20)),
+    Column("confidence_score", Float),
+    Column("potential_gain", Float),
+    Column("risk_level", String(20)),
+    Column("priority", String(20)),
+    Column("status", String(20)),
+    Column("expires_at", DateTime),
+    Column("created_date", DateTime, nullable=False),
+    Column("updated_date", DateTime, nullable=False),
+    Index("idx_recommendations_user_created", "user_id", "created_date"),
+    Index("idx_recommendations_status", "status"),
+)
+
+tax_harvests = Table(
+    "tax_harvests", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("portfolio_id", String(36), nullable=False),
+    Column("symbol", String(20), nullable=False),
+    Column("shares", Float, nullable=False),
+    Column("purchase_price", Float, nullable=False),
+    Column("current_price", Float, nullable=False),
+    Column("loss_amount", Float, nullable=False),
+    Column("tax_savings", Float, nullable=False),
+    Column("purchase_date", Date),
+    Column("status", String(20)),
+    Column("identified_date", Date),
+    Column("wash_sale_date", Date),
+    Column("created_date", DateTime, nullable=False),
+    Column("updated_date", DateTime, nullable=False),
+    Index("idx_tax_harvests_portfolio_id", "portfolio_id"),
+    Index("idx_tax_harvests_symbol", "symbol"),
+    Index("idx_tax_harvests_status", "status"),
+)
+
+external_accounts = Table(
+    "external_accounts", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("user_id", String(36), nullable=False),
+    Column("account_name", String(255), nullable=False),
+    Column("broker_name", String(255), nullable=False),
+    Column("account_number", String(100)),
+    Column("account_type", String(50)),
+    Column("total_value", Float, default=0.0),
+    Column("cash_balance", Float, default=0.0),
+    Column("connection_status", String(20)),
+    Column("last_synced", DateTime),
+    Column("api_key", Text),
+    Column("created_date", DateTime, nullable=False),
+    Column("updated_date", DateTime, nullable=False),
+    Index("idx_external_accounts_user_id", "user_id"),
+)
+
+educational_videos = Table(
+    "educational_videos", metadata,
+    Column("id", String(36), primary_key=True),
+    Column("title", String(500), nullable=False),
+    Column("description", Text, nullable=False),
+    Column("video_url", Text),
+    Column("thumbnail_url", Text),
+    Column("duration", Integer, default=0),
+    Column("category", String(100)),
+    Column("difficulty_level", String(20)),
+    Column("tags", JSON),
+    Column("views", Integer, default=0),
+    Column("is_interactive", Boolean, default=False),
+    Column("created_date", DateTime, nullable=False),
+    Column("updated_date", DateTime, nullable=False),
+    Index("idx_educational_videos_category", "category"),
+)
+
+# Entity type -> table
+ENTITY_TABLES = {
+    User: users,
+    Portfolio: portfolios,
+    Holding: holdings,
+    Trade: trades,
+    AIRecommendation: ai_recommendations,
+    TaxHarvest: tax_harvests,
+    ExternalAccount: external_accounts,
+    EducationalVideo: educational_videos,
+}
+
+# Export
+__all__ = [
+    "metadata", "ENTITY_TABLES",
+    "users", "portfolios", "holdings", "trades", "ai_recommendations",
+    "tax_harvests", "external_accounts", "educational_videos"
+]
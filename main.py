@@ -4,11 +4,13 @@ Perfectly matched to Base44 frontend entities
 IBKR integration + 500M+ user scalability
 """
 
-from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse, Response
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
+import json
 import uvicorn
 import os
 from dotenv import load_dotenv
@@ -18,10 +20,16 @@ load_dotenv()
 
 # Import models and services
 from models.entities import Portfolio, Holding, Trade, AIRecommendation, TaxHarvest, ExternalAccount, EducationalVideo, User
+from models.serializers import dumps
 from services.ibkr_client import IBKRClient
+from services.cache import TieredCache, RedisBackend
+from services.market_data_hub import MarketDataHub
+from services.historical_store import HistoricalBarStore
 from services.portfolio_service import PortfolioService
+from services.wash_sale_index import WashSaleIndex
 from services.tax_harvest_service import TaxHarvestService
 from services.ai_recommendations import AIRecommendationEngine
+from database import init_db
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -40,16 +48,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Staleness budget (seconds) for quotes shown on display endpoints
+DISPLAY_QUOTE_MAX_AGE = float(os.getenv("QUOTE_DISPLAY_MAX_AGE", 2.0))
+
 # Initialize services (will be done in startup event)
 ibkr_client = None
+cache = None
+market_data_hub = None
 portfolio_service = None
 tax_harvest_service = None
 ai_recommendation_engine = None
 
+def load_inference_service():
+    """Serve the latest saved LSTM autoencoder, if one has been trained"""
+    registry_dir = os.getenv("MODEL_REGISTRY_DIR")
+    if not registry_dir or not os.path.isdir(registry_dir):
+        return None
+    # TensorFlow is only imported when there is a model to serve
+    from models.model_registry import ModelRegistry
+    from services.encoder_inference import EncoderInferenceService
+    
+    return EncoderInferenceService.from_registry(
+        ModelRegistry(registry_dir),
+        HistoricalBarStore(os.getenv("HISTORICAL_DATA_DIR", "./data/bars")),
+        name=os.getenv("MODEL_NAME", "lstmae")
+    )
+
 @app.on_event("startup")
 async def startup():
     """Initialize all services on startup"""
-    global ibkr_client, portfolio_service, tax_harvest_service, ai_recommendation_engine
+    global ibkr_client, cache, market_data_hub, portfolio_service, tax_harvest_service, ai_recommendation_engine
     
     print("[STARTUP] Initializing WealthAlloc Backend...")
     
@@ -57,17 +85,73 @@ async def startup():
     ibkr_client = IBKRClient(
         host=os.getenv("IBKR_HOST", "127.0.0.1"),
         port=int(os.getenv("IBKR_PORT", 7497)),
-        client_id=int(os.getenv("IBKR_CLIENT_ID", 1))
+        client_id=int(os.getenv("IBKR_CLIENT_ID", 1)),
+        max_in_flight=int(os.getenv("IBKR_MAX_IN_FLIGHT", 50)),
+        quote_cache_size=int(os.getenv("QUOTE_CACHE_MAX_SIZE", 10000))
     )
     await ibkr_client.connect()
+    market_data_hub = MarketDataHub(
+        ibkr_client,
+        tick_interval=float(os.getenv("MARKET_DATA_TICK_INTERVAL", 1.0)),
+        max_streams_per_client=int(os.getenv("MARKET_DATA_MAX_STREAMS_PER_USER", 10))
+    )
     
-    # Initialize services
-    portfolio_service = PortfolioService(ibkr_client)
-    tax_harvest_service = TaxHarvestService(ibkr_client)
-    ai_recommendation_engine = AIRecommendationEngine()
+    # Shared cache: in-process LRU, backed by Redis when REDIS_URL is set
+    redis_url = os.getenv("REDIS_URL")
+    cache = TieredCache(
+        remote=RedisBackend.from_url(redis_url) if redis_url else None,
+        default_ttl=float(os.getenv("CACHE_TTL_DEFAULT", 300)),
+        local_ttl=float(os.getenv("CACHE_TTL_LOCAL", 5))
+    )
+    
+    # Initialize services (wash-sale checks span the trade and harvest paths)
+    wash_sales = WashSaleIndex()
+    portfolio_service = PortfolioService(
+        ibkr_client,
+        cache=cache,
+        max_concurrent_orders=int(os.getenv("IBKR_MAX_CONCURRENT_ORDERS", 10)),
+        wash_sales=wash_sales
+    )
+    tax_harvest_service = TaxHarvestService(
+        ibkr_client,
+        cache=cache,
+        repository=portfolio_service.repository,
+        min_loss=float(os.getenv("TLH_MIN_LOSS_THRESHOLD", 500.0)),
+        wash_sales=wash_sales
+    )
+    ai_recommendation_engine = AIRecommendationEngine(cache=cache, inference=load_inference_service())
+    
+    # Stored price history feeds replacement-security search
+    bars_dir = os.getenv("HISTORICAL_DATA_DIR")
+    if bars_dir and os.path.isdir(bars_dir):
+        tax_harvest_service.load_asset_data(HistoricalBarStore(bars_dir))
+    
+    # Persist writes to the shared database so every worker/replica sees them
+    if os.getenv("DATABASE_ENABLED", "False").lower() == "true":
+        store = await init_db()
+        await portfolio_service.attach_store(store)
+        await tax_harvest_service.attach_store(store)
+        await ai_recommendation_engine.attach_store(store)
+    
+    # Resubmit orders accepted but not placed before the last shutdown
+    await portfolio_service.orders.recover()
+    
+    # Mark holdings to market on every streamed tick of a held symbol
+    portfolio_service.revaluation.start_tracking(market_data_hub)
     
     print("[STARTUP] ✓ All services initialized successfully")
 
+@app.on_event("shutdown")
+async def shutdown():
+    """Release upstream subscriptions on shutdown"""
+    if portfolio_service:
+        await portfolio_service.revaluation.stop_tracking()
+        await portfolio_service.orders.stop()
+    if market_data_hub:
+        await market_data_hub.close()
+    if cache:
+        await cache.close()
+
 # ===== Request/Response Models =====
 
 class TradeRequest(BaseModel):
@@ -79,6 +163,9 @@ class TradeRequest(BaseModel):
     limit_price: Optional[float] = None
     stop_price: Optional[float] = None
 
+class BatchTradeRequest(BaseModel):
+    trades: List[TradeRequest] = Field(..., min_length=1, max_length=100)
+
 class RecommendationUpdate(BaseModel):
     status: str  # acted_upon, dismissed, expired
 
@@ -98,17 +185,37 @@ async def get_current_user_id() -> str:
     # TODO: Implement JWT token verification
     return "user_1"  # Demo user for MVP
 
+# ===== Response Caching =====
+
+async def cached_json_response(request: Request, endpoint: str, user_id: str, build) -> Response:
+    """Serve a per-user pre-encoded response with ETag / 304 support"""
+    cache = portfolio_service.response_cache
+    entry = cache.get(user_id, endpoint)
+    
+    if entry is None:
+        version = cache.version(user_id)
+        payload = await build(user_id)
+        body = dumps(payload)
+        if "error" in payload:
+            return Response(content=body, media_type="application/json")
+        entry = cache.put(user_id, endpoint, body, version)
+    
+    headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache"}
+    if cache.etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
 # ===== API Endpoints =====
 
 @app.get("/api/v1/dashboard")
-async def get_dashboard(user_id: str = Depends(get_current_user_id)):
+async def get_dashboard(request: Request, user_id: str = Depends(get_current_user_id)):
     """Dashboard data for Dashboard.jsx"""
-    return await portfolio_service.get_dashboard_data(user_id)
+    return await cached_json_response(request, "dashboard", user_id, portfolio_service.get_dashboard_data)
 
 @app.get("/api/v1/portfolio")
-async def get_portfolio(user_id: str = Depends(get_current_user_id)):
+async def get_portfolio(request: Request, user_id: str = Depends(get_current_user_id)):
     """Portfolio data for Portfolio.jsx"""
-    return await portfolio_service.get_portfolio_data(user_id)
+    return await cached_json_response(request, "portfolio", user_id, portfolio_service.get_portfolio_data)
 
 @app.get("/api/v1/recommendations")
 async def get_recommendations(user_id: str = Depends(get_current_user_id)):
@@ -125,9 +232,12 @@ async def update_recommendation(
     return await ai_recommendation_engine.update_recommendation_status(rec_id, update.status)
 
 @app.get("/api/v1/tax-harvesting")
-async def get_tax_harvesting(user_id: str = Depends(get_current_user_id)):
+async def get_tax_harvesting(
+    status: Optional[str] = Query(None, pattern="^(identified|pending|executed|expired)$"),
+    user_id: str = Depends(get_current_user_id)
+):
     """Tax harvesting data for TaxHarvesting.jsx"""
-    return await tax_harvest_service.get_tax_harvesting_data(user_id)
+    return await tax_harvest_service.get_tax_harvesting_data(user_id, status)
 
 @app.post("/api/v1/tax-harvesting/execute")
 async def execute_tax_harvest(
@@ -142,16 +252,42 @@ async def create_trade(
     trade: TradeRequest,
     user_id: str = Depends(get_current_user_id)
 ):
-    """Create trade for Trade.jsx"""
+    """Create trade for Trade.jsx (returned as pending; poll /api/v1/trades/{trade_id})"""
     return await portfolio_service.create_trade(trade.dict())
 
+@app.post("/api/v1/trades/batch")
+async def create_trades_batch(
+    batch: BatchTradeRequest,
+    user_id: str = Depends(get_current_user_id)
+):
+    """Submit several trades at once (rebalancing); returns per-order results"""
+    return await portfolio_service.create_trades_batch([trade.dict() for trade in batch.trades])
+
+@app.get("/api/v1/trades/{trade_id}")
+async def get_trade_status(trade_id: str, user_id: str = Depends(get_current_user_id)):
+    """Poll a trade's status (pending, executed, failed)"""
+    result = await portfolio_service.get_trade_status(user_id, trade_id)
+    if "error" in result:
+        raise HTTPException(status_code=404, detail=result["error"])
+    return result
+
 @app.get("/api/v1/trade-history")
 async def get_trade_history(
-    limit: int = Query(100, le=500),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+    format: str = Query("json", pattern="^(json|ndjson)$"),
     user_id: str = Depends(get_current_user_id)
 ):
-    """Trade history for TradeHistory.jsx"""
-    return await portfolio_service.get_trade_history(user_id, limit)
+    """Trade history for TradeHistory.jsx (format=ndjson streams the full history)"""
+    if format == "ndjson":
+        return StreamingResponse(
+            portfolio_service.stream_trade_history(user_id),
+            media_type="application/x-ndjson"
+        )
+    result = await portfolio_service.get_trade_history(user_id, limit, cursor)
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
 
 @app.get("/api/v1/external-accounts")
 async def get_external_accounts(user_id: str = Depends(get_current_user_id)):
@@ -182,7 +318,23 @@ async def update_profile(
 @app.get("/api/v1/market-data/{symbol}")
 async def get_market_data(symbol: str):
     """Get real-time market data from IBKR"""
-    return await ibkr_client.get_market_data(symbol)
+    return await ibkr_client.get_market_data(symbol, max_age=DISPLAY_QUOTE_MAX_AGE)
+
+@app.get("/api/v1/market-data/{symbol}/stream")
+async def stream_market_data(symbol: str, user_id: str = Depends(get_current_user_id)):
+    """Stream real-time market data as Server-Sent Events (capped per user)"""
+    if not market_data_hub.stream_allowed(user_id):
+        raise HTTPException(status_code=429, detail="Too many open market data streams")
+    
+    async def event_stream():
+        async for tick in market_data_hub.stream(symbol, client_id=user_id):
+            yield f"data: {json.dumps(tick)}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"}
+    )
 
 @app.get("/health")
 async def health_check():
@@ -190,7 +342,9 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "ibkr_connected": ibkr_client.connected if ibkr_client else False
+        "ibkr_connected": ibkr_client.connected if ibkr_client else False,
+        "quote_cache": ibkr_client.quote_cache.stats() if ibkr_client else None,
+        "cache": cache.stats() if cache else None
     }
 
 if __name__ == "__main__":
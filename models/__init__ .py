@@ -11,10 +11,14 @@ from .entities import (
     TaxHarvest,
     ExternalAccount,
     EducationalVideo,
-    User
+    User,
+    demo_id
 )
+from .serializers import serialize, serialize_many, dumps
 from .lstm_autoencoder import LSTMAutoencoder
+from .model_registry import ModelRegistry
 from .similarity_engine import SimilarityEngine, AssetSimilarity
+from .similarity_index import SimilarityIndex
 
 __all__ = [
     "Portfolio",
@@ -25,7 +29,13 @@ __all__ = [
     "ExternalAccount",
     "EducationalVideo",
     "User",
+    "demo_id",
+    "serialize",
+    "serialize_many",
+    "dumps",
     "LSTMAutoencoder",
+    "ModelRegistry",
     "SimilarityEngine",
-    "AssetSimilarity"
+    "AssetSimilarity",
+    "SimilarityIndex"
 ]
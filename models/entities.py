@@ -18,7 +18,7 @@ from decimal import Decimal
 
 # ==================== EXACT BASE44 ENTITY MODELS ====================
 
-@dataclass
+@dataclass(slots=True)
 class Portfolio:
     """Portfolio entity - matches Base44 schema exactly"""
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
@@ -34,7 +34,7 @@ class Portfolio:
     created_date: datetime = field(default_factory=datetime.now)
     updated_date: datetime = field(default_factory=datetime.now)
 
-@dataclass
+@dataclass(slots=True)
 class Holding:
     """Holding entity - matches Base44 schema exactly"""
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
@@ -52,7 +52,7 @@ class Holding:
     created_date: datetime = field(default_factory=datetime.now)
     updated_date: datetime = field(default_factory=datetime.now)
 
-@dataclass
+@dataclass(slots=True)
 class Trade:
     """Trade entity - matches Base44 schema exactly"""
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
@@ -71,7 +71,7 @@ class Trade:
     created_date: datetime = field(default_factory=datetime.now)
     updated_date: datetime = field(default_factory=datetime.now)
 
-@dataclass
+@dataclass(slots=True)
 class AIRecommendation:
     """AI Recommendation entity - matches Base44 schema exactly"""
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
@@ -89,7 +89,7 @@ class AIRecommendation:
     created_date: datetime = field(default_factory=datetime.now)
     updated_date: datetime = field(default_factory=datetime.now)
 
-@dataclass
+@dataclass(slots=True)
 class TaxHarvest:
     """Tax Harvest entity - matches Base44 schema exactly"""
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
@@ -107,7 +107,7 @@ class TaxHarvest:
     created_date: datetime = field(default_factory=datetime.now)
     updated_date: datetime = field(default_factory=datetime.now)
 
-@dataclass
+@dataclass(slots=True)
 class ExternalAccount:
     """External Account entity - matches Base44 schema exactly"""
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
@@ -124,7 +124,7 @@ class ExternalAccount:
     created_date: datetime = field(default_factory=datetime.now)
     updated_date: datetime = field(default_factory=datetime.now)
 
-@dataclass
+@dataclass(slots=True)
 class EducationalVideo:
     """Educational Video entity - matches Base44 schema exactly"""
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
@@ -141,7 +141,7 @@ class EducationalVideo:
     created_date: datetime = field(default_factory=datetime.now)
     updated_date: datetime = field(default_factory=datetime.now)
 
-@dataclass
+@dataclass(slots=True)
 class User:
     """User model with investment profile"""
     id: str = field(default_factory=lambda: str(uuid.uuid4()))
@@ -154,3 +154,7 @@ class User:
     created_date: datetime = field(default_factory=datetime.now)
     updated_date: datetime = field(default_factory=datetime.now)
 
+
+def demo_id(*parts: str) -> str:
+    """Stable id for a demo entity, so every worker seeds the same rows"""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, "wealthalloc:demo:" + ":".join(parts)))
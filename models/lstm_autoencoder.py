@@ -12,7 +12,35 @@ import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers
 import networkx as nx
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+
+# ==================== SEQUENCE WINDOWS ====================
+
+def window_dataset(
+    buffer: tf.Tensor,
+    sequence_length: int,
+    start: int,
+    stop: int,
+    batch_size: int,
+    shuffle: bool = False
+) -> tf.data.Dataset:
+    """
+    Lazily batched (window, window) pairs for windows starting at [start, stop)
+    
+    Only window start indices flow through the pipeline; each batch is
+    gathered from the (n_samples, n_features) buffer when it is consumed,
+    so memory scales with batch_size rather than with the number of windows.
+    """
+    dataset = tf.data.Dataset.range(start, stop)
+    if shuffle:
+        dataset = dataset.shuffle(stop - start, reshuffle_each_iteration=True)
+    offsets = tf.range(sequence_length, dtype=tf.int64)
+    
+    def gather(starts):
+        windows = tf.gather(buffer, starts[:, None] + offsets[None, :])
+        return windows, windows
+    
+    return dataset.batch(batch_size).map(gather, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
 
 # ==================== LSTM AUTOENCODER (FROM PAPER) ====================
 
@@ -22,13 +50,25 @@ class LSTMAutoencoder:
     Based on Nature paper methodology
     """
     
-    def __init__(self, sequence_length: int = 60, encoding_dim: int = 32):
+    def __init__(self, sequence_length: int = 60, encoding_dim: int = 32, replay_days: int = 250):
         self.sequence_length = sequence_length
         self.encoding_dim = encoding_dim
+        self.replay_days = replay_days
         self.encoder = None
         self.decoder = None
         self.autoencoder = None
         self.correlation_matrix = None
+        # Per-stock normalization stats of the training returns (for inference)
+        self.returns_mean = None
+        self.returns_std = None
+        self.returns_count = 0
+        # Most recent raw returns, replayed when fine-tuning on new days
+        self.replay_buffer: Optional[np.ndarray] = None
+        # Column order of the training returns and registry version, when known
+        self.symbols: Optional[List[str]] = None
+        self.version: Optional[int] = None
+        # Date of the last trading day folded in, when trained on dated bars
+        self.last_date: Optional[date] = None
         
     def build_model(self, n_features: int):
         """Build LSTM Autoencoder architecture"""
@@ -74,14 +114,25 @@ class LSTMAutoencoder:
         Train autoencoder on normalized stock returns
         stock_returns: shape (n_samples, n_stocks)
         """
-        # Normalize returns
-        normalized_returns = (stock_returns - stock_returns.mean(axis=0)) / stock_returns.std(axis=0)
+        if len(stock_returns) <= self.sequence_length:
+            raise ValueError(
+                f"Need more than {self.sequence_length} days to train, got {len(stock_returns)}"
+            )
         
-        # Create sequences
-        X = []
-        for i in range(len(normalized_returns) - self.sequence_length):
-            X.append(normalized_returns[i:i + self.sequence_length])
-        X = np.array(X)
+        # Normalize returns
+        self.returns_mean = stock_returns.mean(axis=0)
+        self.returns_std = stock_returns.std(axis=0)
+        self.returns_count = len(stock_returns)
+        self.replay_buffer = np.array(stock_returns[-max(self.replay_days, self.sequence_length + 1):])
+        normalized_returns = self.normalize(stock_returns)
+        
+        # Sequences are gathered per batch from the normalized buffer; the last
+        # 20% of windows are held out for validation (as validation_split did)
+        buffer = tf.constant(normalized_returns, dtype=tf.float32)
+        n_windows = len(normalized_returns) - self.sequence_length
+        n_train = n_windows - int(n_windows * 0.2)
+        train_data = window_dataset(buffer, self.sequence_length, 0, n_train, batch_size, shuffle=True)
+        validation_data = window_dataset(buffer, self.sequence_length, n_train, n_windows, batch_size)
         
         # Build model if not exists
         if self.autoencoder is None:
@@ -89,10 +140,9 @@ class LSTMAutoencoder:
         
         # Train (autoencoder learns to reconstruct input)
         history = self.autoencoder.fit(
-            X, X,
+            train_data,
             epochs=epochs,
-            batch_size=batch_size,
-            validation_split=0.2,
+            validation_data=validation_data if n_train < n_windows else None,
             verbose=0
         )
         
@@ -101,6 +151,56 @@ class LSTMAutoencoder:
         
         return history
     
+    def normalize(self, returns: np.ndarray) -> np.ndarray:
+        """Scale returns by the training stats; a constant column is only centred"""
+        std = np.where(self.returns_std == 0, 1.0, self.returns_std)
+        return (returns - self.returns_mean) / std
+    
+    def update(self, new_returns: np.ndarray, epochs: int = 3, batch_size: int = 32):
+        """
+        Warm-start refresh on newly arrived trading days
+        new_returns: shape (n_new_days, n_stocks)
+        
+        Folds the new days into the running mean/std (Welford, in its
+        batched form), appends them to the replay buffer of recent days and
+        fine-tunes the current weights on that buffer for a few epochs.
+        """
+        if self.autoencoder is None or self.replay_buffer is None:
+            raise ValueError("Model must be trained before it can be updated")
+        new_returns = np.atleast_2d(np.asarray(new_returns, dtype=np.float64))
+        if new_returns.size == 0:
+            raise ValueError("No new returns to update with")
+        
+        # Running stats: combine (count, mean, M2) of history and new days
+        n_old, n_new = self.returns_count, len(new_returns)
+        total = n_old + n_new
+        new_mean = new_returns.mean(axis=0)
+        delta = new_mean - self.returns_mean
+        m2 = (
+            np.square(self.returns_std) * n_old
+            + np.square(new_returns - new_mean).sum(axis=0)
+            + np.square(delta) * n_old * n_new / total
+        )
+        self.returns_mean = self.returns_mean + delta * n_new / total
+        self.returns_std = np.sqrt(m2 / total)
+        self.returns_count = total
+        
+        # Replay buffer keeps the most recent replay_days rows
+        keep = max(self.replay_days, self.sequence_length + 1)
+        self.replay_buffer = np.concatenate([self.replay_buffer, new_returns])[-keep:]
+        
+        normalized_returns = self.normalize(self.replay_buffer)
+        buffer = tf.constant(normalized_returns, dtype=tf.float32)
+        n_windows = len(normalized_returns) - self.sequence_length
+        history = self.autoencoder.fit(
+            window_dataset(buffer, self.sequence_length, 0, n_windows, batch_size, shuffle=True),
+            epochs=epochs,
+            verbose=0
+        )
+        
+        self._extract_correlation_matrix()
+        return history
+    
     def _extract_correlation_matrix(self):
         """
         Extract correlation matrix from LSTM weights
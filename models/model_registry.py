@@ -0,0 +1,175 @@
+"""
+Model Registry
+Versioned on-disk artifacts for trained LSTM autoencoders
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from models.lstm_autoencoder import LSTMAutoencoder
+
+class ModelRegistry:
+    """
+    Local directory of versioned model artifacts
+
+    Layout: <root>/<name>/v<N>/ holds manifest.json plus one .npy file per
+    array (encoder and decoder weights, correlation matrix, normalization
+    stats, replay buffer for warm-start refreshes). A version is written to
+    a temporary directory and renamed into place, so a directory with a
+    manifest is always complete and readers never see a partial save.
+
+    Loading memory-maps the arrays; the correlation matrix and stats stay
+    mapped, and the Keras weights are copied once into the rebuilt model.
+    """
+
+    MANIFEST = "manifest.json"
+
+    def __init__(self, root_dir: str):
+        self.root_dir = root_dir
+        os.makedirs(root_dir, exist_ok=True)
+
+    def _model_dir(self, name: str) -> str:
+        return os.path.join(self.root_dir, name)
+
+    def _version_dir(self, name: str, version: int) -> str:
+        return os.path.join(self._model_dir(name), f"v{version}")
+
+    def versions(self, name: str) -> List[int]:
+        """Complete versions of a model, oldest first"""
+        model_dir = self._model_dir(name)
+        if not os.path.isdir(model_dir):
+            return []
+        found = []
+        for entry in os.listdir(model_dir):
+            if entry.startswith("v") and entry[1:].isdigit():
+                if os.path.exists(os.path.join(model_dir, entry, self.MANIFEST)):
+                    found.append(int(entry[1:]))
+        return sorted(found)
+
+    def latest_version(self, name: str) -> Optional[int]:
+        versions = self.versions(name)
+        return versions[-1] if versions else None
+
+    # ===== Save =====
+
+    def save(self, model: LSTMAutoencoder, name: str = "lstmae", metadata: Optional[Dict] = None) -> int:
+        """
+        Write a trained model as the next version
+
+        Args:
+            model: Trained autoencoder
+            name: Model (universe) name
+            metadata: Extra JSON-serializable fields for the manifest
+
+        Returns:
+            The new version number
+        """
+        if model.autoencoder is None or model.correlation_matrix is None:
+            raise ValueError("Model must be trained first")
+
+        arrays = {"correlation_matrix": model.correlation_matrix}
+        if model.returns_mean is not None:
+            arrays["returns_mean"] = np.asarray(model.returns_mean)
+            arrays["returns_std"] = np.asarray(model.returns_std)
+        if model.replay_buffer is not None:
+            arrays["replay_buffer"] = model.replay_buffer
+        encoder_weights = model.encoder.get_weights()
+        decoder_weights = model.decoder.get_weights()
+        arrays.update({f"encoder_{i}": w for i, w in enumerate(encoder_weights)})
+        arrays.update({f"decoder_{i}": w for i, w in enumerate(decoder_weights)})
+
+        model_dir = self._model_dir(name)
+        os.makedirs(model_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=model_dir)
+        try:
+            for key, array in arrays.items():
+                np.save(os.path.join(staging, f"{key}.npy"), array)
+
+            version = (self.latest_version(name) or 0) + 1
+            manifest = {
+                "name": name,
+                "version": version,
+                "created": datetime.now().isoformat(),
+                "sequence_length": model.sequence_length,
+                "encoding_dim": model.encoding_dim,
+                "replay_days": model.replay_days,
+                "returns_count": model.returns_count,
+                "n_features": int(model.correlation_matrix.shape[0]),
+                "symbols": model.symbols,
+                "last_date": model.last_date.isoformat() if model.last_date else None,
+                "encoder_weights": len(encoder_weights),
+                "decoder_weights": len(decoder_weights),
+                "arrays": sorted(arrays),
+                "metadata": metadata or {}
+            }
+            with open(os.path.join(staging, self.MANIFEST), "w") as f:
+                json.dump(manifest, f, indent=2)
+
+            # Concurrent savers race for the same version number; retry on collision
+            while True:
+                try:
+                    os.rename(staging, self._version_dir(name, version))
+                    break
+                except OSError:
+                    if not os.path.exists(self._version_dir(name, version)):
+                        raise
+                    version += 1
+                    manifest["version"] = version
+                    with open(os.path.join(staging, self.MANIFEST), "w") as f:
+                        json.dump(manifest, f, indent=2)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        print(f"[REGISTRY] Saved {name} v{version}")
+        return version
+
+    # ===== Load =====
+
+    def manifest(self, name: str, version: Optional[int] = None) -> Dict:
+        """Manifest of a version (default: latest)"""
+        version = version or self.latest_version(name)
+        if version is None:
+            raise FileNotFoundError(f"No saved versions of {name}")
+        with open(os.path.join(self._version_dir(name, version), self.MANIFEST)) as f:
+            return json.load(f)
+
+    def load(self, name: str = "lstmae", version: Optional[int] = None) -> LSTMAutoencoder:
+        """Rebuild a saved model (default: latest version) without training"""
+        manifest = self.manifest(name, version)
+        version_dir = self._version_dir(name, manifest["version"])
+
+        def array(key: str) -> np.ndarray:
+            return np.load(os.path.join(version_dir, f"{key}.npy"), mmap_mode="r")
+
+        model = LSTMAutoencoder(
+            sequence_length=manifest["sequence_length"],
+            encoding_dim=manifest["encoding_dim"],
+            replay_days=manifest.get("replay_days", 250)
+        )
+        model.build_model(n_features=manifest["n_features"])
+        model.encoder.set_weights([array(f"encoder_{i}") for i in range(manifest["encoder_weights"])])
+        model.decoder.set_weights([array(f"decoder_{i}") for i in range(manifest["decoder_weights"])])
+        model.correlation_matrix = array("correlation_matrix")
+        if "returns_mean" in manifest["arrays"]:
+            model.returns_mean = array("returns_mean")
+            model.returns_std = array("returns_std")
+            model.returns_count = manifest.get("returns_count", 0)
+        if "replay_buffer" in manifest["arrays"]:
+            model.replay_buffer = array("replay_buffer")
+        model.symbols = manifest["symbols"]
+        if manifest.get("last_date"):
+            model.last_date = date.fromisoformat(manifest["last_date"])
+        model.version = manifest["version"]
+
+        print(f"[REGISTRY] Loaded {name} v{manifest['version']}")
+        return model
+
+# Export
+__all__ = ["ModelRegistry"]
@@ -0,0 +1,78 @@
+"""
+Entity Serializers
+Precompiled per-type converters from entities to JSON-ready dicts and bytes
+Replaces dataclasses.asdict on the response path
+"""
+
+import dataclasses
+import json
+import typing
+from typing import Any, Callable, Dict, Iterable, List
+from datetime import datetime, date
+
+_serializers: Dict[type, Callable[[Any], Dict]] = {}
+
+def _unwrap_optional(hint):
+    """Optional[X] -> X"""
+    if typing.get_origin(hint) is typing.Union:
+        args = [a for a in typing.get_args(hint) if a is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return hint
+
+def _field_expression(name: str, hint) -> str:
+    """Source expression converting one field to a JSON-ready value"""
+    hint = _unwrap_optional(hint)
+    if hint in (datetime, date):
+        return f"(v.isoformat() if (v := obj.{name}) is not None else None)"
+    if typing.get_origin(hint) in (list, List):
+        return f"(list(v) if (v := obj.{name}) is not None else None)"
+    if dataclasses.is_dataclass(hint):
+        return f"(serialize(v) if (v := obj.{name}) is not None else None)"
+    return f"obj.{name}"
+
+def _compile(cls: type) -> Callable[[Any], Dict]:
+    """Generate a flat dict-building function for a dataclass type"""
+    hints = typing.get_type_hints(cls)
+    items = ",\n        ".join(
+        f"{f.name!r}: {_field_expression(f.name, hints.get(f.name))}"
+        for f in dataclasses.fields(cls)
+    )
+    source = f"def _serialize_{cls.__name__}(obj):\n    return {{\n        {items}\n    }}\n"
+
+    namespace = {"serialize": serialize}
+    exec(source, namespace)
+    return namespace[f"_serialize_{cls.__name__}"]
+
+def serialize(entity: Any) -> Dict:
+    """
+    Convert an entity to a JSON-ready dict
+
+    Datetimes and dates are preformatted as ISO strings, matching what
+    FastAPI's encoder would produce for asdict output.
+    """
+    cls = type(entity)
+    serializer = _serializers.get(cls)
+    if serializer is None:
+        if not dataclasses.is_dataclass(cls):
+            raise TypeError(f"Cannot serialize {cls.__name__}")
+        serializer = _serializers[cls] = _compile(cls)
+    return serializer(entity)
+
+def serialize_many(entities: Iterable[Any]) -> List[Dict]:
+    """Convert several entities to JSON-ready dicts"""
+    return [serialize(entity) for entity in entities]
+
+def _default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if dataclasses.is_dataclass(value):
+        return serialize(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps(payload: Any) -> bytes:
+    """Encode a response payload (dicts, lists, entities) to compact JSON bytes"""
+    return json.dumps(payload, separators=(",", ":"), default=_default).encode("utf-8")
+
+# Export
+__all__ = ["serialize", "serialize_many", "dumps"]
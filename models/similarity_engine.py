@@ -20,6 +20,14 @@ class AssetSimilarity:
     sector_match: bool
     reasons: List[str]
 
+@dataclass
+class AssetFeatures:
+    """Per-asset features derived once from registered prices"""
+    returns: pd.Series
+    volatility: float
+    price_vector: Optional[np.ndarray]  # demeaned, unit-norm prices (None if not usable)
+    returns_vector: Optional[np.ndarray]  # demeaned, unit-norm returns (None if not usable)
+
 class SimilarityEngine:
     """
     Hybrid similarity engine for comparing assets
@@ -65,6 +73,8 @@ class SimilarityEngine:
         
         self.price_data = {}
         self.asset_metadata = {}
+        self.asset_features: Dict[str, AssetFeatures] = {}
+        self.data_version = 0  # bumped on every add_asset_data
         
     def add_asset_data(
         self,
@@ -79,6 +89,51 @@ class SimilarityEngine:
             "sector": sector,
             "beta": beta
         }
+        # Replacing an asset's prices invalidates only its own features
+        self.asset_features[symbol] = self._compute_features(prices)
+        self.data_version += 1
+    
+    @staticmethod
+    def _unit_vector(values: pd.Series) -> Optional[np.ndarray]:
+        """Demeaned, unit-norm copy of a series, or None if NaN/constant"""
+        array = values.to_numpy(dtype=float)
+        if len(array) < 2 or np.isnan(array).any():
+            return None
+        centered = array - array.mean()
+        norm = np.linalg.norm(centered)
+        if norm == 0:
+            return None
+        return centered / norm
+    
+    def _compute_features(self, prices: pd.Series) -> AssetFeatures:
+        """Derive returns, volatility and normalized vectors for one asset"""
+        returns = prices.pct_change().dropna()
+        return AssetFeatures(
+            returns=returns,
+            volatility=returns.std(),
+            price_vector=self._unit_vector(prices),
+            returns_vector=self._unit_vector(returns)
+        )
+    
+    @staticmethod
+    def _series_correlation(
+        series1: pd.Series,
+        series2: pd.Series,
+        vector1: Optional[np.ndarray],
+        vector2: Optional[np.ndarray]
+    ) -> float:
+        """Correlation over common index, using cached unit vectors when aligned"""
+        if vector1 is not None and vector2 is not None and (
+            series1.index is series2.index or series1.index.equals(series2.index)
+        ):
+            return float(np.clip(np.dot(vector1, vector2), -1.0, 1.0))
+        
+        # Align indices
+        common_idx = series1.index.intersection(series2.index)
+        if len(common_idx) < 2:
+            return 0.0
+        
+        return float(series1.loc[common_idx].corr(series2.loc[common_idx]))
     
     def calculate_price_correlation(
         self,
@@ -89,15 +144,12 @@ class SimilarityEngine:
         if symbol1 not in self.price_data or symbol2 not in self.price_data:
             return 0.0
         
-        prices1 = self.price_data[symbol1]
-        prices2 = self.price_data[symbol2]
-        
-        # Align indices
-        common_idx = prices1.index.intersection(prices2.index)
-        if len(common_idx) < 2:
-            return 0.0
-        
-        return float(prices1.loc[common_idx].corr(prices2.loc[common_idx]))
+        return self._series_correlation(
+            self.price_data[symbol1],
+            self.price_data[symbol2],
+            self.asset_features[symbol1].price_vector,
+            self.asset_features[symbol2].price_vector
+        )
     
     def calculate_returns_correlation(
         self,
@@ -108,19 +160,15 @@ class SimilarityEngine:
         if symbol1 not in self.price_data or symbol2 not in self.price_data:
             return 0.0
         
-        prices1 = self.price_data[symbol1]
-        prices2 = self.price_data[symbol2]
-        
-        # Calculate returns
-        returns1 = prices1.pct_change().dropna()
-        returns2 = prices2.pct_change().dropna()
-        
-        # Align indices
-        common_idx = returns1.index.intersection(returns2.index)
-        if len(common_idx) < 2:
-            return 0.0
+        features1 = self.asset_features[symbol1]
+        features2 = self.asset_features[symbol2]
         
-        return float(returns1.loc[common_idx].corr(returns2.loc[common_idx]))
+        return self._series_correlation(
+            features1.returns,
+            features2.returns,
+            features1.returns_vector,
+            features2.returns_vector
+        )
     
     def calculate_sector_similarity(
         self,
@@ -148,11 +196,8 @@ class SimilarityEngine:
         if symbol1 not in self.price_data or symbol2 not in self.price_data:
             return 0.0
         
-        returns1 = self.price_data[symbol1].pct_change().dropna()
-        returns2 = self.price_data[symbol2].pct_change().dropna()
-        
-        vol1 = returns1.std()
-        vol2 = returns2.std()
+        vol1 = self.asset_features[symbol1].volatility
+        vol2 = self.asset_features[symbol2].volatility
         
         if vol1 == 0 or vol2 == 0:
             return 0.0
@@ -240,25 +285,12 @@ class SimilarityEngine:
             if overall_score < min_similarity:
                 continue
             
-            # Build reasons list
-            reasons = []
-            if components["correlation"] > 0.8:
-                reasons.append(f"High price correlation ({components['correlation']:.2%})")
-            if components["returns"] > 0.8:
-                reasons.append(f"High returns correlation ({components['returns']:.2%})")
-            if components["sector"] == 1.0:
-                reasons.append("Same sector")
-            if components["volatility"] > 0.8:
-                reasons.append("Similar volatility")
-            if components["beta"] > 0.8:
-                reasons.append("Similar beta")
-            
             results.append(AssetSimilarity(
                 symbol=candidate,
                 similarity_score=overall_score,
                 correlation=components["correlation"],
                 sector_match=components["sector"] == 1.0,
-                reasons=reasons
+                reasons=self.similarity_reasons(components)
             ))
         
         # Sort by similarity score
@@ -266,16 +298,47 @@ class SimilarityEngine:
         
         return results[:top_k]
     
+    @staticmethod
+    def similarity_reasons(components: Dict[str, float]) -> List[str]:
+        """Build human-readable reasons from component scores"""
+        reasons = []
+        if components["correlation"] > 0.8:
+            reasons.append(f"High price correlation ({components['correlation']:.2%})")
+        if components["returns"] > 0.8:
+            reasons.append(f"High returns correlation ({components['returns']:.2%})")
+        if components["sector"] == 1.0:
+            reasons.append("Same sector")
+        if components["volatility"] > 0.8:
+            reasons.append("Similar volatility")
+        if components["beta"] > 0.8:
+            reasons.append("Similar beta")
+        return reasons
+    
     def batch_similarity_matrix(
         self,
-        symbols: List[str]
+        symbols: List[str],
+        vectorized: bool = True
     ) -> pd.DataFrame:
         """
         Calculate similarity matrix for all symbol pairs
         
+        Args:
+            symbols: Symbols to compare
+            vectorized: Use the aligned-matrix path (False falls back to
+                calling calculate_overall_similarity for every pair)
+        
         Returns:
             DataFrame with similarity scores
         """
+        if vectorized:
+            components = self.similarity_component_matrices(symbols)
+            matrix = sum(
+                components[key] * self.weights[key]
+                for key in self.weights.keys()
+            )
+            np.fill_diagonal(matrix, 1.0)
+            return pd.DataFrame(matrix, index=symbols, columns=symbols)
+        
         n = len(symbols)
         matrix = np.zeros((n, n))
         
@@ -288,6 +351,109 @@ class SimilarityEngine:
                     matrix[i, j] = score
         
         return pd.DataFrame(matrix, index=symbols, columns=symbols)
+    
+    def similarity_component_matrices(
+        self,
+        symbols: List[str]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Calculate every similarity component for all symbol pairs at once
+        
+        Prices (and returns) of all registered symbols are aligned into a
+        single array, so correlations come from one pass of matrix products
+        and volatility, beta and sector similarity from broadcasting.
+        Symbols without registered data score 0.0, as in the scalar path.
+        
+        Returns:
+            Dict mapping component name to an (n, n) matrix
+        """
+        n = len(symbols)
+        components = {key: np.zeros((n, n)) for key in self.weights.keys()}
+        
+        known = [i for i, sym in enumerate(symbols) if sym in self.price_data]
+        if not known:
+            return components
+        known_symbols = [symbols[i] for i in known]
+        block = np.ix_(known, known)
+        
+        # Price and returns correlation over pairwise-common dates
+        prices = self._aligned_matrix([self.price_data[sym] for sym in known_symbols])
+        returns_series = [self.asset_features[sym].returns for sym in known_symbols]
+        returns = self._aligned_matrix(returns_series)
+        
+        components["correlation"][block] = self._pairwise_correlation(prices)
+        components["returns"][block] = self._pairwise_correlation(returns)
+        
+        # Volatility similarity: 1 - |vol1 - vol2| / max(vol1, vol2)
+        vol = np.array([self.asset_features[sym].volatility for sym in known_symbols], dtype=float)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            vol_sim = 1.0 - np.abs(vol[:, None] - vol[None, :]) / np.maximum(vol[:, None], vol[None, :])
+        vol_sim[(vol[:, None] == 0) | (vol[None, :] == 0)] = 0.0
+        components["volatility"][block] = np.where(vol_sim > 0, vol_sim, 0.0)
+        
+        # Beta similarity: 1 - |beta1 - beta2| / max(|beta1|, |beta2|)
+        beta = np.array(
+            [self.asset_metadata[sym].get("beta", 1.0) for sym in known_symbols],
+            dtype=float
+        )
+        max_beta = np.maximum(np.abs(beta[:, None]), np.abs(beta[None, :]))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            beta_sim = 1.0 - np.abs(beta[:, None] - beta[None, :]) / max_beta
+        beta_sim = np.where(max_beta == 0, 1.0, np.maximum(beta_sim, 0.0))
+        components["beta"][block] = beta_sim
+        
+        # Sector similarity: equal, non-missing sector codes
+        sectors = [self.asset_metadata[sym].get("sector") for sym in known_symbols]
+        codes, _ = pd.factorize(pd.Series(sectors, dtype=object))
+        same_sector = (codes[:, None] == codes[None, :]) & (codes[:, None] >= 0)
+        components["sector"][block] = same_sector.astype(float)
+        
+        return components
+    
+    @staticmethod
+    def _aligned_matrix(series: List[pd.Series]) -> np.ndarray:
+        """Outer-join series on their index into a (dates, symbols) array"""
+        frame = pd.concat(series, axis=1, keys=range(len(series)), join="outer")
+        return frame.to_numpy(dtype=float)
+    
+    @staticmethod
+    def _pairwise_correlation(values: np.ndarray) -> np.ndarray:
+        """
+        Pearson correlation of every column pair over rows where both are present
+        
+        Equivalent to pandas Series.corr on the common index for each pair.
+        Pairs with fewer than 2 common observations get 0.0.
+        """
+        valid = ~np.isnan(values)
+        
+        if valid.all():
+            if values.shape[0] < 2:
+                return np.zeros((values.shape[1], values.shape[1]))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return np.clip(np.atleast_2d(np.corrcoef(values, rowvar=False)), -1.0, 1.0)
+        
+        mask = valid.astype(float)
+        filled = np.where(valid, values, 0.0)
+        
+        # Shift each column by its mean for numerical stability
+        counts = mask.sum(axis=0)
+        means = filled.sum(axis=0) / np.maximum(counts, 1)
+        centered = np.where(valid, filled - means, 0.0)
+        
+        n = mask.T @ mask
+        sum_x = centered.T @ mask  # sum_x[i, j] = sum of x_i where i and j present
+        sum_xx = (centered ** 2).T @ mask
+        sum_xy = centered.T @ centered
+        
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = sum_xy - sum_x * sum_x.T / n
+            var = sum_xx - sum_x ** 2 / n
+            denom = np.sqrt(np.maximum(var * var.T, 0.0))
+            corr = np.where(denom > 0, cov / denom, np.nan)
+        
+        corr = np.clip(corr, -1.0, 1.0)
+        corr[n < 2] = 0.0
+        return corr
 
 # Export
-__all__ = ["SimilarityEngine", "AssetSimilarity"]
+__all__ = ["SimilarityEngine", "AssetSimilarity", "AssetFeatures"]
@@ -0,0 +1,161 @@
+"""
+Similarity Index
+Precomputed top-k nearest-neighbour search over SimilarityEngine features
+Used for fast replacement-security lookup in tax loss harvesting
+"""
+
+import numpy as np
+import pandas as pd
+from typing import List, Optional
+from datetime import date
+
+from models.similarity_engine import SimilarityEngine, AssetSimilarity
+
+class SimilarityIndex:
+    """
+    Top-k similarity index over a fixed universe
+
+    Normalized price and returns vectors of every asset are stacked into
+    matrices once, so a query is two matrix-vector products plus
+    broadcasting for sector, volatility and beta, followed by an
+    np.argpartition selection instead of a full sort.
+
+    Build once per trading day (or whenever the engine's data changes).
+    Vectors are aligned on the union of dates with missing observations
+    treated as zero deviation, so scores for assets with different date
+    ranges approximate the pairwise-aligned scalar path.
+    """
+
+    def __init__(
+        self,
+        engine: SimilarityEngine,
+        symbols: Optional[List[str]] = None,
+        as_of: Optional[date] = None
+    ):
+        """
+        Build index
+
+        Args:
+            engine: Similarity engine holding registered asset data
+            symbols: Universe to index (default: all registered symbols)
+            as_of: Trading day the index was built for (default: today)
+        """
+        if symbols is None:
+            symbols = list(engine.price_data.keys())
+        self.symbols = [s for s in symbols if s in engine.price_data]
+        self.as_of = as_of or date.today()
+        self.data_version = engine.data_version
+        self.weights = dict(engine.weights)
+        self._positions = {symbol: i for i, symbol in enumerate(self.symbols)}
+
+        n = len(self.symbols)
+        if n == 0:
+            self._price_vectors = np.zeros((0, 0))
+            self._returns_vectors = np.zeros((0, 0))
+        else:
+            prices = engine._aligned_matrix([engine.price_data[s] for s in self.symbols])
+            returns = engine._aligned_matrix([engine.asset_features[s].returns for s in self.symbols])
+            self._price_vectors = self._unit_rows(prices)
+            self._returns_vectors = self._unit_rows(returns)
+
+        self._volatility = np.array(
+            [engine.asset_features[s].volatility for s in self.symbols], dtype=float
+        )
+        self._beta = np.array(
+            [engine.asset_metadata[s].get("beta", 1.0) for s in self.symbols], dtype=float
+        )
+        sectors = [engine.asset_metadata[s].get("sector") for s in self.symbols]
+        self._sector_codes, _ = pd.factorize(pd.Series(sectors, dtype=object))
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._positions
+
+    def is_current(self, engine: SimilarityEngine, as_of: Optional[date] = None) -> bool:
+        """Whether the index still reflects the engine's data for the given day"""
+        return self.as_of == (as_of or date.today()) and self.data_version == engine.data_version
+
+    @staticmethod
+    def _unit_rows(values: np.ndarray) -> np.ndarray:
+        """(dates, symbols) array -> (symbols, dates) demeaned unit-norm rows"""
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0.0)
+        counts = np.maximum(valid.sum(axis=0), 1)
+        centered = np.where(valid, filled - filled.sum(axis=0) / counts, 0.0)
+        norms = np.linalg.norm(centered, axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            unit = np.where(norms > 0, centered / norms, 0.0)
+        return np.ascontiguousarray(unit.T)
+
+    def query(
+        self,
+        symbol: str,
+        top_k: int = 5,
+        min_similarity: float = 0.7
+    ) -> List[AssetSimilarity]:
+        """
+        Find the most similar indexed assets
+
+        Args:
+            symbol: Symbol to find replacements for
+            top_k: Number of top matches to return
+            min_similarity: Minimum similarity threshold
+
+        Returns:
+            List of AssetSimilarity objects, best first
+        """
+        i = self._positions.get(symbol)
+        if i is None or top_k <= 0:
+            return []
+
+        correlation = self._price_vectors @ self._price_vectors[i]
+        returns = self._returns_vectors @ self._returns_vectors[i]
+
+        code = self._sector_codes[i]
+        sector = ((self._sector_codes == code) & (code >= 0)).astype(float)
+
+        vol = self._volatility
+        with np.errstate(invalid="ignore", divide="ignore"):
+            volatility = 1.0 - np.abs(vol - vol[i]) / np.maximum(vol, vol[i])
+        volatility[(vol == 0) | (vol[i] == 0)] = 0.0
+        volatility = np.where(volatility > 0, volatility, 0.0)
+
+        beta = self._beta
+        max_beta = np.maximum(np.abs(beta), abs(beta[i]))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            beta_sim = 1.0 - np.abs(beta - beta[i]) / max_beta
+        beta_sim = np.where(max_beta == 0, 1.0, np.maximum(beta_sim, 0.0))
+
+        components = {
+            "correlation": correlation,
+            "returns": returns,
+            "sector": sector,
+            "volatility": volatility,
+            "beta": beta_sim
+        }
+        scores = sum(components[key] * self.weights[key] for key in self.weights.keys())
+        scores[i] = -np.inf
+
+        # Select top-k eligible candidates without sorting the whole universe
+        eligible = np.flatnonzero(scores >= min_similarity)
+        if len(eligible) > top_k:
+            eligible = eligible[np.argpartition(-scores[eligible], top_k - 1)[:top_k]]
+        ranked = eligible[np.argsort(-scores[eligible], kind="stable")]
+
+        results = []
+        for j in ranked:
+            scores_j = {key: float(values[j]) for key, values in components.items()}
+            results.append(AssetSimilarity(
+                symbol=self.symbols[j],
+                similarity_score=float(scores[j]),
+                correlation=scores_j["correlation"],
+                sector_match=scores_j["sector"] == 1.0,
+                reasons=SimilarityEngine.similarity_reasons(scores_j)
+            ))
+
+        return results
+
+# Export
+__all__ = ["SimilarityIndex"]
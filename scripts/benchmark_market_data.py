@@ -0,0 +1,61 @@
+"""
+Market Data Benchmark
+Measure bulk quote fan-out and request coalescing against a fake gateway
+"""
+
+import asyncio
+import time
+import sys
+sys.path.insert(0, '..')
+
+from services.ibkr_client import IBKRClient
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class FakeGatewayClient(IBKRClient):
+    """IBKRClient whose gateway calls sleep for a fixed round-trip latency"""
+
+    def __init__(self, latency: float = 0.05, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.gateway_calls = 0
+
+    async def _fetch_market_data(self, symbol: str):
+        self.gateway_calls += 1
+        await asyncio.sleep(self.latency)
+        return await super()._fetch_market_data(symbol)
+
+async def serial_bulk(client: IBKRClient, symbols):
+    """Bulk fetch the way it was done before: one awaited request at a time"""
+    return {symbol: await client.get_market_data(symbol) for symbol in symbols}
+
+async def run_benchmark(n_symbols=200, n_users=50, latency=0.05, max_in_flight=50):
+    """Compare serial, concurrent and coalesced bulk quote fetching"""
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+
+    client = FakeGatewayClient(latency=latency, max_in_flight=max_in_flight)
+    start = time.perf_counter()
+    await serial_bulk(client, symbols)
+    serial_time = time.perf_counter() - start
+    logger.info(f"Serial bulk ({n_symbols} symbols):      {serial_time:8.3f} s, {client.gateway_calls} gateway calls")
+
+    client = FakeGatewayClient(latency=latency, max_in_flight=max_in_flight)
+    start = time.perf_counter()
+    await client.get_market_data_bulk(symbols)
+    bulk_time = time.perf_counter() - start
+    logger.info(f"Concurrent bulk ({n_symbols} symbols):  {bulk_time:8.3f} s, {client.gateway_calls} gateway calls")
+
+    # Dashboard storm: many users refresh the same portfolio symbols at once
+    client = FakeGatewayClient(latency=latency, max_in_flight=max_in_flight)
+    start = time.perf_counter()
+    await asyncio.gather(*(client.get_market_data_bulk(symbols) for _ in range(n_users)))
+    storm_time = time.perf_counter() - start
+    logger.info(
+        f"{n_users} concurrent users:           {storm_time:8.3f} s, "
+        f"{client.gateway_calls} gateway calls (vs {n_users * n_symbols} uncoalesced)"
+    )
+
+if __name__ == "__main__":
+    asyncio.run(run_benchmark())
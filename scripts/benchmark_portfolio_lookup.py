@@ -0,0 +1,85 @@
+"""
+Portfolio Lookup Benchmark
+Compare full-table scans with PortfolioRepository indexed lookups
+"""
+
+import time
+import sys
+sys.path.insert(0, '..')
+
+from models.entities import Portfolio, Holding, Trade
+from services.portfolio_repository import PortfolioRepository
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def build_repository(n_users=100_000, holdings_per_portfolio=10, trades_per_portfolio=2):
+    """Populate a repository with one portfolio per user"""
+    logger.info(
+        f"Building repository: {n_users} users, "
+        f"{n_users * holdings_per_portfolio} holdings, {n_users * trades_per_portfolio} trades"
+    )
+    repo = PortfolioRepository()
+
+    for u in range(n_users):
+        portfolio = repo.add_portfolio(Portfolio(id=f"portfolio_{u}", user_id=f"user_{u}"))
+        for h in range(holdings_per_portfolio):
+            repo.add_holding(Holding(
+                id=f"holding_{u}_{h}",
+                portfolio_id=portfolio.id,
+                symbol=f"SYM{h}",
+                total_value=1000.0
+            ))
+        for t in range(trades_per_portfolio):
+            repo.add_trade(Trade(id=f"trade_{u}_{t}", portfolio_id=portfolio.id, symbol=f"SYM{t}"))
+
+    return repo
+
+def scan_lookup(repo: PortfolioRepository, user_id: str):
+    """Lookup the way PortfolioService did before indexing"""
+    portfolio = None
+    for p in repo.portfolios.values():
+        if p.user_id == user_id:
+            portfolio = p
+            break
+    holdings = [h for h in repo.holdings.values() if h.portfolio_id == portfolio.id]
+    trades = [t for t in repo.trades.values() if t.portfolio_id == portfolio.id]
+    return holdings, trades
+
+def indexed_lookup(repo: PortfolioRepository, user_id: str):
+    """Lookup through the secondary indexes"""
+    portfolio = repo.get_user_portfolio(user_id)
+    holdings = repo.get_portfolio_holdings(portfolio.id)
+    trades = repo.get_portfolio_trades(portfolio.id)
+    return holdings, trades
+
+def time_per_call(fn, repo, user_ids):
+    """Average seconds per call over the given users"""
+    start = time.perf_counter()
+    for user_id in user_ids:
+        fn(repo, user_id)
+    return (time.perf_counter() - start) / len(user_ids)
+
+def run_benchmark(n_users=100_000, holdings_per_portfolio=10):
+    """Run scan vs indexed lookups and log the speedup"""
+    repo = build_repository(n_users, holdings_per_portfolio)
+    last_user = f"user_{n_users - 1}"
+
+    # Sanity check: both paths return the same rows
+    assert [h.id for h in scan_lookup(repo, last_user)[0]] == \
+        [h.id for h in indexed_lookup(repo, last_user)[0]]
+
+    scan_users = [f"user_{u}" for u in range(n_users - 5, n_users)]
+    indexed_users = [f"user_{u}" for u in range(0, n_users, max(1, n_users // 10_000))]
+
+    scan_time = time_per_call(scan_lookup, repo, scan_users)
+    indexed_time = time_per_call(indexed_lookup, repo, indexed_users)
+
+    logger.info(f"Full scan:      {scan_time * 1e3:10.3f} ms/request")
+    logger.info(f"Indexed lookup: {indexed_time * 1e3:10.3f} ms/request")
+    logger.info(f"Speedup:        {scan_time / indexed_time:10.0f}x")
+
+if __name__ == "__main__":
+    # 100k users x 10 holdings = 1M holdings
+    run_benchmark(n_users=100_000, holdings_per_portfolio=10)
@@ -1,14 +1,44 @@
 """
 LSTM Autoencoder Training Script
 Train the model on historical stock data
+
+Usage:
+    python train_lstmae.py                          # one 50-stock model on sample data
+    python train_lstmae.py --manifest universes.json [--workers N] [--intra-op-threads N]
+    python train_lstmae.py --refresh [--name lstmae] [--epochs 3]   # nightly warm-start
+
+Manifest format:
+    {
+      "defaults": {"sequence_length": 60, "encoding_dim": 32, "epochs": 100, "batch_size": 32},
+      "universes": [
+        {"name": "tech", "symbols": ["AAPL", "MSFT", "NVDA"]},
+        {"name": "sample", "n_stocks": 50, "n_days": 500, "epochs": 20}
+      ]
+    }
+Universes with symbols train on closes from the local bar store
+(HISTORICAL_DATA_DIR); the others on generated sample data.
+
+--refresh fine-tunes the latest saved version on the bars stored after
+the last trading day it has seen (last_date in its manifest) and saves
+the result as a new version.
 """
 
 import numpy as np
 import pandas as pd
+import argparse
+import json
+import multiprocessing
+import os
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+from datetime import date
 sys.path.insert(0, '..')
 
 from models.lstm_autoencoder import LSTMAutoencoder
+from models.model_registry import ModelRegistry
+from services.historical_store import HistoricalBarStore
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -59,14 +89,203 @@ def train_model():
     logger.info("Training complete!")
     logger.info(f"Final loss: {history.history['loss'][-1]:.6f}")
     
-    # Save model
-    model_path = "../models/lstm_autoencoder.pth"
-    logger.info(f"Saving model to {model_path}")
-    
-    # TODO: Implement model saving
-    # torch.save(model.state_dict(), model_path)
+    # Save model as the next registry version (workers load the latest)
+    registry = ModelRegistry(os.getenv("MODEL_REGISTRY_DIR", "../models/registry"))
+    model.symbols = [f"STOCK_{i}" for i in range(stock_returns.shape[1])]
+    version = registry.save(model, os.getenv("MODEL_NAME", "lstmae"), metadata={
+        "final_loss": float(history.history['loss'][-1]),
+        "epochs": len(history.history['loss'])
+    })
+    logger.info(f"Saved model version {version} to {registry.root_dir}")
     
     logger.info("✓ Model training and saving complete!")
 
+def load_bar_returns(symbols: List[str], start: Optional[date] = None) -> pd.DataFrame:
+    """Daily close-to-close returns from the local bar store, indexed by date"""
+    store = HistoricalBarStore(os.getenv("HISTORICAL_DATA_DIR", "../data/bars"))
+    dates, closes = store.load_aligned(symbols, start=start)
+    closes = pd.DataFrame(closes, index=pd.DatetimeIndex(dates), columns=symbols)
+    # Days a symbol has no bar count as unchanged
+    return closes.ffill().pct_change().iloc[1:].fillna(0.0)
+
+def refresh_model(registry_dir: str, name: str = "lstmae", epochs: int = 3) -> int:
+    """
+    Fine-tune the latest saved model on the trading days stored since it
+    last trained, and save it as a new version
+    
+    Only bars after the manifest's last_date are folded in, so rerunning
+    a refresh never counts the same day twice in the running stats.
+    """
+    registry = ModelRegistry(registry_dir)
+    model = registry.load(name)
+    if model.last_date is None or not model.symbols:
+        raise ValueError(f"{name} v{model.version} has no bar history to refresh from; retrain it")
+    
+    # Bars from last_date on: that day's close is the base of the first new return
+    new_returns = load_bar_returns(model.symbols, start=model.last_date)
+    new_returns = new_returns[new_returns.index.date > model.last_date]
+    if new_returns.empty:
+        raise ValueError(f"No bars for {name} after {model.last_date.isoformat()}")
+    
+    logger.info(f"Refreshing {name} v{model.version} with {len(new_returns)} new days...")
+    history = model.update(new_returns.to_numpy(), epochs=epochs)
+    refreshed_from = model.version
+    model.last_date = new_returns.index[-1].date()
+    
+    version = registry.save(model, name, metadata={
+        "final_loss": float(history.history['loss'][-1]),
+        "epochs": len(history.history['loss']),
+        "refreshed_from": refreshed_from
+    })
+    logger.info(f"Saved refreshed model version {version} through {model.last_date.isoformat()}")
+    return version
+
+# ==================== MULTI-UNIVERSE DRIVER ====================
+
+def _init_worker(intra_op_threads: int, inter_op_threads: int):
+    """Cap TensorFlow's thread pools before the worker runs any op"""
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+def load_universe_returns(universe: Dict) -> pd.DataFrame:
+    """Daily returns for a universe, shape (n_days, n_stocks), one column per symbol"""
+    symbols = universe.get("symbols")
+    if not symbols:
+        np.random.seed(universe.get("seed", 0))
+        returns = generate_sample_data(universe.get("n_stocks", 50), universe.get("n_days", 500))
+        return pd.DataFrame(returns, columns=[f"STOCK_{i}" for i in range(returns.shape[1])])
+    
+    # A symbol with no stored bars would be a constant column; train without it
+    store = HistoricalBarStore(os.getenv("HISTORICAL_DATA_DIR", "../data/bars"))
+    missing = [symbol for symbol in symbols if not len(store.read_bars(symbol)["date"])]
+    if missing:
+        logger.warning(f"Universe {universe['name']}: no bars for {', '.join(missing)}; dropping them")
+    symbols = [symbol for symbol in symbols if symbol not in missing]
+    if not symbols:
+        raise ValueError(f"Universe {universe['name']} has no symbols with stored bars")
+    return load_bar_returns(symbols)
+
+def train_universe(universe: Dict, registry_dir: str) -> Dict:
+    """Train and save one universe's model (runs in a worker process)"""
+    name = universe["name"]
+    frame = load_universe_returns(universe)
+    returns = frame.to_numpy()
+    model = LSTMAutoencoder(
+        sequence_length=universe.get("sequence_length", 60),
+        encoding_dim=universe.get("encoding_dim", 32)
+    )
+    epochs = universe.get("epochs", 100)
+    
+    start = time.perf_counter()
+    history = model.train(returns, epochs=epochs, batch_size=universe.get("batch_size", 32))
+    train_seconds = time.perf_counter() - start
+    
+    model.symbols = [str(symbol) for symbol in frame.columns]
+    if isinstance(frame.index, pd.DatetimeIndex):
+        model.last_date = frame.index[-1].date()
+    windows = len(returns) - model.sequence_length
+    version = ModelRegistry(registry_dir).save(model, name, metadata={
+        "final_loss": float(history.history['loss'][-1]),
+        "epochs": epochs
+    })
+    return {
+        "name": name,
+        "version": version,
+        "n_stocks": int(returns.shape[1]),
+        "n_days": int(returns.shape[0]),
+        "epochs": epochs,
+        "train_seconds": round(train_seconds, 2),
+        "windows_per_second": round(windows * epochs / train_seconds, 1),
+        "final_loss": float(history.history['loss'][-1]),
+        "pid": os.getpid()
+    }
+
+def train_universes(
+    manifest_path: str,
+    registry_dir: str,
+    workers: int = 0,
+    intra_op_threads: int = 1,
+    inter_op_threads: int = 1
+) -> List[Dict]:
+    """
+    Train every universe in a manifest concurrently across a process pool
+    
+    Each worker process caps TensorFlow at intra_op_threads/inter_op_threads,
+    and by default there are as many workers as fit in the machine's cores,
+    so universes train side by side instead of one after another. One
+    timing report covering every universe is written to
+    <registry_dir>/training_report.json.
+    """
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    defaults = manifest.get("defaults", {})
+    universes = [{**defaults, **universe} for universe in manifest["universes"]]
+    workers = workers or max(1, (os.cpu_count() or 1) // intra_op_threads)
+    workers = min(workers, len(universes))
+    
+    # Inherited by the spawned workers before TensorFlow initializes
+    os.environ["OMP_NUM_THREADS"] = str(intra_op_threads)
+    os.environ["TF_NUM_INTRAOP_THREADS"] = str(intra_op_threads)
+    os.environ["TF_NUM_INTEROP_THREADS"] = str(inter_op_threads)
+    
+    logger.info(f"Training {len(universes)} universes on {workers} workers "
+                f"({intra_op_threads} intra-op / {inter_op_threads} inter-op threads each)")
+    start = time.perf_counter()
+    report = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(intra_op_threads, inter_op_threads)
+    ) as pool:
+        futures = {pool.submit(train_universe, universe, registry_dir): universe["name"] for universe in universes}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error(f"Universe {futures[future]} failed: {e}")
+                result = {"name": futures[future], "error": str(e)}
+            else:
+                logger.info(f"{result['name']}: v{result['version']} in {result['train_seconds']}s "
+                            f"({result['windows_per_second']} windows/s, loss {result['final_loss']:.6f})")
+            report.append(result)
+    
+    wall_seconds = time.perf_counter() - start
+    report.sort(key=lambda r: r["name"])
+    report_path = os.path.join(registry_dir, "training_report.json")
+    with open(report_path, "w") as f:
+        json.dump({
+            "wall_seconds": round(wall_seconds, 2),
+            "workers": workers,
+            "intra_op_threads": intra_op_threads,
+            "inter_op_threads": inter_op_threads,
+            "universes": report
+        }, f, indent=2)
+    logger.info(f"Trained {len(report)} universes in {wall_seconds:.1f}s; report written to {report_path}")
+    return report
+
 if __name__ == "__main__":
-    train_model()
+    parser = argparse.ArgumentParser(description="Train LSTM autoencoders")
+    parser.add_argument("--manifest", help="JSON manifest of universes to train in parallel")
+    parser.add_argument("--registry-dir", default=os.getenv("MODEL_REGISTRY_DIR", "../models/registry"))
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (default: cores / intra-op threads)")
+    parser.add_argument("--intra-op-threads", type=int, default=1)
+    parser.add_argument("--inter-op-threads", type=int, default=1)
+    parser.add_argument("--refresh", action="store_true", help="Fine-tune the latest version on bars since it last trained")
+    parser.add_argument("--name", default=os.getenv("MODEL_NAME", "lstmae"), help="Model to refresh")
+    parser.add_argument("--epochs", type=int, default=3, help="Fine-tuning epochs for --refresh")
+    args = parser.parse_args()
+    
+    if args.refresh:
+        refresh_model(args.registry_dir, args.name, epochs=args.epochs)
+    elif args.manifest:
+        train_universes(
+            args.manifest,
+            args.registry_dir,
+            workers=args.workers,
+            intra_op_threads=args.intra_op_threads,
+            inter_op_threads=args.inter_op_threads
+        )
+    else:
+        train_model()
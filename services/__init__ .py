@@ -4,13 +4,42 @@ Business logic layer for WealthAlloc backend
 """
 
 from .ibkr_client import IBKRClient
+from .quote_cache import QuoteCache
+from .market_data_hub import MarketDataHub
+from .historical_store import HistoricalBarStore
 from .portfolio_service import PortfolioService
+from .portfolio_repository import PortfolioRepository
+from .revaluation_engine import RevaluationEngine
+from .holdings_columns import ColumnarHoldings
+from .response_cache import ResponseCache
+from .cache import TieredCache, LocalLRUBackend, RedisBackend
+from .order_pipeline import OrderPipeline
+from .harvest_scanner import HarvestScanner, TaxLots
+from .harvest_book import HarvestBook
+from .wash_sale_index import WashSaleIndex
 from .tax_harvest_service import TaxHarvestService
+from .encoder_inference import EncoderInferenceService
 from .ai_recommendations import AIRecommendationEngine
 
 __all__ = [
     "IBKRClient",
+    "QuoteCache",
+    "MarketDataHub",
+    "HistoricalBarStore",
     "PortfolioService",
+    "PortfolioRepository",
+    "RevaluationEngine",
+    "ColumnarHoldings",
+    "ResponseCache",
+    "TieredCache",
+    "LocalLRUBackend",
+    "RedisBackend",
+    "OrderPipeline",
+    "HarvestScanner",
+    "TaxLots",
+    "HarvestBook",
+    "WashSaleIndex",
     "TaxHarvestService",
+    "EncoderInferenceService",
     "AIRecommendationEngine"
 ]
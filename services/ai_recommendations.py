@@ -3,19 +3,32 @@ AI Recommendations Service
 Generates intelligent investment recommendations using ML
 """
 
-from typing import List, Dict, Optional
-from datetime import datetime, timedelta
-from dataclasses import asdict
-import uuid
+from typing import TYPE_CHECKING, List, Dict, Optional
+from datetime import date, datetime, timedelta
 import random
 
-from models.entities import AIRecommendation
+from models.entities import AIRecommendation, demo_id
+from models.serializers import serialize, serialize_many
+from services.cache import TieredCache
+from database.repository import SQLRepository
+
+if TYPE_CHECKING:
+    # TensorFlow is only imported where a model is actually served
+    from services.encoder_inference import EncoderInferenceService
 
 class AIRecommendationEngine:
     """AI-powered recommendation engine"""
     
-    def __init__(self):
+    def __init__(
+        self,
+        cache: Optional[TieredCache] = None,
+        inference: Optional["EncoderInferenceService"] = None
+    ):
         self.recommendations = {}
+        self.cache = cache
+        # Warm LSTM autoencoder for anomaly checks (risk analysis is a placeholder without it)
+        self.inference = inference
+        self.store: Optional[SQLRepository] = None
         
         # Initialize demo recommendations
         self._initialize_demo_recommendations()
@@ -67,7 +80,7 @@ class AIRecommendationEngine:
         
         for title, desc, rec_type, symbol, confidence, potential_gain, risk, priority in recs_data:
             rec = AIRecommendation(
-                id=str(uuid.uuid4()),
+                id=demo_id("recommendation", "user_1", title),
                 user_id="user_1",
                 title=title,
                 description=desc,
@@ -82,13 +95,31 @@ class AIRecommendationEngine:
             )
             self.recommendations[rec.id] = rec
     
+    async def attach_store(self, store: SQLRepository):
+        """Persist writes to a SQL store, seeding it if empty, and start from its recommendations"""
+        self.store = store
+        if not await store.get_user_recommendations("user_1"):
+            await store.save_many(self.recommendations.values())
+        
+        self.recommendations.clear()
+        for rec in await store.all(AIRecommendation):
+            self.recommendations[rec.id] = rec
+        print(f"[AI] Loaded {len(self.recommendations)} recommendations from the store")
+    
     async def get_recommendations(self, user_id: str) -> Dict:
         """Get all recommendations for user"""
+        if self.cache is not None:
+            return await self.cache.get_or_set(
+                "recommendations", user_id, lambda: self._build_recommendations(user_id)
+            )
+        return await self._build_recommendations(user_id)
+    
+    async def _build_recommendations(self, user_id: str) -> Dict:
         recs = [r for r in self.recommendations.values() if r.user_id == user_id]
         recs.sort(key=lambda x: x.created_date, reverse=True)
         
         return {
-            "recommendations": [asdict(r) for r in recs],
+            "recommendations": serialize_many(recs),
             "total_count": len(recs),
             "active_count": len([r for r in recs if r.status == "active"])
         }
@@ -101,10 +132,13 @@ class AIRecommendationEngine:
         rec = self.recommendations[rec_id]
         rec.status = status
         rec.updated_date = datetime.now()
+        if self.store is not None:
+            await self.store.save(rec)
+        await self._invalidate(rec.user_id)
         
         return {
             "success": True,
-            "recommendation": asdict(rec)
+            "recommendation": serialize(rec)
         }
     
     async def generate_recommendation(
@@ -134,24 +168,67 @@ class AIRecommendationEngine:
         )
         
         self.recommendations[rec.id] = rec
+        if self.store is not None:
+            await self.store.save(rec)
+        await self._invalidate(user_id)
         return rec
     
-    def analyze_portfolio_risk(self, holdings: List[Dict]) -> Dict:
-        """Analyze portfolio risk using ML models"""
-        # TODO: Implement LSTM Autoencoder risk analysis
+    async def _invalidate(self, user_id: str):
+        """Drop a user's cached recommendations"""
+        if self.cache is not None:
+            await self.cache.invalidate("recommendations", user_id)
+    
+    async def analyze_portfolio_risk(self, holdings: List[Dict], as_of: Optional[date] = None) -> Dict:
+        """
+        Analyze portfolio risk using LSTM autoencoder reconstruction errors
+        
+        Holdings whose recent returns the model reconstructs poorly are
+        anomalous. The risk score is the value-weighted reconstruction error
+        scaled so the anomaly threshold maps to 50 (capped at 100).
+        """
+        if self.inference is None:
+            return {
+                "risk_score": 55.0,
+                "anomaly_detected": False,
+                "recommendations": []
+            }
+        
+        scores = await self.inference.score_symbols([h["symbol"] for h in holdings], as_of)
+        weights = {}
+        for h in holdings:
+            if h["symbol"] in scores:
+                weights[h["symbol"]] = weights.get(h["symbol"], 0.0) + h.get("total_value", 0.0)
+        total = sum(weights.values())
+        if not scores:
+            weighted_error = 0.0
+        elif total > 0:
+            weighted_error = sum(scores[s]["reconstruction_error"] * w for s, w in weights.items()) / total
+        else:
+            weighted_error = sum(s["reconstruction_error"] for s in scores.values()) / len(scores)
+        
+        anomalies = sorted(
+            (symbol for symbol, score in scores.items() if score["anomaly"]),
+            key=lambda symbol: -scores[symbol]["reconstruction_error"]
+        )
         return {
-            "risk_score": 55.0,
-            "anomaly_detected": False,
-            "recommendations": []
+            "risk_score": round(min(100.0, 50.0 * weighted_error / self.inference.anomaly_threshold), 1),
+            "anomaly_detected": bool(anomalies),
+            "recommendations": [
+                {
+                    "symbol": symbol,
+                    "reconstruction_error": scores[symbol]["reconstruction_error"],
+                    "reason": "Recent returns deviate from the learned correlation structure"
+                }
+                for symbol in anomalies
+            ]
         }
     
     def analyze_sector_allocation(self, holdings: List[Dict]) -> Dict:
         """Analyze sector allocation and suggest improvements"""
         sector_allocation = {}
         for holding in holdings:
-            sector = holding.get("sector", "Other")
-            value = holding.get("total_value", 0)
-            sector_allocation[sector] = sector_allocation.get(sector, 0) + value
+            sector = holding.get("sector") or "Other"
+            sector_allocation[sector] = sector_allocation.get(sector, 0.0) + holding.get("total_value", 0.0)
         
         return {
             "current_allocation": sector_allocation,
@@ -0,0 +1,361 @@
+"""
+Cache Layer
+Two-tier cache-aside helper: in-process LRU in front of a Redis-protocol tier
+"""
+
+import asyncio
+import json
+import math
+import random
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from models.serializers import dumps
+
+class CacheBackend(ABC):
+    """Byte-oriented remote cache tier"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float):
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+
+class LocalBackend(ABC):
+    """In-process cache tier holding decoded envelopes (synchronous)"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, envelope: Dict, ttl: float):
+        ...
+
+    @abstractmethod
+    def delete(self, key: str):
+        ...
+
+class LocalLRUBackend(LocalBackend):
+    """
+    In-process LRU tier
+
+    Stores decoded envelopes directly (no serialization) with a local
+    expiry, so hot keys cost one dict lookup.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry[0]:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: str, envelope: Dict, ttl: float):
+        if ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + ttl, envelope)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+class RedisBackend(CacheBackend):
+    """Redis-protocol tier backed by a redis.asyncio client"""
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str, socket_timeout: float = 0.5) -> "RedisBackend":
+        """Create from a redis:// URL (requires the redis package)"""
+        import redis.asyncio as aioredis
+
+        return cls(aioredis.from_url(
+            url,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_timeout
+        ))
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await self.client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    async def delete(self, key: str):
+        await self.client.delete(key)
+
+    async def close(self):
+        await self.client.aclose()
+
+class TieredCache:
+    """
+    Cache-aside with an in-process LRU in front of an optional remote tier
+
+    - Keys are namespaced as "<prefix>:<namespace>:<key>".
+    - Values must be JSON-serializable (entities are serialized with
+      models.serializers).
+    - Concurrent misses for the same key share one loader call.
+    - Entries are refreshed early with probability rising as expiry nears
+      (XFetch: recompute when now - delta * beta * ln(rand) >= expiry,
+      where delta is the last load time), so hot keys don't stampede.
+    - The local tier uses a short TTL because invalidations only reach
+      other processes through the remote tier.
+    - Remote failures are counted and the tier is bypassed for
+      remote_retry_after seconds; the cache keeps working locally.
+      Remote deletes that could not be sent are queued and replayed in
+      the background every remote_retry_after seconds, and before this
+      process uses the tier again. Unreadable remote entries are misses.
+    - invalidate() bumps a per-key version; a load that started before
+      the invalidation returns its value to its callers but does not
+      store it.
+    """
+
+    def __init__(
+        self,
+        local: Optional[LocalBackend] = None,
+        remote: Optional[CacheBackend] = None,
+        prefix: str = "wealthalloc",
+        default_ttl: float = 300.0,
+        local_ttl: float = 5.0,
+        beta: float = 1.0,
+        remote_retry_after: float = 30.0
+    ):
+        self.local = local or LocalLRUBackend()
+        self.remote = remote
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+        self.local_ttl = local_ttl
+        self.beta = beta
+        self.remote_retry_after = remote_retry_after
+        self._remote_down_until = 0.0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._versions: Dict[str, int] = {}
+        # Remote deletes still owed (dict used as an insertion-ordered set)
+        self._pending_deletes: Dict[str, None] = {}
+        self._retry_task: Optional[asyncio.Task] = None
+
+        self.stats_counters = {
+            "local_hits": 0,
+            "remote_hits": 0,
+            "misses": 0,
+            "early_refreshes": 0,
+            "coalesced": 0,
+            "remote_errors": 0,
+            "remote_decode_errors": 0,
+        }
+
+    def make_key(self, namespace: str, key: str) -> str:
+        """Fully qualified cache key"""
+        return f"{self.prefix}:{namespace}:{key}"
+
+    # ===== Envelope helpers =====
+
+    def _should_refresh(self, envelope: Dict) -> bool:
+        """XFetch early-expiration test"""
+        delta = envelope.get("delta", 0.0)
+        if delta <= 0 or self.beta <= 0:
+            return time.time() >= envelope["expires_at"]
+        return time.time() - delta * self.beta * math.log(random.random() or 1e-12) >= envelope["expires_at"]
+
+    def _local_ttl(self, ttl: float) -> float:
+        """Local entries live for the full TTL only when there is no shared tier"""
+        return ttl if self.remote is None else min(self.local_ttl, ttl)
+
+    def _remote_available(self) -> bool:
+        return self.remote is not None and time.monotonic() >= self._remote_down_until
+
+    def _remote_failed(self, error: Exception):
+        self.stats_counters["remote_errors"] += 1
+        self._remote_down_until = time.monotonic() + self.remote_retry_after
+        print(f"[CACHE] Remote tier error: {error}; using local tier only")
+
+    async def _flush_pending_deletes(self) -> bool:
+        """Replay deletes skipped while the remote tier was down; False if it is (still) down"""
+        while self._pending_deletes:
+            if not self._remote_available():
+                return False
+            full_key = next(iter(self._pending_deletes))
+            try:
+                await self.remote.delete(full_key)
+            except Exception as e:
+                self._remote_failed(e)
+                return False
+            self._pending_deletes.pop(full_key, None)
+        return self._remote_available()
+
+    async def _read_remote(self, full_key: str) -> Optional[Dict]:
+        if not await self._flush_pending_deletes():
+            return None
+        try:
+            raw = await self.remote.get(full_key)
+        except Exception as e:
+            self._remote_failed(e)
+            return None
+        if raw is None:
+            return None
+        try:
+            envelope = json.loads(raw)
+            expires_at = float(envelope["expires_at"])
+            if "value" not in envelope:
+                raise KeyError("value")
+        except (ValueError, TypeError, KeyError) as e:
+            self.stats_counters["remote_decode_errors"] += 1
+            print(f"[CACHE] Unreadable remote entry {full_key}: {e!r}; treating as a miss")
+            return None
+        if time.time() >= expires_at:
+            return None
+        return envelope
+
+    # ===== Public API =====
+
+    async def get_or_set(
+        self,
+        namespace: str,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None
+    ) -> Any:
+        """
+        Return the cached value or load, store and return it
+
+        Args:
+            namespace: Key namespace (e.g. "recommendations")
+            key: Key within the namespace (e.g. a user ID)
+            loader: Coroutine function producing the value on a miss
+            ttl: Time-to-live in seconds (default: default_ttl)
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        full_key = self.make_key(namespace, key)
+
+        envelope = self.local.get(full_key)
+        if envelope is not None:
+            self.stats_counters["local_hits"] += 1
+        else:
+            envelope = await self._read_remote(full_key)
+            if envelope is not None:
+                self.stats_counters["remote_hits"] += 1
+                self.local.set(full_key, envelope, self._local_ttl(envelope["expires_at"] - time.time()))
+
+        if envelope is not None:
+            if not self._should_refresh(envelope):
+                return envelope["value"]
+            # Early refresh: one caller reloads in the background, everyone serves the current value
+            if full_key not in self._inflight:
+                self.stats_counters["early_refreshes"] += 1
+                self._start_load(full_key, loader, ttl)
+            return envelope["value"]
+
+        self.stats_counters["misses"] += 1
+        pending = self._inflight.get(full_key)
+        if pending is None:
+            pending = self._start_load(full_key, loader, ttl)
+        else:
+            self.stats_counters["coalesced"] += 1
+        return await asyncio.shield(pending)
+
+    def _start_load(self, full_key: str, loader, ttl: float) -> asyncio.Future:
+        version = self._versions.get(full_key, 0)
+        pending = asyncio.ensure_future(self._load(full_key, loader, ttl, version))
+        self._inflight[full_key] = pending
+        pending.add_done_callback(lambda _: self._load_done(full_key, pending))
+        return pending
+
+    def _load_done(self, full_key: str, pending: asyncio.Future):
+        if self._inflight.get(full_key) is pending:
+            del self._inflight[full_key]
+        # Background refreshes have no awaiting caller; report their failures here
+        if not pending.cancelled() and pending.exception() is not None:
+            print(f"[CACHE] Load of {full_key} failed: {pending.exception()!r}")
+
+    async def _load(self, full_key: str, loader, ttl: float, version: int) -> Any:
+        started = time.monotonic()
+        value = await loader()
+        # Normalize to the JSON form so local and remote hits look identical
+        body = dumps({"value": value})
+        envelope = json.loads(body)
+        envelope["delta"] = time.monotonic() - started
+        envelope["expires_at"] = time.time() + ttl
+
+        if self._versions.get(full_key, 0) != version:
+            # Invalidated while loading: the value may predate the change
+            return envelope["value"]
+
+        self.local.set(full_key, envelope, self._local_ttl(ttl))
+        if await self._flush_pending_deletes():
+            try:
+                await self.remote.set(full_key, json.dumps(envelope).encode("utf-8"), ttl)
+            except Exception as e:
+                self._remote_failed(e)
+        return envelope["value"]
+
+    async def invalidate(self, namespace: str, key: str):
+        """Drop a key from both tiers and fence off loads already in flight"""
+        full_key = self.make_key(namespace, key)
+        self._versions[full_key] = self._versions.get(full_key, 0) + 1
+        self._inflight.pop(full_key, None)
+        self.local.delete(full_key)
+        if self.remote is None:
+            return
+        # Queued first so a failure (or a down tier) leaves it owed
+        self._pending_deletes[full_key] = None
+        if not await self._flush_pending_deletes():
+            self._schedule_delete_retry()
+
+    def _schedule_delete_retry(self):
+        if self._retry_task is None or self._retry_task.done():
+            self._retry_task = asyncio.ensure_future(self._retry_deletes())
+
+    async def _retry_deletes(self):
+        """Keep replaying owed deletes until the remote tier accepts them"""
+        while self._pending_deletes:
+            await asyncio.sleep(max(self.remote_retry_after, 0.01))
+            await self._flush_pending_deletes()
+
+    def stats(self) -> Dict:
+        """Hit-rate metrics"""
+        counters = dict(self.stats_counters)
+        hits = counters["local_hits"] + counters["remote_hits"]
+        lookups = hits + counters["misses"]
+        counters["hit_rate"] = hits / lookups if lookups else 0.0
+        counters["local_size"] = len(self.local)
+        counters["pending_remote_deletes"] = len(self._pending_deletes)
+        return counters
+
+    async def close(self):
+        """Close the remote tier"""
+        if self._retry_task is not None:
+            self._retry_task.cancel()
+        if self.remote is not None and hasattr(self.remote, "close"):
+            await self.remote.close()
+
+# Export
+__all__ = ["TieredCache", "CacheBackend", "LocalBackend", "LocalLRUBackend", "RedisBackend"]
@@ -0,0 +1,220 @@
+"""
+Encoder Inference Service
+Warm, micro-batched LSTM autoencoder inference with cached per-symbol results
+"""
+
+import asyncio
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+
+from models.lstm_autoencoder import LSTMAutoencoder
+from models.model_registry import ModelRegistry
+from services.historical_store import HistoricalBarStore
+
+class EncoderInferenceService:
+    """
+    Reconstruction errors and embeddings from a trained LSTM autoencoder
+
+    Built once per worker around an already trained model. The encoder and
+    decoder forward pass is traced into a single tf.function (one trace
+    for any batch size), so a call costs one graph execution.
+
+    A request is an as-of date: the sequence_length trading days of returns
+    ending on it, normalized with the training stats. Requests arriving
+    within batch_window seconds of each other (up to max_batch) share one
+    forward pass, run off the event loop, and each waiter gets its row of
+    the batch output directly. Results are also cached per (symbol, as-of
+    date): the window's embedding and that symbol's mean squared
+    reconstruction error, which is the anomaly score. The cache only saves
+    forward passes; an entry evicted before it is read costs nothing.
+    """
+
+    def __init__(
+        self,
+        model: LSTMAutoencoder,
+        returns: pd.DataFrame,
+        max_batch: int = 64,
+        batch_window: float = 0.005,
+        cache_size: int = 100_000,
+        anomaly_threshold: float = 2.0
+    ):
+        """
+        Args:
+            model: Trained autoencoder (with its normalization stats)
+            returns: Daily returns, dates x symbols, in the model's column order
+            max_batch: Most as-of dates per forward pass
+            batch_window: Seconds to wait for more requests before running a batch
+            cache_size: Most (symbol, as-of date) results kept
+            anomaly_threshold: Reconstruction error (in normalized units) above which a symbol is anomalous
+        """
+        self.model = model
+        self.symbols: List[str] = list(returns.columns)
+        self._columns = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.dates = pd.DatetimeIndex(returns.index)
+        normalized = model.normalize(returns.to_numpy(dtype=np.float64))
+        self._returns = np.ascontiguousarray(normalized, dtype=np.float32)
+
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        # Room for at least one full window's results
+        self.cache_size = max(cache_size, len(self.symbols))
+        self.anomaly_threshold = anomaly_threshold
+
+        self._forward = tf.function(
+            self._forward_pass,
+            input_signature=[tf.TensorSpec((None, model.sequence_length, len(self.symbols)), tf.float32)]
+        )
+        # (symbol, as-of date) -> {"embedding", "reconstruction_error"}
+        self._cache: "OrderedDict[Tuple[str, date], Dict]" = OrderedDict()
+        # Requests waiting for the next batch, by window end row
+        self._batch: Dict[int, asyncio.Future] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self.batches_run = 0
+
+    @classmethod
+    def from_registry(
+        cls,
+        registry: ModelRegistry,
+        bar_store: HistoricalBarStore,
+        name: str = "lstmae",
+        **kwargs
+    ) -> Optional["EncoderInferenceService"]:
+        """
+        Serve the latest saved version of a model against stored daily closes
+
+        Returns None when the registry has no version of the model yet.
+        """
+        if registry.latest_version(name) is None:
+            return None
+        model = registry.load(name)
+        dates, closes = bar_store.load_aligned(model.symbols)
+        returns = pd.DataFrame(closes, index=pd.DatetimeIndex(dates), columns=model.symbols)
+        # Days a symbol has no bar count as unchanged
+        returns = returns.ffill().pct_change().iloc[1:].fillna(0.0)
+
+        service = cls(model, returns, **kwargs)
+        service.warm_up()
+        return service
+
+    def _forward_pass(self, windows):
+        embeddings = self.model.encoder(windows, training=False)
+        reconstructed = self.model.decoder(embeddings, training=False)
+        errors = tf.reduce_mean(tf.square(windows - reconstructed), axis=1)
+        return embeddings, errors
+
+    def warm_up(self):
+        """Trace the forward pass before the first request"""
+        self._forward(tf.zeros((1, self.model.sequence_length, len(self.symbols))))
+
+    # ===== Requests =====
+
+    def _window_end(self, as_of: Optional[date]) -> Optional[int]:
+        """Row of the last trading day on or before as_of, if a full window ends there"""
+        if as_of is None:
+            row = len(self.dates) - 1
+        else:
+            row = self.dates.searchsorted(pd.Timestamp(as_of), side="right") - 1
+        return row if row >= self.model.sequence_length - 1 else None
+
+    async def score_symbols(self, symbols: Iterable[str], as_of: Optional[date] = None) -> Dict[str, Dict]:
+        """
+        Reconstruction error and anomaly flag per symbol for a date
+
+        Symbols outside the model's universe, and dates without a full
+        window of history, are left out of the result.
+        """
+        row = self._window_end(as_of)
+        if row is None:
+            return {}
+        day = self.dates[row].date()
+        symbols = [s for s in symbols if s in self._columns]
+
+        entries = [self._cache.get((symbol, day)) for symbol in symbols]
+        if any(entry is None for entry in entries):
+            # Take every symbol from one fresh window result
+            _, window_errors = await self._request(row)
+            errors = [float(window_errors[self._columns[symbol]]) for symbol in symbols]
+        else:
+            for symbol in symbols:
+                self._cache.move_to_end((symbol, day))
+            errors = [entry["reconstruction_error"] for entry in entries]
+
+        scores = {}
+        for symbol, error in zip(symbols, errors):
+            scores[symbol] = {
+                "reconstruction_error": error,
+                "anomaly": error > self.anomaly_threshold
+            }
+        return scores
+
+    async def embedding(self, as_of: Optional[date] = None) -> Optional[np.ndarray]:
+        """Encoder output for the window ending on a date"""
+        row = self._window_end(as_of)
+        if row is None:
+            return None
+        key = (self.symbols[0], self.dates[row].date())
+        entry = self._cache.get(key)
+        if entry is None:
+            embedding, _ = await self._request(row)
+            return embedding
+        self._cache.move_to_end(key)
+        return entry["embedding"]
+
+    async def _request(self, row: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Join (or start) the pending batch; returns the window's embedding and per-symbol errors"""
+        future = self._batch.get(row)
+        if future is None:
+            future = self._batch[row] = asyncio.get_running_loop().create_future()
+            if len(self._batch) >= self.max_batch:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._batch = self._batch, {}
+        if batch:
+            asyncio.ensure_future(self._run_batch(batch))
+
+    async def _run_batch(self, batch: Dict[int, asyncio.Future]):
+        rows = list(batch)
+        length = self.model.sequence_length
+        windows = np.stack([self._returns[row - length + 1:row + 1] for row in rows])
+        try:
+            embeddings, errors = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: [t.numpy() for t in self._forward(tf.constant(windows))]
+            )
+        except Exception as e:
+            print(f"[INFERENCE] Batch of {len(rows)} windows failed: {e}")
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches_run += 1
+        for i, row in enumerate(rows):
+            day = self.dates[row].date()
+            for column, symbol in enumerate(self.symbols):
+                self._store((symbol, day), {
+                    "embedding": embeddings[i],
+                    "reconstruction_error": float(errors[i, column])
+                })
+            if not batch[row].done():
+                batch[row].set_result((embeddings[i], errors[i]))
+
+    def _store(self, key: Tuple[str, date], entry: Dict):
+        self._cache[key] = entry
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+# Export
+__all__ = ["EncoderInferenceService"]
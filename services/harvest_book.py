@@ -0,0 +1,118 @@
+"""
+Harvest Book
+In-memory tax harvest store indexed by portfolio and status with running totals
+"""
+
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from models.entities import TaxHarvest
+
+class HarvestBook:
+    """
+    In-memory store for tax harvests
+
+    Harvests are indexed by portfolio and by (portfolio, status), and each
+    portfolio keeps running totals that are adjusted whenever a harvest is
+    added, replaced or changes status:
+
+    - potential savings: tax_savings of its "identified" harvests
+    - harvested: loss_amount of its "executed" harvests, per calendar year
+      of execution
+
+    Status changes must go through set_status() so the totals stay in step.
+    """
+
+    def __init__(self):
+        self.harvests: Dict[str, TaxHarvest] = {}
+
+        # Secondary indexes (dicts used as insertion-ordered sets)
+        self._by_portfolio: Dict[str, Dict[str, None]] = {}
+        self._by_portfolio_status: Dict[Tuple[str, str], Dict[str, None]] = {}
+
+        # Running totals
+        self._potential_savings: Dict[str, float] = {}
+        self._harvested: Dict[Tuple[str, int], float] = {}
+
+    def __len__(self) -> int:
+        return len(self.harvests)
+
+    # ===== Writes =====
+
+    def add(self, harvest: TaxHarvest) -> TaxHarvest:
+        """Insert or replace a harvest"""
+        existing = self.harvests.get(harvest.id)
+        if existing is not None:
+            self._unindex(existing)
+
+        self.harvests[harvest.id] = harvest
+        self._index(harvest)
+        return harvest
+
+    def set_status(self, harvest_id: str, status: str, when: Optional[datetime] = None) -> Optional[TaxHarvest]:
+        """Move a harvest to a new status, updating indexes and totals"""
+        harvest = self.harvests.get(harvest_id)
+        if harvest is None:
+            return None
+
+        self._unindex(harvest)
+        harvest.status = status
+        harvest.updated_date = when or datetime.now()
+        self._index(harvest)
+        return harvest
+
+    def _index(self, harvest: TaxHarvest):
+        self._by_portfolio.setdefault(harvest.portfolio_id, {})[harvest.id] = None
+        self._by_portfolio_status.setdefault((harvest.portfolio_id, harvest.status), {})[harvest.id] = None
+        self._apply_totals(harvest, 1.0)
+
+    def _unindex(self, harvest: TaxHarvest):
+        for index, key in (
+            (self._by_portfolio, harvest.portfolio_id),
+            (self._by_portfolio_status, (harvest.portfolio_id, harvest.status))
+        ):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(harvest.id, None)
+                if not bucket:
+                    del index[key]
+        self._apply_totals(harvest, -1.0)
+
+    def _apply_totals(self, harvest: TaxHarvest, sign: float):
+        if harvest.status == "identified":
+            portfolio_id = harvest.portfolio_id
+            self._potential_savings[portfolio_id] = (
+                self._potential_savings.get(portfolio_id, 0.0) + sign * harvest.tax_savings
+            )
+        elif harvest.status == "executed":
+            key = (harvest.portfolio_id, harvest.updated_date.year)
+            self._harvested[key] = self._harvested.get(key, 0.0) + sign * harvest.loss_amount
+
+    # ===== Reads =====
+
+    def get(self, harvest_id: str) -> Optional[TaxHarvest]:
+        return self.harvests.get(harvest_id)
+
+    def portfolio_ids(self) -> List[str]:
+        """Portfolios with at least one harvest"""
+        return list(self._by_portfolio)
+
+    def get_portfolio_harvests(self, portfolio_id: str, status: Optional[str] = None) -> List[TaxHarvest]:
+        """Harvests of one portfolio, optionally with a given status"""
+        if status is None:
+            ids = self._by_portfolio.get(portfolio_id, {})
+        else:
+            ids = self._by_portfolio_status.get((portfolio_id, status), {})
+        return [self.harvests[hid] for hid in ids]
+
+    def potential_savings(self, portfolio_ids: Iterable[str]) -> float:
+        """Tax savings still available from identified harvests"""
+        return sum(self._potential_savings.get(pid, 0.0) for pid in portfolio_ids)
+
+    def harvested(self, portfolio_ids: Iterable[str], year: Optional[int] = None) -> float:
+        """Losses realized by executed harvests in a calendar year (default: this year)"""
+        year = year or date.today().year
+        return sum(self._harvested.get((pid, year), 0.0) for pid in portfolio_ids)
+
+# Export
+__all__ = ["HarvestBook"]
@@ -0,0 +1,147 @@
+"""
+Tax-Loss Harvest Scanner
+Vectorized scan of tax lots across all portfolios for harvestable losses
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from models.entities import Holding, TaxHarvest
+
+WASH_SALE_DAYS = 30
+
+class TaxLots:
+    """
+    Tax lots stored as parallel arrays
+
+    Portfolio and symbol are integer codes into the portfolio_ids /
+    symbols label arrays; purchase dates are datetime64[D].
+    """
+
+    def __init__(
+        self,
+        portfolio_ids: Iterable[str],
+        symbols: Iterable[str],
+        shares: Iterable[float],
+        purchase_price: Iterable[float],
+        purchase_date: Iterable
+    ):
+        # Hash-based encoding; codes follow first appearance
+        self.portfolio_code, self.portfolio_ids = pd.factorize(np.asarray(portfolio_ids, dtype=object))
+        self.symbol_code, self.symbols = pd.factorize(np.asarray(symbols, dtype=object))
+        self.portfolio_ids = np.asarray(self.portfolio_ids, dtype=object)
+        self.symbols = np.asarray(self.symbols, dtype=object)
+        self.shares = np.asarray(shares, dtype=np.float64)
+        self.purchase_price = np.asarray(purchase_price, dtype=np.float64)
+        self.purchase_date = np.asarray(purchase_date, dtype="datetime64[D]")
+
+    def __len__(self) -> int:
+        return len(self.shares)
+
+    @classmethod
+    def from_holdings(cls, holdings: Iterable[Holding]) -> "TaxLots":
+        """One lot per holding at its average cost, opened on its creation date"""
+        holdings = list(holdings)
+        return cls(
+            [h.portfolio_id for h in holdings],
+            [h.symbol for h in holdings],
+            [h.shares for h in holdings],
+            [h.average_cost for h in holdings],
+            [h.created_date.date() for h in holdings]
+        )
+
+class HarvestScanner:
+    """
+    Finds lots whose unrealized loss exceeds a threshold
+
+    Everything is computed on whole columns: price lookup by symbol code,
+    unrealized loss, tax savings, and the wash-sale check (another lot of
+    the same symbol in the same portfolio bought within the last 30 days
+    makes a sale today a wash sale, so those lots are skipped).
+    """
+
+    def __init__(self, tax_rate: float = 0.25, min_loss: float = 500.0):
+        self.tax_rate = tax_rate
+        self.min_loss = min_loss
+
+    def scan_mask(self, lots: TaxLots, prices: Dict[str, float], as_of: date) -> Dict[str, np.ndarray]:
+        """
+        Column-level scan
+
+        Returns:
+            Dict with the per-lot "price", "loss", "tax_savings",
+            "wash_sale_blocked" arrays and the "selected" lot indices
+        """
+        price_by_code = np.array([prices.get(s, np.nan) for s in lots.symbols], dtype=np.float64)
+        price = price_by_code[lots.symbol_code] if len(lots) else np.zeros(0)
+
+        loss = (lots.purchase_price - price) * lots.shares
+        tax_savings = loss * self.tax_rate
+
+        # Lots per (portfolio, symbol) opened inside the look-back window
+        today = np.datetime64(as_of, "D")
+        recent = (today - lots.purchase_date) <= np.timedelta64(WASH_SALE_DAYS, "D")
+        group = lots.portfolio_code.astype(np.int64) * len(lots.symbols) + lots.symbol_code
+        recent_groups, recent_counts = np.unique(group[recent], return_counts=True)
+        if len(recent_groups):
+            pos = np.minimum(np.searchsorted(recent_groups, group), len(recent_groups) - 1)
+            recent_in_group = np.where(recent_groups[pos] == group, recent_counts[pos], 0)
+        else:
+            recent_in_group = np.zeros(len(lots), dtype=np.int64)
+        wash_sale_blocked = (recent_in_group - recent) > 0
+
+        with np.errstate(invalid="ignore"):
+            eligible = (loss >= self.min_loss) & ~wash_sale_blocked
+        return {
+            "price": price,
+            "loss": loss,
+            "tax_savings": tax_savings,
+            "wash_sale_blocked": wash_sale_blocked,
+            "selected": np.flatnonzero(eligible)
+        }
+
+    def scan(self, lots: TaxLots, prices: Dict[str, float], as_of: Optional[date] = None) -> List[TaxHarvest]:
+        """
+        Harvest opportunities for every lot above the loss threshold
+
+        Args:
+            lots: Tax lots across any number of portfolios
+            prices: Current price per symbol (lots without a price are skipped)
+            as_of: Sale date the scan assumes (default: today)
+        """
+        as_of = as_of or date.today()
+        result = self.scan_mask(lots, prices, as_of)
+        selected = result["selected"]
+        wash_sale_date = as_of + timedelta(days=WASH_SALE_DAYS)
+
+        columns = zip(
+            lots.portfolio_ids[lots.portfolio_code[selected]].tolist(),
+            lots.symbols[lots.symbol_code[selected]].tolist(),
+            lots.shares[selected].tolist(),
+            lots.purchase_price[selected].tolist(),
+            result["price"][selected].tolist(),
+            result["loss"][selected].tolist(),
+            result["tax_savings"][selected].tolist(),
+            lots.purchase_date[selected].tolist()
+        )
+        return [
+            TaxHarvest(
+                portfolio_id=portfolio_id,
+                symbol=symbol,
+                shares=shares,
+                purchase_price=purchase_price,
+                current_price=current_price,
+                loss_amount=loss,
+                tax_savings=savings,
+                purchase_date=purchase_date,
+                status="identified",
+                identified_date=as_of,
+                wash_sale_date=wash_sale_date
+            )
+            for portfolio_id, symbol, shares, purchase_price, current_price, loss, savings, purchase_date in columns
+        ]
+
+# Export
+__all__ = ["HarvestScanner", "TaxLots", "WASH_SALE_DAYS"]
@@ -0,0 +1,238 @@
+"""
+Historical Bar Store
+Local columnar on-disk cache of daily bars fed from IBKRClient
+"""
+
+import asyncio
+import os
+import numpy as np
+import pandas as pd
+from typing import List, Dict, Optional, Tuple
+from datetime import date
+
+from services.ibkr_client import IBKRClient
+
+class HistoricalBarStore:
+    """
+    Per-symbol columnar store of daily bars
+
+    Each symbol is a directory of raw little-endian column files
+    (date as datetime64[D], open/high/low/close/volume as float64).
+    Columns are appended in place when new days arrive and read back as
+    read-only memory maps, so loading a large universe is a file read
+    rather than a gateway refetch.
+    """
+
+    COLUMNS = {
+        "date": np.dtype("<M8[D]"),
+        "open": np.dtype("<f8"),
+        "high": np.dtype("<f8"),
+        "low": np.dtype("<f8"),
+        "close": np.dtype("<f8"),
+        "volume": np.dtype("<f8"),
+    }
+
+    def __init__(
+        self,
+        root_dir: str,
+        ibkr_client: Optional[IBKRClient] = None,
+        initial_duration: str = "1Y",
+        max_concurrent_fetches: int = 8
+    ):
+        """
+        Initialize store
+
+        Args:
+            root_dir: Directory holding one sub-directory per symbol
+            ibkr_client: Gateway client used to fetch missing bars
+            initial_duration: History requested for symbols not yet stored
+            max_concurrent_fetches: Maximum concurrent gateway history requests
+        """
+        self.root_dir = root_dir
+        self.ibkr = ibkr_client
+        self.initial_duration = initial_duration
+        self.max_concurrent_fetches = max_concurrent_fetches
+        os.makedirs(root_dir, exist_ok=True)
+
+    # ===== Paths =====
+
+    def _symbol_dir(self, symbol: str) -> str:
+        return os.path.join(self.root_dir, symbol.replace("/", "_"))
+
+    def _column_path(self, symbol: str, column: str) -> str:
+        return os.path.join(self._symbol_dir(symbol), f"{column}.bin")
+
+    def symbols(self) -> List[str]:
+        """Symbols with stored history"""
+        return sorted(
+            name for name in os.listdir(self.root_dir)
+            if os.path.isfile(os.path.join(self.root_dir, name, "date.bin"))
+        )
+
+    # ===== Reads =====
+
+    def _num_rows(self, symbol: str) -> int:
+        """Rows fully written across all columns (guards against torn appends)"""
+        sizes = []
+        for column, dtype in self.COLUMNS.items():
+            path = self._column_path(symbol, column)
+            if not os.path.exists(path):
+                return 0
+            sizes.append(os.path.getsize(path) // dtype.itemsize)
+        return min(sizes)
+
+    def _column(self, symbol: str, column: str, rows: int) -> np.ndarray:
+        """Memory-map the first `rows` entries of a column"""
+        dtype = self.COLUMNS[column]
+        if rows == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self._column_path(symbol, column), dtype=dtype, mode="r", shape=(rows,))
+
+    def last_date(self, symbol: str) -> Optional[date]:
+        """Most recent stored bar date"""
+        rows = self._num_rows(symbol)
+        if rows == 0:
+            return None
+        return self._column(symbol, "date", rows)[-1].astype(date)
+
+    def read_bars(
+        self,
+        symbol: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Read one symbol's bars in [start, end]
+
+        Returns:
+            Dict of column name to read-only memory-mapped array slices
+        """
+        rows = self._num_rows(symbol)
+        dates = self._column(symbol, "date", rows)
+        lo, hi = self._date_bounds(dates, start, end)
+        return {
+            column: self._column(symbol, column, rows)[lo:hi]
+            for column in self.COLUMNS
+        }
+
+    def read_frame(
+        self,
+        symbol: str,
+        start: Optional[date] = None,
+        end: Optional[date] = None
+    ) -> pd.DataFrame:
+        """Read one symbol's bars as a DataFrame shaped like get_historical_data"""
+        bars = self.read_bars(symbol, start, end)
+        frame = pd.DataFrame({column: np.asarray(values) for column, values in bars.items()})
+        frame["date"] = pd.to_datetime(frame["date"])
+        return frame
+
+    def load_aligned(
+        self,
+        symbols: List[str],
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        field: str = "close"
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Load one field for many symbols aligned on the union of their dates
+
+        Returns:
+            Tuple of (dates, values) where values has shape
+            (len(dates), len(symbols)) and NaN marks missing bars
+        """
+        per_symbol = []
+        for symbol in symbols:
+            rows = self._num_rows(symbol)
+            dates = self._column(symbol, "date", rows)
+            lo, hi = self._date_bounds(dates, start, end)
+            per_symbol.append((dates[lo:hi], self._column(symbol, field, rows)[lo:hi]))
+
+        if per_symbol:
+            all_dates = np.unique(np.concatenate([d for d, _ in per_symbol]))
+        else:
+            all_dates = np.empty(0, dtype=self.COLUMNS["date"])
+        values = np.full((len(all_dates), len(symbols)), np.nan)
+
+        for j, (dates, column) in enumerate(per_symbol):
+            if len(dates):
+                values[np.searchsorted(all_dates, dates), j] = column
+
+        return all_dates, values
+
+    @staticmethod
+    def _date_bounds(dates: np.ndarray, start: Optional[date], end: Optional[date]) -> Tuple[int, int]:
+        """Slice bounds of [start, end] within a sorted date column"""
+        lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start, "D"), side="left"))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, np.datetime64(end, "D"), side="right"))
+        return lo, hi
+
+    # ===== Writes =====
+
+    def append(self, symbol: str, bars: pd.DataFrame) -> int:
+        """
+        Append bars newer than the last stored date
+
+        Args:
+            symbol: Ticker symbol
+            bars: DataFrame with date/open/high/low/close/volume columns
+
+        Returns:
+            Number of rows appended
+        """
+        rows = self._num_rows(symbol)
+        os.makedirs(self._symbol_dir(symbol), exist_ok=True)
+
+        dates = pd.to_datetime(bars["date"]).to_numpy().astype("datetime64[D]")
+        order = np.argsort(dates, kind="stable")
+        dates = dates[order]
+
+        # Keep only strictly newer, de-duplicated days
+        if rows:
+            last = self._column(symbol, "date", rows)[-1]
+            order = order[dates > last]
+            dates = dates[dates > last]
+        if len(dates) == 0:
+            return 0
+        keep = np.concatenate(([True], dates[1:] != dates[:-1]))
+        order, dates = order[keep], dates[keep]
+
+        for column, dtype in self.COLUMNS.items():
+            values = dates if column == "date" else bars[column].to_numpy()[order]
+            path = self._column_path(symbol, column)
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                # Drop any torn tail beyond the consistent row count
+                f.truncate(rows * dtype.itemsize)
+                f.seek(0, os.SEEK_END)
+                f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+
+        return len(dates)
+
+    async def sync(self, symbols: List[str], end: Optional[date] = None) -> Dict[str, int]:
+        """
+        Fetch and append only the missing days for each symbol
+
+        Returns:
+            Dict of symbol to number of rows appended
+        """
+        if self.ibkr is None:
+            raise ValueError("An IBKRClient is required to sync history")
+
+        end = end or date.today()
+        semaphore = asyncio.Semaphore(self.max_concurrent_fetches)
+
+        async def sync_symbol(symbol: str) -> int:
+            last = self.last_date(symbol)
+            if last is not None and last >= end:
+                return 0
+            duration = self.initial_duration if last is None else f"{(end - last).days}D"
+            async with semaphore:
+                bars = await self.ibkr.get_historical_data(symbol, duration=duration)
+            bars = bars[pd.to_datetime(bars["date"]).dt.date <= end]
+            return self.append(symbol, bars)
+
+        appended = await asyncio.gather(*(sync_symbol(symbol) for symbol in symbols))
+        return dict(zip(symbols, appended))
+
+# Export
+__all__ = ["HistoricalBarStore"]
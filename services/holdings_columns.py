@@ -0,0 +1,269 @@
+"""
+Columnar Holdings Store
+Struct-of-arrays view of holdings for vectorized aggregate queries
+"""
+
+import numpy as np
+from typing import List, Dict, Iterable, Optional, Tuple
+
+from models.entities import Holding
+
+class _Categories:
+    """Categorical encoder assigning codes in first-seen order"""
+
+    def __init__(self):
+        self.labels: List[str] = []
+        self._codes: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def encode(self, label: str) -> int:
+        code = self._codes.get(label)
+        if code is None:
+            code = len(self.labels)
+            self._codes[label] = code
+            self.labels.append(label)
+        return code
+
+    def get(self, label: str) -> Optional[int]:
+        return self._codes.get(label)
+
+class ColumnarHoldings:
+    """
+    Holdings stored as parallel NumPy arrays
+
+    Shares, average cost, price and value are float64 columns; portfolio,
+    symbol, sector and asset class are integer category codes. Aggregates
+    (allocation, P&L totals, per-sector sums) are np.bincount group-bys,
+    and the same group-bys run across every portfolio at once for batch
+    scans such as rebalancing.
+
+    Empty sectors are reported as "Other".
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._size = 0
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+
+        self.portfolios = _Categories()
+        self.symbols = _Categories()
+        self.sectors = _Categories()
+        self.asset_classes = _Categories()
+
+        self.portfolio_code = np.zeros(capacity, dtype=np.int32)
+        self.symbol_code = np.zeros(capacity, dtype=np.int32)
+        self.sector_code = np.zeros(capacity, dtype=np.int32)
+        self.asset_class_code = np.zeros(capacity, dtype=np.int32)
+        self.shares = np.zeros(capacity)
+        self.average_cost = np.zeros(capacity)
+        self.price = np.zeros(capacity)
+        self.value = np.zeros(capacity)
+
+    _COLUMNS = (
+        "portfolio_code", "symbol_code", "sector_code", "asset_class_code",
+        "shares", "average_cost", "price", "value"
+    )
+
+    def __len__(self) -> int:
+        return self._size
+
+    # ===== Construction =====
+
+    @classmethod
+    def from_holdings(cls, holdings: Iterable[Holding]) -> "ColumnarHoldings":
+        """Build from Holding entities"""
+        holdings = list(holdings)
+        store = cls(capacity=max(len(holdings), 16))
+        for holding in holdings:
+            store.upsert(holding)
+        return store
+
+    def _grow(self):
+        capacity = max(16, len(self.shares) * 2)
+        for name in self._COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            setattr(self, name, grown)
+
+    def _write(self, holding_id, portfolio_id, symbol, sector, asset_class,
+               shares, average_cost, price, value):
+        row = self._rows.get(holding_id)
+        if row is None:
+            if self._size == len(self.shares):
+                self._grow()
+            row = self._size
+            self._size += 1
+            self._rows[holding_id] = row
+            self.ids.append(holding_id)
+
+        self.portfolio_code[row] = self.portfolios.encode(portfolio_id)
+        self.symbol_code[row] = self.symbols.encode(symbol)
+        self.sector_code[row] = self.sectors.encode(sector or "Other")
+        self.asset_class_code[row] = self.asset_classes.encode(asset_class or "stocks")
+        self.shares[row] = shares
+        self.average_cost[row] = average_cost
+        self.price[row] = price
+        self.value[row] = value
+
+    def upsert(self, holding: Holding):
+        """Insert or overwrite one holding's row"""
+        self._write(
+            holding.id, holding.portfolio_id, holding.symbol, holding.sector,
+            holding.asset_class, holding.shares, holding.average_cost,
+            holding.current_price, holding.total_value
+        )
+
+    def remove(self, holding_id: str) -> bool:
+        """Drop one holding's row (the last row moves into its slot)"""
+        row = self._rows.pop(holding_id, None)
+        if row is None:
+            return False
+        last = self._size - 1
+        if row != last:
+            for name in self._COLUMNS:
+                column = getattr(self, name)
+                column[row] = column[last]
+            moved = self.ids[last]
+            self.ids[row] = moved
+            self._rows[moved] = row
+        self.ids.pop()
+        self._size -= 1
+        return True
+
+    # ===== Updates =====
+
+    def mark(self, holding_id: str, price: float, value: float):
+        """Set one holding's price and market value"""
+        row = self._rows.get(holding_id)
+        if row is not None:
+            self.price[row] = price
+            self.value[row] = value
+
+    # ===== Aggregates =====
+
+    def _rows_for(self, portfolio_id: Optional[str]) -> Optional[np.ndarray]:
+        """Boolean row mask for one portfolio (None means all rows)"""
+        if portfolio_id is None:
+            return None
+        code = self.portfolios.get(portfolio_id)
+        if code is None:
+            return np.zeros(self._size, dtype=bool)
+        return self.portfolio_code[:self._size] == code
+
+    def _group_sum(self, codes: np.ndarray, weights: np.ndarray, n_groups: int,
+                   mask: Optional[np.ndarray]) -> np.ndarray:
+        codes = codes[:self._size]
+        weights = weights[:self._size]
+        if mask is not None:
+            codes, weights = codes[mask], weights[mask]
+        return np.bincount(codes, weights=weights, minlength=n_groups)
+
+    def allocation(self, by: str = "sector", portfolio_id: Optional[str] = None) -> Dict[str, float]:
+        """
+        Market value per sector or asset class
+
+        Args:
+            by: "sector" or "asset_class"
+            portfolio_id: Restrict to one portfolio (default: all holdings)
+        """
+        categories, codes = self._categories(by)
+        mask = self._rows_for(portfolio_id)
+        sums = self._group_sum(codes, self.value, len(categories), mask)
+        present = np.bincount(
+            codes[:self._size] if mask is None else codes[:self._size][mask],
+            minlength=len(categories)
+        ) > 0
+        return {
+            categories.labels[i]: float(sums[i])
+            for i in np.flatnonzero(present)
+        }
+
+    def sector_allocation(self, portfolio_id: Optional[str] = None) -> Dict[str, float]:
+        """Market value per sector"""
+        return self.allocation("sector", portfolio_id)
+
+    def totals(self, portfolio_id: Optional[str] = None) -> Dict[str, float]:
+        """Market value, cost basis and unrealized P&L"""
+        mask = self._rows_for(portfolio_id)
+        value = self.value[:self._size]
+        cost = self.shares[:self._size] * self.average_cost[:self._size]
+        if mask is not None:
+            value, cost = value[mask], cost[mask]
+        total_value = float(value.sum())
+        total_cost = float(cost.sum())
+        gain_loss = total_value - total_cost
+        return {
+            "total_value": total_value,
+            "total_cost": total_cost,
+            "total_gain_loss": gain_loss,
+            "total_gain_loss_percent": (gain_loss / total_cost) * 100 if total_cost else 0.0
+        }
+
+    def allocation_matrix(self, by: str = "sector") -> Tuple[List[str], List[str], np.ndarray]:
+        """
+        Market value per (portfolio, category) for every portfolio at once
+
+        Returns:
+            Tuple of (portfolio_ids, category_labels, matrix) where matrix
+            has shape (n_portfolios, n_categories)
+        """
+        categories, codes = self._categories(by)
+        n_portfolios, n_categories = len(self.portfolios), len(categories)
+        flat = self.portfolio_code[:self._size].astype(np.int64) * n_categories + codes[:self._size]
+        sums = np.bincount(flat, weights=self.value[:self._size], minlength=n_portfolios * n_categories)
+        return (
+            list(self.portfolios.labels),
+            list(categories.labels),
+            sums.reshape(n_portfolios, n_categories)
+        )
+
+    def rebalance_candidates(
+        self,
+        target_weights: Dict[str, float],
+        threshold: float = 0.05,
+        by: str = "sector"
+    ) -> Dict[str, float]:
+        """
+        Scan every portfolio for allocation drift in one batch
+
+        Args:
+            target_weights: Target weight per category (missing categories target 0)
+            threshold: Maximum tolerated absolute weight drift
+            by: "sector" or "asset_class"
+
+        Returns:
+            Dict of portfolio_id to its largest absolute drift, for portfolios above threshold
+        """
+        portfolio_ids, labels, matrix = self.allocation_matrix(by)
+        if not portfolio_ids:
+            return {}
+
+        totals = matrix.sum(axis=1, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weights = np.where(totals > 0, matrix / totals, 0.0)
+
+        target = np.array([target_weights.get(label, 0.0) for label in labels])
+        # Targets for categories nobody holds still count as drift
+        held = set(labels)
+        missing = max((w for label, w in target_weights.items() if label not in held), default=0.0)
+        drift = np.abs(weights - target).max(axis=1, initial=0.0)
+        drift = np.maximum(drift, missing)
+        drift[totals[:, 0] <= 0] = 0.0
+
+        return {
+            portfolio_ids[i]: float(drift[i])
+            for i in np.flatnonzero(drift > threshold)
+        }
+
+    def _categories(self, by: str) -> Tuple[_Categories, np.ndarray]:
+        if by == "sector":
+            return self.sectors, self.sector_code
+        if by == "asset_class":
+            return self.asset_classes, self.asset_class_code
+        raise ValueError(f"Unknown grouping: {by}")
+
+# Export
+__all__ = ["ColumnarHoldings"]
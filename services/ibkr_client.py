@@ -1,13 +1,42 @@
+"""
+IBKR Client
+Interactive Brokers gateway integration for market data and order execution
+"""
+
+import asyncio
+import numpy as np
+import pandas as pd
+from typing import List, Dict, AsyncIterator
+from datetime import datetime
+
+from models.entities import Trade
+from services.quote_cache import QuoteCache
+
 
 class IBKRClient:
     """Interactive Brokers integration for real-time market data and order execution"""
     
-    def __init__(self):
-        self.host = "127.0.0.1"
-        self.port = 4001  # Paper trading
-        self.client_id = 1
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 4001,
+        client_id: int = 1,
+        max_in_flight: int = 50,
+        quote_cache_size: int = 10000
+    ):
+        self.host = host
+        self.port = port  # 4001 = paper trading
+        self.client_id = client_id
         self.connected = False
         
+        # Concurrency control for market data requests
+        self.max_in_flight = max_in_flight
+        self._quote_semaphore = asyncio.Semaphore(max_in_flight)
+        self._pending_quotes: Dict[str, asyncio.Future] = {}
+        
+        # Shared quote cache; callers choose how stale a quote they accept
+        self.quote_cache = QuoteCache(max_size=quote_cache_size)
+        
     async def connect(self):
         """Connect to IBKR Gateway"""
         # In production: use ib_insync library
@@ -18,8 +47,41 @@ class IBKRClient:
         print(f"[IBKR] Connected to Gateway at {self.host}:{self.port}")
         return True
     
-    async def get_market_data(self, symbol: str) -> Dict:
-        """Get real-time market data for a symbol"""
+    async def get_market_data(self, symbol: str, max_age: float = 0.0) -> Dict:
+        """
+        Get real-time market data for a symbol
+        
+        Args:
+            symbol: Ticker symbol
+            max_age: Staleness budget in seconds. A cached quote at most this
+                old is returned without a gateway call; 0 demands a fresh quote.
+        
+        Concurrent callers asking for the same symbol share one outstanding
+        gateway request (single-flight).
+        """
+        cached = self.quote_cache.get(symbol, max_age)
+        if cached is not None:
+            return cached
+        
+        pending = self._pending_quotes.get(symbol)
+        if pending is None:
+            pending = asyncio.ensure_future(self._request_market_data(symbol))
+            self._pending_quotes[symbol] = pending
+            pending.add_done_callback(lambda _: self._pending_quotes.pop(symbol, None))
+        
+        # Shield so one caller's cancellation doesn't cancel the shared request
+        quote = await asyncio.shield(pending)
+        return dict(quote)
+    
+    async def _request_market_data(self, symbol: str) -> Dict:
+        """Issue one gateway request, bounded by the in-flight limit"""
+        async with self._quote_semaphore:
+            quote = await self._fetch_market_data(symbol)
+        self.quote_cache.put(symbol, quote)
+        return quote
+    
+    async def _fetch_market_data(self, symbol: str) -> Dict:
+        """Fetch a quote from the gateway"""
         # Mock data - replace with actual IBKR API call
         return {
             "symbol": symbol,
@@ -30,12 +92,22 @@ class IBKRClient:
             "timestamp": datetime.now().isoformat()
         }
     
-    async def get_market_data_bulk(self, symbols: List[str]) -> Dict[str, Dict]:
-        """Get market data for multiple symbols"""
-        data = {}
-        for symbol in symbols:
-            data[symbol] = await self.get_market_data(symbol)
-        return data
+    async def get_market_data_bulk(self, symbols: List[str], max_age: float = 0.0) -> Dict[str, Dict]:
+        """Get market data for multiple symbols concurrently"""
+        unique_symbols = list(dict.fromkeys(symbols))
+        quotes = await asyncio.gather(
+            *(self.get_market_data(symbol, max_age=max_age) for symbol in unique_symbols)
+        )
+        return dict(zip(unique_symbols, quotes))
+    
+    async def stream_market_data(self, symbol: str, interval: float = 1.0) -> AsyncIterator[Dict]:
+        """Stream real-time quotes for a symbol from one upstream subscription"""
+        # In production: ticker = self.ib.reqMktData(contract) and await ticker updates
+        while True:
+            quote = await self._fetch_market_data(symbol)
+            self.quote_cache.put(symbol, quote)
+            yield quote
+            await asyncio.sleep(interval)
     
     async def place_order(self, trade: Trade) -> str:
         """Place order through IBKR"""
@@ -50,10 +122,17 @@ class IBKRClient:
         return []
     
     async def get_historical_data(self, symbol: str, duration: str = "1Y") -> pd.DataFrame:
-        """Get historical price data"""
+        """
+        Get historical daily bars
+        
+        Args:
+            symbol: Ticker symbol
+            duration: Lookback such as "30D" or "1Y" (IBKR duration string)
+        """
         # Generate mock data
-        dates = pd.date_range(end=datetime.now(), periods=252, freq='D')
-        prices = 100 + np.cumsum(np.random.randn(252) * 2)
+        periods = self._duration_to_bars(duration)
+        dates = pd.date_range(end=pd.Timestamp(datetime.now().date()), periods=periods, freq='B')
+        prices = 100 + np.cumsum(np.random.randn(periods) * 2)
         
         return pd.DataFrame({
             'date': dates,
@@ -61,3 +140,17 @@ class IBKRClient:
             'high': prices * 1.02,
             'low': prices * 0.98,
             'close': prices,
+            'volume': np.random.randint(100000, 10000000, size=periods)
+        })
+    
+    @staticmethod
+    def _duration_to_bars(duration: str) -> int:
+        """Convert an IBKR duration string ("10D", "2W", "6M", "1Y") to daily bars"""
+        days_per_unit = {"D": 1, "W": 5, "M": 21, "Y": 252}
+        value, unit = duration[:-1].strip(), duration[-1].upper()
+        if unit not in days_per_unit or not value.isdigit():
+            raise ValueError(f"Invalid duration: {duration}")
+        return max(1, int(value) * days_per_unit[unit])
+
+# Export
+__all__ = ["IBKRClient"]
@@ -0,0 +1,129 @@
+"""
+Market Data Hub
+Fans out one upstream streaming subscription per symbol to in-process consumers
+"""
+
+import asyncio
+from typing import Dict, AsyncIterator, Optional, Set
+
+from services.ibkr_client import IBKRClient
+
+class MarketDataHub:
+    """
+    Reference-counted market data subscription hub
+
+    The first consumer of a symbol starts a single upstream stream; every
+    tick is pushed to each consumer's bounded asyncio queue. When the last
+    consumer leaves, the upstream subscription is cancelled.
+
+    Streams opened on behalf of a client (e.g. an SSE connection) are
+    counted per client and capped at max_streams_per_client.
+    """
+
+    def __init__(
+        self,
+        ibkr_client: IBKRClient,
+        queue_size: int = 100,
+        tick_interval: float = 1.0,
+        reconnect_delay: float = 5.0,
+        max_streams_per_client: int = 10
+    ):
+        self.ibkr = ibkr_client
+        self.queue_size = queue_size
+        self.tick_interval = tick_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_streams_per_client = max_streams_per_client
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._feeds: Dict[str, asyncio.Task] = {}
+        # client_id -> open streams
+        self._client_streams: Dict[str, int] = {}
+
+    def subscribe(self, symbol: str) -> asyncio.Queue:
+        """Register a consumer for a symbol and return its tick queue"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(symbol, set()).add(queue)
+
+        if symbol not in self._feeds:
+            self._feeds[symbol] = asyncio.ensure_future(self._run_feed(symbol))
+            print(f"[HUB] Subscribed upstream to {symbol}")
+        return queue
+
+    def unsubscribe(self, symbol: str, queue: asyncio.Queue):
+        """Remove a consumer; cancel the upstream feed when nobody is watching"""
+        subscribers = self._subscribers.get(symbol)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if subscribers:
+            return
+
+        del self._subscribers[symbol]
+        feed = self._feeds.pop(symbol, None)
+        if feed is not None:
+            feed.cancel()
+            print(f"[HUB] Unsubscribed upstream from {symbol}")
+
+    def stream_allowed(self, client_id: str) -> bool:
+        """Whether a client is below its open-stream cap"""
+        return self._client_streams.get(client_id, 0) < self.max_streams_per_client
+
+    async def stream(self, symbol: str, client_id: Optional[str] = None) -> AsyncIterator[Dict]:
+        """Yield ticks for a symbol until the consumer stops iterating (nothing if client_id is at its cap)"""
+        if client_id is not None:
+            if not self.stream_allowed(client_id):
+                return
+            self._client_streams[client_id] = self._client_streams.get(client_id, 0) + 1
+        queue = self.subscribe(symbol)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.unsubscribe(symbol, queue)
+            if client_id is not None:
+                remaining = self._client_streams[client_id] - 1
+                if remaining:
+                    self._client_streams[client_id] = remaining
+                else:
+                    del self._client_streams[client_id]
+
+    def subscriber_count(self, symbol: str) -> int:
+        """Number of consumers watching a symbol"""
+        return len(self._subscribers.get(symbol, ()))
+
+    @property
+    def active_symbols(self) -> Set[str]:
+        """Symbols with a live upstream subscription"""
+        return set(self._feeds)
+
+    async def close(self):
+        """Cancel all upstream subscriptions"""
+        feeds = list(self._feeds.values())
+        self._feeds.clear()
+        self._subscribers.clear()
+        for feed in feeds:
+            feed.cancel()
+        await asyncio.gather(*feeds, return_exceptions=True)
+
+    async def _run_feed(self, symbol: str):
+        """Pump ticks from the upstream stream to all consumers"""
+        while True:
+            try:
+                async for tick in self.ibkr.stream_market_data(symbol, interval=self.tick_interval):
+                    self._publish(symbol, tick)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[HUB] Feed for {symbol} failed: {e}; reconnecting")
+            else:
+                print(f"[HUB] Feed for {symbol} ended; reconnecting")
+            await asyncio.sleep(self.reconnect_delay)
+
+    def _publish(self, symbol: str, tick: Dict):
+        """Deliver a tick to every consumer, dropping the oldest for slow ones"""
+        for queue in self._subscribers.get(symbol, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(dict(tick))
+
+# Export
+__all__ = ["MarketDataHub"]
@@ -0,0 +1,247 @@
+"""
+Order Pipeline
+Queue-backed order submission with a worker pool and trade status tracking
+"""
+
+import asyncio
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+from models.entities import Trade
+from services.ibkr_client import IBKRClient
+from services.portfolio_repository import PortfolioRepository
+from database.repository import SQLRepository
+
+class OrderQueue(ABC):
+    """
+    Work queue of trade IDs awaiting submission
+
+    Consumed by the pipeline's own workers: trades are looked up in the
+    process's repository and completions are reported in-process, so an
+    implementation must deliver to the process that enqueued. Durability
+    across restarts comes from the store and OrderPipeline.recover(), not
+    from the queue.
+    """
+
+    @abstractmethod
+    async def put(self, trade_id: str):
+        ...
+
+    @abstractmethod
+    async def get(self) -> str:
+        ...
+
+    @abstractmethod
+    def task_done(self, trade_id: str):
+        ...
+
+class InProcessOrderQueue(OrderQueue):
+    """asyncio.Queue-backed order queue (single process, tests and development)"""
+
+    def __init__(self, max_size: int = 0):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    async def put(self, trade_id: str):
+        await self._queue.put(trade_id)
+
+    async def get(self) -> str:
+        return await self._queue.get()
+
+    def task_done(self, trade_id: str):
+        self._queue.task_done()
+
+class OrderPipeline:
+    """
+    Asynchronous order submission
+
+    submit() records the trade as "pending" and enqueues its ID; a pool
+    of workers places the orders with the gateway and moves each trade to
+    "executed" or "failed". The pool size bounds orders in flight.
+
+    Trades are written to the repository (and, through listeners, to the
+    persistent store) before they are enqueued, so pending trades left by
+    a restart can be re-enqueued with recover(). With a store attached,
+    a worker claims a trade in the store before placing it, so processes
+    recovering the same pending trades place each order once.
+
+    Outcomes keep order errors (the gateway rejected or failed the order)
+    apart from listener errors (the outcome could not be recorded).
+    """
+
+    def __init__(
+        self,
+        ibkr_client: IBKRClient,
+        repository: PortfolioRepository,
+        queue: Optional[OrderQueue] = None,
+        workers: int = 4,
+        store: Optional[SQLRepository] = None
+    ):
+        self.ibkr = ibkr_client
+        self.repository = repository
+        self.queue = queue
+        self.workers = workers
+        # Shared store pending trades are recovered from and claimed in
+        self.store = store
+        self._tasks: List[asyncio.Task] = []
+        # trade_id -> future resolved when the trade leaves "pending"
+        self._completions: Dict[str, asyncio.Future] = {}
+        # Awaited with each trade whose status changed
+        self.listeners: List[Callable[[Trade], Awaitable[None]]] = []
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    def start(self):
+        """Start the worker pool (called lazily by submit)"""
+        if self.running:
+            return
+        if self.queue is None:
+            self.queue = InProcessOrderQueue()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+        print(f"[ORDERS] Started {self.workers} order workers")
+
+    async def stop(self):
+        """Stop the workers; queued trades stay pending and their waiters get an error"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        completions, self._completions = self._completions, {}
+        for completion in completions.values():
+            if not completion.done():
+                completion.set_result(self._outcome(error="Order pipeline stopped; trade left pending"))
+
+    async def submit(self, trade: Trade) -> Trade:
+        """Record a trade as pending and queue it for submission"""
+        self.start()
+        trade.status = "pending"
+        self.repository.add_trade(trade)
+        await self._notify(trade)
+        await self._enqueue(trade)
+        return trade
+
+    async def _enqueue(self, trade: Trade):
+        self._completions[trade.id] = asyncio.get_running_loop().create_future()
+        await self.queue.put(trade.id)
+
+    async def reject(self, trade: Trade, error: str) -> Trade:
+        """Record a trade that cannot be placed as "failed" without queueing it"""
+        trade.status = "failed"
+        trade.notes = error
+        trade.updated_date = datetime.now()
+        self.repository.add_trade(trade)
+        await self._notify(trade)
+        return trade
+
+    async def wait(self, trade_ids: Iterable[str], timeout: Optional[float] = None) -> Dict[str, Dict]:
+        """
+        Wait until the given trades are no longer pending
+
+        Args:
+            trade_ids: Trades to wait for
+            timeout: Seconds to wait at most (None waits indefinitely)
+
+        Returns:
+            Dict of trade_id to {"order_id", "error", "listener_error"} for
+            trades that were in the pipeline when wait was called and
+            finished within the timeout
+        """
+        pending = {tid: self._completions[tid] for tid in trade_ids if tid in self._completions}
+        if not pending:
+            return {}
+        await asyncio.wait([asyncio.shield(f) for f in pending.values()], timeout=timeout)
+        return {tid: f.result() for tid, f in pending.items() if f.done()}
+
+    async def recover(self) -> int:
+        """
+        Re-enqueue trades left pending (e.g. by a restart); returns how many
+
+        Pending trades are read from the store when one is attached (they
+        may have been accepted by another process), else from the repository.
+        """
+        if self.store is not None:
+            pending = await self.store.get_pending_trades()
+        else:
+            pending = [t for t in self.repository.trades.values() if t.status == "pending"]
+
+        self.start()
+        recovered = 0
+        for trade in pending:
+            if trade.id not in self._completions:
+                # Already recorded as pending; queue it without writing it again
+                self.repository.add_trade(trade)
+                await self._enqueue(trade)
+                recovered += 1
+        return recovered
+
+    def get_trade(self, trade_id: str) -> Optional[Trade]:
+        """Current state of a trade"""
+        return self.repository.trades.get(trade_id)
+
+    @staticmethod
+    def _outcome(order_id: Optional[str] = None, error: Optional[str] = None,
+                 listener_error: Optional[str] = None) -> Dict:
+        return {"order_id": order_id, "error": error, "listener_error": listener_error}
+
+    async def _worker(self):
+        while True:
+            trade_id = await self.queue.get()
+            result = self._outcome()
+            try:
+                result = await self._execute(trade_id)
+            except asyncio.CancelledError:
+                # Stopped mid-order: the trade stays pending and stop() answers its waiters
+                self.queue.task_done(trade_id)
+                raise
+            except Exception as e:
+                print(f"[ORDERS] Error processing trade {trade_id}: {e}")
+                result["error"] = str(e)
+            self.queue.task_done(trade_id)
+            completion = self._completions.pop(trade_id, None)
+            if completion is not None and not completion.done():
+                completion.set_result(result)
+
+    async def _execute(self, trade_id: str) -> Dict:
+        trade = self.repository.trades.get(trade_id)
+        if trade is None or trade.status != "pending":
+            return self._outcome()
+        if self.store is not None and not await self.store.claim_pending_trade(trade):
+            # The other worker records the outcome in the store; status reads go there
+            print(f"[ORDERS] Trade {trade_id} already taken by another worker")
+            return self._outcome()
+
+        order_id, error = None, None
+        try:
+            order_id = await self.ibkr.place_order(trade)
+        except Exception as e:
+            print(f"[ORDERS] Order failed: {trade.trade_type} {trade.shares} {trade.symbol}: {e}")
+            error = str(e)
+            trade.status = "failed"
+            trade.notes = error
+        else:
+            # The gateway reports orders filled on acceptance
+            trade.status = "executed"
+            trade.executed_at = datetime.now()
+        trade.updated_date = datetime.now()
+
+        listener_error = None
+        try:
+            await self._notify(trade)
+        except Exception as e:
+            # The order outcome stands; only recording it failed
+            print(f"[ORDERS] Trade {trade_id} {trade.status} but recording it failed: {e}")
+            listener_error = str(e)
+        return self._outcome(order_id, error, listener_error)
+
+    async def _notify(self, trade: Trade):
+        for listener in self.listeners:
+            await listener(trade)
+
+# Export
+__all__ = ["OrderPipeline", "OrderQueue", "InProcessOrderQueue"]
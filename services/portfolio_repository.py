@@ -0,0 +1,202 @@
+"""
+Portfolio Repository
+In-memory entity store with secondary indexes for per-user lookups
+"""
+
+from bisect import bisect_left, insort
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+
+from models.entities import Portfolio, Holding, Trade
+from services.holdings_columns import ColumnarHoldings
+
+# Keyset cursor for trade history: (created_date, id) of the last trade served
+TradeCursor = Tuple[datetime, str]
+
+class PortfolioRepository:
+    """
+    In-memory store for portfolios, holdings and trades
+
+    Keeps secondary indexes (user -> portfolios, portfolio -> holdings,
+    symbol -> holdings, portfolio -> trades) in step with every write so
+    request handlers and price updates never have to scan the full tables.
+
+    Trades are additionally kept per portfolio as a sorted list of
+    (created_date, id) keys, so a history page is a bisect plus a slice.
+    """
+
+    def __init__(self):
+        # Primary tables keyed by entity id
+        self.portfolios: Dict[str, Portfolio] = {}
+        self.holdings: Dict[str, Holding] = {}
+        self.trades: Dict[str, Trade] = {}
+
+        # Secondary indexes (dicts used as insertion-ordered sets)
+        self._portfolios_by_user: Dict[str, Dict[str, None]] = {}
+        self._holdings_by_portfolio: Dict[str, Dict[str, None]] = {}
+        self._holdings_by_symbol: Dict[str, Dict[str, None]] = {}
+        self._trades_by_portfolio: Dict[str, Dict[str, None]] = {}
+        # portfolio -> (created_date, id) keys in ascending order
+        self._trade_keys_by_portfolio: Dict[str, List[TradeCursor]] = {}
+        # Columnar copy of every holding for batch scans (prices kept current by revaluation)
+        self.columns = ColumnarHoldings()
+
+    # ===== Portfolios =====
+
+    def add_portfolio(self, portfolio: Portfolio) -> Portfolio:
+        """Insert or replace a portfolio and index it by user"""
+        existing = self.portfolios.get(portfolio.id)
+        if existing is not None and existing.user_id != portfolio.user_id:
+            self._unindex(self._portfolios_by_user, existing.user_id, existing.id)
+
+        self.portfolios[portfolio.id] = portfolio
+        self._portfolios_by_user.setdefault(portfolio.user_id, {})[portfolio.id] = None
+        return portfolio
+
+    def remove_portfolio(self, portfolio_id: str) -> Optional[Portfolio]:
+        """Remove a portfolio together with its holdings and trades"""
+        portfolio = self.portfolios.pop(portfolio_id, None)
+        if portfolio is None:
+            return None
+
+        self._unindex(self._portfolios_by_user, portfolio.user_id, portfolio_id)
+        for holding_id in self._holdings_by_portfolio.pop(portfolio_id, {}):
+            holding = self.holdings.pop(holding_id, None)
+            if holding is not None:
+                self._unindex(self._holdings_by_symbol, holding.symbol, holding_id)
+                self.columns.remove(holding_id)
+        for trade_id in self._trades_by_portfolio.pop(portfolio_id, {}):
+            self.trades.pop(trade_id, None)
+        self._trade_keys_by_portfolio.pop(portfolio_id, None)
+        return portfolio
+
+    def get_user_portfolios(self, user_id: str) -> List[Portfolio]:
+        """Get all portfolios owned by a user"""
+        ids = self._portfolios_by_user.get(user_id, {})
+        return [self.portfolios[pid] for pid in ids]
+
+    def get_user_portfolio(self, user_id: str) -> Optional[Portfolio]:
+        """Get the user's primary (first created) portfolio"""
+        for portfolio_id in self._portfolios_by_user.get(user_id, {}):
+            return self.portfolios[portfolio_id]
+        return None
+
+    # ===== Holdings =====
+
+    def add_holding(self, holding: Holding) -> Holding:
+        """Insert or replace a holding and index it by portfolio and symbol"""
+        existing = self.holdings.get(holding.id)
+        if existing is not None:
+            if existing.portfolio_id != holding.portfolio_id:
+                self._unindex(self._holdings_by_portfolio, existing.portfolio_id, existing.id)
+            if existing.symbol != holding.symbol:
+                self._unindex(self._holdings_by_symbol, existing.symbol, existing.id)
+
+        self.holdings[holding.id] = holding
+        self._holdings_by_portfolio.setdefault(holding.portfolio_id, {})[holding.id] = None
+        self._holdings_by_symbol.setdefault(holding.symbol, {})[holding.id] = None
+        self.columns.upsert(holding)
+        return holding
+
+    def remove_holding(self, holding_id: str) -> Optional[Holding]:
+        """Remove a holding"""
+        holding = self.holdings.pop(holding_id, None)
+        if holding is not None:
+            self._unindex(self._holdings_by_portfolio, holding.portfolio_id, holding_id)
+            self._unindex(self._holdings_by_symbol, holding.symbol, holding_id)
+            self.columns.remove(holding_id)
+        return holding
+
+    def get_portfolio_holdings(self, portfolio_id: str) -> List[Holding]:
+        """Get all holdings of a portfolio in insertion order"""
+        ids = self._holdings_by_portfolio.get(portfolio_id, {})
+        return [self.holdings[hid] for hid in ids]
+
+    def get_symbol_holdings(self, symbol: str) -> List[Holding]:
+        """Get all holdings of a symbol across portfolios"""
+        ids = self._holdings_by_symbol.get(symbol, {})
+        return [self.holdings[hid] for hid in ids]
+
+    def held_symbols(self) -> List[str]:
+        """Symbols held in at least one portfolio"""
+        return list(self._holdings_by_symbol)
+
+    # ===== Trades =====
+
+    def add_trade(self, trade: Trade) -> Trade:
+        """Insert or replace a trade and index it by portfolio and time"""
+        existing = self.trades.get(trade.id)
+        if existing is not None:
+            self._unindex(self._trades_by_portfolio, existing.portfolio_id, existing.id)
+            self._unindex_trade_key(existing)
+
+        self.trades[trade.id] = trade
+        self._trades_by_portfolio.setdefault(trade.portfolio_id, {})[trade.id] = None
+        # New trades are usually the newest, so this is normally an append
+        insort(self._trade_keys_by_portfolio.setdefault(trade.portfolio_id, []), (trade.created_date, trade.id))
+        return trade
+
+    def remove_trade(self, trade_id: str) -> Optional[Trade]:
+        """Remove a trade"""
+        trade = self.trades.pop(trade_id, None)
+        if trade is not None:
+            self._unindex(self._trades_by_portfolio, trade.portfolio_id, trade_id)
+            self._unindex_trade_key(trade)
+        return trade
+
+    def get_portfolio_trades(self, portfolio_id: str) -> List[Trade]:
+        """Get all trades of a portfolio in insertion order"""
+        ids = self._trades_by_portfolio.get(portfolio_id, {})
+        return [self.trades[tid] for tid in ids]
+
+    def get_trade_page(
+        self,
+        portfolio_id: str,
+        limit: int = 100,
+        cursor: Optional[TradeCursor] = None
+    ) -> Tuple[List[Trade], Optional[TradeCursor]]:
+        """
+        One page of a portfolio's trades, newest first (keyset pagination)
+
+        Args:
+            portfolio_id: Portfolio to read
+            limit: Page size
+            cursor: (created_date, id) of the last trade of the previous page
+
+        Returns:
+            Tuple of (trades, cursor for the next page or None at the end)
+        """
+        keys = self._trade_keys_by_portfolio.get(portfolio_id, [])
+        end = len(keys) if cursor is None else bisect_left(keys, cursor)
+        start = max(0, end - limit)
+
+        trades = [self.trades[trade_id] for _, trade_id in reversed(keys[start:end])]
+        next_cursor = keys[start] if start > 0 and trades else None
+        return trades, next_cursor
+
+    # ===== Helpers =====
+
+    def _unindex_trade_key(self, trade: Trade):
+        """Drop a trade's key from its portfolio's time index"""
+        keys = self._trade_keys_by_portfolio.get(trade.portfolio_id)
+        if not keys:
+            return
+        key = (trade.created_date, trade.id)
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            del keys[i]
+        if not keys:
+            del self._trade_keys_by_portfolio[trade.portfolio_id]
+
+    @staticmethod
+    def _unindex(index: Dict[str, Dict[str, None]], key: str, entity_id: str):
+        """Drop an entity id from a secondary index bucket"""
+        bucket = index.get(key)
+        if bucket is None:
+            return
+        bucket.pop(entity_id, None)
+        if not bucket:
+            del index[key]
+
+# Export
+__all__ = ["PortfolioRepository", "TradeCursor"]
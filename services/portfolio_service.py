@@ -4,23 +4,53 @@ Business logic for portfolio management
 """
 
 import asyncio
+import base64
+import binascii
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta, date
-from dataclasses import asdict
-import uuid
 
-from models.entities import Portfolio, Holding, Trade, ExternalAccount, EducationalVideo, User
+from models.entities import Portfolio, Holding, Trade, ExternalAccount, EducationalVideo, User, demo_id
+from models.serializers import serialize, serialize_many, dumps
 from services.ibkr_client import IBKRClient
+from services.portfolio_repository import PortfolioRepository
+from services.revaluation_engine import RevaluationEngine
+from services.holdings_columns import ColumnarHoldings
+from services.response_cache import ResponseCache
+from services.cache import TieredCache
+from services.order_pipeline import OrderPipeline, OrderQueue
+from services.wash_sale_index import WashSaleIndex
+from database.repository import SQLRepository
 
 class PortfolioService:
     """Portfolio management service"""
     
-    def __init__(self, ibkr_client: IBKRClient):
+    def __init__(
+        self,
+        ibkr_client: IBKRClient,
+        cache: Optional[TieredCache] = None,
+        max_concurrent_orders: int = 10,
+        order_queue: Optional[OrderQueue] = None,
+        wash_sales: Optional[WashSaleIndex] = None
+    ):
         self.ibkr = ibkr_client
+        self.cache = cache
+        # Executed buys are recorded here; buys are checked against recent loss sales
+        self.wash_sales = wash_sales or WashSaleIndex()
+        # Optional persistent store; writes go through to it when attached
+        self.store: Optional[SQLRepository] = None
         # Mock database - replace with real database in production
-        self.portfolios = {}
-        self.holdings = {}
-        self.trades = {}
+        # Portfolios, holdings and trades are indexed; write through the repository
+        self.repository = PortfolioRepository()
+        self.portfolios = self.repository.portfolios
+        self.holdings = self.repository.holdings
+        self.trades = self.repository.trades
+        self.revaluation = RevaluationEngine(self.repository)
+        # Encoded dashboard/portfolio responses, invalidated by writes below
+        self.response_cache = ResponseCache()
+        self.revaluation.listeners.append(self._invalidate_portfolios)
+        # Orders are queued and placed by a worker pool (one worker per order in flight)
+        self.orders = OrderPipeline(ibkr_client, self.repository, queue=order_queue, workers=max_concurrent_orders)
+        self.orders.listeners.append(self._on_trade_update)
         self.users = {}
         self.external_accounts = {}
         self.videos = {}
@@ -53,7 +83,7 @@ class PortfolioService:
             risk_score=55.0,
             risk_tolerance="moderate"
         )
-        self.portfolios[portfolio.id] = portfolio
+        self.repository.add_portfolio(portfolio)
         
         # Create demo holdings
         holdings_data = [
@@ -71,7 +101,7 @@ class PortfolioService:
             gain_loss_pct = (gain_loss / total_cost) * 100
             
             holding = Holding(
-                id=str(uuid.uuid4()),
+                id=demo_id("holding", portfolio.id, symbol),
                 portfolio_id=portfolio.id,
                 symbol=symbol,
                 company_name=name,
@@ -84,7 +114,10 @@ class PortfolioService:
                 sector=sector,
                 asset_class="stocks"
             )
-            self.holdings[holding.id] = holding
+            self.repository.add_holding(holding)
+        
+        # Derive portfolio aggregates from holdings
+        self.revaluation.revalue_portfolio(portfolio.id)
         
         # Create educational videos
         videos_data = [
@@ -95,6 +128,7 @@ class PortfolioService:
         
         for title, desc, duration, level in videos_data:
             video = EducationalVideo(
+                id=demo_id("video", title),
                 title=title,
                 description=desc,
                 duration=duration,
@@ -106,30 +140,25 @@ class PortfolioService:
     
     async def get_dashboard_data(self, user_id: str) -> Dict:
         """Get dashboard data"""
+        await self._refresh_user(user_id)
         # Get user portfolio
-        portfolio = None
-        for p in self.portfolios.values():
-            if p.user_id == user_id:
-                portfolio = p
-                break
+        portfolio = self.repository.get_user_portfolio(user_id)
         
         if not portfolio:
             return {"error": "Portfolio not found"}
         
         # Get holdings
-        holdings = [h for h in self.holdings.values() if h.portfolio_id == portfolio.id]
+        holdings = self.repository.get_portfolio_holdings(portfolio.id)
         
-        # Calculate allocation
+        # Calculate allocation (a handful of holdings: a plain loop beats building columns)
         allocation = {}
         for holding in holdings:
             sector = holding.sector or "Other"
-            if sector not in allocation:
-                allocation[sector] = 0.0
-            allocation[sector] += holding.total_value
+            allocation[sector] = allocation.get(sector, 0.0) + holding.total_value
         
         return {
-            "portfolio": asdict(portfolio),
-            "holdings": [asdict(h) for h in holdings[:5]],
+            "portfolio": serialize(portfolio),
+            "holdings": serialize_many(holdings[:5]),
             "allocation": allocation,
             "recent_activity": [],
             "total_tax_savings": 2500.0
@@ -137,29 +166,141 @@ class PortfolioService:
     
     async def get_portfolio_data(self, user_id: str) -> Dict:
         """Get complete portfolio data"""
-        portfolio = None
-        for p in self.portfolios.values():
-            if p.user_id == user_id:
-                portfolio = p
-                break
+        await self._refresh_user(user_id)
+        portfolio = self.repository.get_user_portfolio(user_id)
         
         if not portfolio:
             return {"error": "Portfolio not found"}
         
-        holdings = [h for h in self.holdings.values() if h.portfolio_id == portfolio.id]
+        holdings = self.repository.get_portfolio_holdings(portfolio.id)
         
         return {
-            "portfolio": asdict(portfolio),
-            "holdings": [asdict(h) for h in holdings]
+            "portfolio": serialize(portfolio),
+            "holdings": serialize_many(holdings)
         }
     
     async def create_trade(self, trade_data: Dict) -> Dict:
-        """Create a new trade"""
-        # Get current price from IBKR
-        market_data = await self.ibkr.get_market_data(trade_data["symbol"])
+        """
+        Create a new trade
+        
+        The trade is queued for the order workers and returned as "pending";
+        poll get_trade_status for the outcome.
+        """
+        # Get current price from IBKR (trade pricing always uses a fresh quote)
+        market_data = await self.ibkr.get_market_data(trade_data["symbol"], max_age=0.0)
         price = market_data["last"]
+        self.apply_price_update(trade_data["symbol"], price)
+        
+        trade = await self.orders.submit(self._build_trade(trade_data, price))
+        
+        result = {"trade": serialize(trade)}
+        conflicts = self._wash_sale_conflicts(trade)
+        if conflicts:
+            result["wash_sale_conflicts"] = conflicts
+        return result
+    
+    async def create_trades_batch(self, trades_data: List[Dict], timeout: float = 30.0) -> Dict:
+        """
+        Create several trades at once (e.g. a rebalance)
+        
+        All symbols are priced with one bulk quote request, then the trades
+        are queued together and placed concurrently by the order workers.
+        A failed order, or one whose symbol got no quote, is recorded with
+        status "failed" and does not stop the others. Orders not placed
+        within timeout seconds are returned still "pending".
+        
+        Returns:
+            Dict with per-order results in request order and counts
+        """
+        quotes = await self.ibkr.get_market_data_bulk([t["symbol"] for t in trades_data], max_age=0.0)
+        for symbol, quote in quotes.items():
+            self.apply_price_update(symbol, quote["last"])
+        
+        trades, outcomes = [], {}
+        for trade_data in trades_data:
+            quote = quotes.get(trade_data["symbol"])
+            if quote is None:
+                error = f"No quote for {trade_data['symbol']}"
+                trade = await self.orders.reject(self._build_trade(trade_data, None), error)
+                outcomes[trade.id] = {"order_id": None, "error": error}
+            else:
+                trade = await self.orders.submit(self._build_trade(trade_data, quote["last"]))
+            trades.append(trade)
+        outcomes.update(await self.orders.wait(
+            [trade.id for trade in trades if trade.id not in outcomes], timeout=timeout
+        ))
+        
+        results = []
+        for trade in trades:
+            outcome = outcomes.get(trade.id, {})
+            result = {
+                "success": trade.status == "executed",
+                "trade": serialize(trade),
+                "order_id": outcome.get("order_id"),
+                "error": outcome.get("error")
+            }
+            if outcome.get("listener_error"):
+                result["listener_error"] = outcome["listener_error"]
+            conflicts = self._wash_sale_conflicts(trade)
+            if conflicts:
+                result["wash_sale_conflicts"] = conflicts
+            results.append(result)
+        executed = sum(1 for r in results if r["success"])
+        pending = sum(1 for trade in trades if trade.status == "pending")
+        return {
+            "results": results,
+            "executed_count": executed,
+            "pending_count": pending,
+            "failed_count": len(results) - executed - pending
+        }
+    
+    async def get_trade_status(self, user_id: str, trade_id: str) -> Dict:
+        """
+        Get the current state of one of the user's trades
         
-        trade = Trade(
+        With a store attached, unknown and still-pending trades are read
+        from it: another worker may have accepted or placed the order.
+        """
+        trade = self.orders.get_trade(trade_id)
+        if self.store is not None and (trade is None or trade.status == "pending"):
+            stored = await self.store.get(Trade, trade_id)
+            if stored is not None:
+                trade = stored
+        portfolio = self.portfolios.get(trade.portfolio_id) if trade else None
+        if trade is not None and portfolio is None and self.store is not None:
+            portfolio = await self.store.get(Portfolio, trade.portfolio_id)
+        if portfolio is None or portfolio.user_id != user_id:
+            return {"error": "Trade not found"}
+        return {"trade": serialize(trade)}
+    
+    def _wash_sale_conflicts(self, trade: Trade) -> List[Dict]:
+        """Recent loss sales a buy would turn into wash sales (reported, not blocked)"""
+        if trade.trade_type != "buy":
+            return []
+        return self.wash_sales.purchase_conflicts(trade.portfolio_id, trade.symbol, trade.created_date)
+    
+    async def _on_trade_update(self, trade: Trade):
+        """Persist a trade status change and drop stale cached responses"""
+        self._record_wash_sale_events(trade)
+        await self._persist(trade)
+        self._invalidate_portfolios([trade.portfolio_id])
+    
+    def _record_wash_sale_events(self, trade: Trade):
+        """Record an executed buy, or an executed sell below the holding's average cost"""
+        self.wash_sales.record_trade(trade)
+        if trade.trade_type != "sell" or trade.status != "executed" or trade.price is None:
+            return
+        for holding in self.repository.get_portfolio_holdings(trade.portfolio_id):
+            if holding.symbol == trade.symbol and trade.price < holding.average_cost:
+                self.wash_sales.record_loss_sale(
+                    trade.portfolio_id, trade.symbol, trade.executed_at or trade.updated_date, trade.id
+                )
+                return
+    
+    @staticmethod
+    def _build_trade(trade_data: Dict, price: Optional[float]) -> Trade:
+        """Pending trade priced at a quote (unpriced without one)"""
+        return Trade(
             portfolio_id=trade_data["portfolio_id"],
             symbol=trade_data["symbol"],
             trade_type=trade_data["trade_type"],
@@ -168,38 +309,176 @@ class PortfolioService:
             price=price,
             limit_price=trade_data.get("limit_price"),
             stop_price=trade_data.get("stop_price"),
-            total_amount=price * trade_data["shares"],
+            total_amount=price * trade_data["shares"] if price is not None else None,
             status="pending"
         )
+    
+    async def attach_store(self, store: SQLRepository):
+        """
+        Persist writes to a SQL store and start from its contents
         
-        # Place order with IBKR
-        order_id = await self.ibkr.place_order(trade)
-        trade.status = "executed"
-        trade.executed_at = datetime.now()
+        An empty store is seeded with the demo data first. The in-memory
+        tables are then replaced by what the store holds, and from then on
+        user-facing reads refresh the user's rows from the store first
+        (_refresh_user), so writes made by other workers show up.
+        """
+        self.store = store
+        self.orders.store = store
+        if await store.get_user_portfolio("user_1") is None:
+            await store.save_many([
+                *self.users.values(),
+                *self.portfolios.values(),
+                *self.holdings.values(),
+                *self.trades.values(),
+                *self.external_accounts.values(),
+                *self.videos.values()
+            ])
+        await self._load_from_store()
+    
+    async def _load_from_store(self):
+        """Replace the in-memory tables with the store's rows"""
+        for trade_id in list(self.trades):
+            self.repository.remove_trade(trade_id)
+        for holding_id in list(self.holdings):
+            self.repository.remove_holding(holding_id)
+        for portfolio_id in list(self.portfolios):
+            self.repository.remove_portfolio(portfolio_id)
         
-        self.trades[trade.id] = trade
+        for portfolio in await self.store.all(Portfolio):
+            self.repository.add_portfolio(portfolio)
+        for holding in await self.store.all(Holding):
+            self.repository.add_holding(holding)
+        for trade in await self.store.all(Trade):
+            self.repository.add_trade(trade)
+            self._record_wash_sale_events(trade)
         
-        return {"trade": asdict(trade), "order_id": order_id}
+        for table, entity_type in (
+            (self.users, User),
+            (self.external_accounts, ExternalAccount),
+            (self.videos, EducationalVideo)
+        ):
+            table.clear()
+            table.update((e.id, e) for e in await self.store.all(entity_type))
+        
+        for portfolio_id in list(self.portfolios):
+            self.revaluation.revalue_portfolio(portfolio_id)
+        print(f"[PORTFOLIO] Loaded {len(self.portfolios)} portfolios, "
+              f"{len(self.holdings)} holdings, {len(self.trades)} trades from the store")
     
-    async def get_trade_history(self, user_id: str, limit: int = 100) -> Dict:
-        """Get trade history"""
+    async def _refresh_user(self, user_id: str, holdings: bool = True):
+        """
+        Re-read a user's profile and portfolios (and their holdings) from the store
+        
+        A no-op without a store. Refreshed holdings are marked at the
+        latest streamed prices, and the user's cached responses are dropped.
+        """
+        if self.store is None:
+            return
+        user = await self.store.get_user(user_id)
+        if user is not None:
+            self.users[user.id] = user
+        portfolios = await self.store.get_user_portfolios(user_id)
+        for portfolio in portfolios:
+            self.repository.add_portfolio(portfolio)
+            if not holdings:
+                continue
+            stored = await self.store.get_portfolio_holdings(portfolio.id)
+            stored_ids = {h.id for h in stored}
+            for holding in self.repository.get_portfolio_holdings(portfolio.id):
+                if holding.id not in stored_ids:
+                    self.repository.remove_holding(holding.id)
+            for holding in stored:
+                self.repository.add_holding(holding)
+        for portfolio in portfolios:
+            # Derived fields of a replaced entity are recomputed from its holdings
+            self.revaluation.revalue_portfolio(portfolio.id)
+    
+    async def _persist(self, *entities):
+        if self.store is not None:
+            await self.store.save_many(entities)
+    
+    def columnar_holdings(self) -> ColumnarHoldings:
+        """Columnar store of every holding for batch aggregate queries (maintained by the repository)"""
+        return self.repository.columns
+    
+    def scan_rebalancing(self, target_weights: Dict[str, float], threshold: float = 0.05) -> Dict[str, float]:
+        """Find portfolios whose sector weights drift from targets beyond threshold"""
+        return self.columnar_holdings().rebalance_candidates(target_weights, threshold)
+    
+    def apply_price_update(self, symbol: str, price: float) -> List[str]:
+        """Mark holdings of a symbol to a new price; returns affected portfolio IDs"""
+        return self.revaluation.update_price(symbol, price)
+    
+    def _invalidate_portfolios(self, portfolio_ids: List[str]):
+        """Drop cached responses of the owners of the given portfolios"""
+        for portfolio_id in portfolio_ids:
+            portfolio = self.portfolios.get(portfolio_id)
+            if portfolio is not None:
+                self.response_cache.invalidate_user(portfolio.user_id)
+    
+    async def get_trade_history(self, user_id: str, limit: int = 100, cursor: Optional[str] = None) -> Dict:
+        """
+        Get one page of trade history, newest first
+        
+        Args:
+            user_id: User ID
+            limit: Page size
+            cursor: next_cursor from the previous page (None for the first page)
+        """
+        await self._refresh_user(user_id, holdings=False)
         # Get user's portfolio
-        portfolio = None
-        for p in self.portfolios.values():
-            if p.user_id == user_id:
-                portfolio = p
-                break
+        portfolio = self.repository.get_user_portfolio(user_id)
         
         if not portfolio:
-            return {"trades": []}
+            return {"trades": [], "next_cursor": None}
         
-        trades = [
-            t for t in self.trades.values()
-            if t.portfolio_id == portfolio.id
-        ]
-        trades.sort(key=lambda x: x.created_date, reverse=True)
+        try:
+            position = self._decode_cursor(cursor) if cursor else None
+        except ValueError:
+            return {"error": "Invalid cursor"}
         
-        return {"trades": [asdict(t) for t in trades[:limit]]}
+        trades, next_position = await self._trade_page(portfolio.id, limit, position)
+        
+        return {
+            "trades": serialize_many(trades),
+            "next_cursor": self._encode_cursor(next_position) if next_position else None
+        }
+    
+    async def stream_trade_history(self, user_id: str, page_size: int = 500):
+        """Yield the full trade history as NDJSON lines, newest first, one page at a time"""
+        await self._refresh_user(user_id, holdings=False)
+        portfolio = self.repository.get_user_portfolio(user_id)
+        if not portfolio:
+            return
+        
+        position = None
+        while True:
+            trades, position = await self._trade_page(portfolio.id, page_size, position)
+            if trades:
+                yield b"".join(dumps(serialize(trade)) + b"\n" for trade in trades)
+            if position is None:
+                break
+    
+    async def _trade_page(self, portfolio_id: str, limit: int, position):
+        """Keyset page from the shared store when attached, else the in-memory index"""
+        if self.store is not None:
+            return await self.store.get_trade_page(portfolio_id, limit, position)
+        return self.repository.get_trade_page(portfolio_id, limit, position)
+    
+    @staticmethod
+    def _encode_cursor(position) -> str:
+        """Opaque page cursor for a (created_date, id) key"""
+        created_date, trade_id = position
+        raw = f"{created_date.isoformat()}|{trade_id}".encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+    
+    @staticmethod
+    def _decode_cursor(cursor: str):
+        try:
+            created_date, trade_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+        except (UnicodeError, binascii.Error) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+        return datetime.fromisoformat(created_date), trade_id
     
     async def get_external_accounts(self, user_id: str) -> Dict:
         """Get external accounts"""
@@ -207,32 +486,45 @@ class PortfolioService:
             a for a in self.external_accounts.values()
             if a.user_id == user_id
         ]
-        return {"accounts": [asdict(a) for a in accounts]}
+        return {"accounts": serialize_many(accounts)}
     
     async def get_educational_videos(self, category: str = None) -> Dict:
         """Get educational videos"""
+        if self.cache is not None:
+            return await self.cache.get_or_set(
+                "educational_videos", category or "all",
+                lambda: self._build_educational_videos(category),
+                ttl=3600
+            )
+        return await self._build_educational_videos(category)
+    
+    async def _build_educational_videos(self, category: str = None) -> Dict:
         videos = list(self.videos.values())
         
         if category:
             videos = [v for v in videos if v.category == category]
         
-        return {"videos": [asdict(v) for v in videos]}
+        return {"videos": serialize_many(videos)}
     
     async def get_user_profile(self, user_id: str) -> Dict:
         """Get user profile"""
+        await self._refresh_user(user_id, holdings=False)
         if user_id in self.users:
-            return asdict(self.users[user_id])
+            return serialize(self.users[user_id])
         return {"error": "User not found"}
     
     async def update_user_profile(self, user_id: str, updates: Dict) -> Dict:
         """Update user profile"""
+        await self._refresh_user(user_id, holdings=False)
         if user_id in self.users:
             user = self.users[user_id]
             for key, value in updates.items():
                 if hasattr(user, key):
                     setattr(user, key, value)
             user.updated_date = datetime.now()
-            return {"success": True, "user": asdict(user)}
+            await self._persist(user)
+            self.response_cache.invalidate_user(user_id)
+            return {"success": True, "user": serialize(user)}
         return {"error": "User not found"}
 
 # Export
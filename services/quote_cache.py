@@ -0,0 +1,77 @@
+"""
+Quote Cache
+Bounded LRU cache of market data quotes with per-read staleness budgets
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+class QuoteCache:
+    """
+    LRU quote cache keyed by symbol
+
+    Entries carry their fetch time; each read passes the maximum age the
+    caller will accept (e.g. 2s for display, 0 for trade pricing), so one
+    cache serves callers with different freshness needs.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Forced-fresh reads (max_age <= 0) never consult the cache
+        self.bypasses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, symbol: str, max_age: float) -> Optional[Dict]:
+        """Get a copy of the cached quote if it is at most max_age seconds old"""
+        if max_age <= 0:
+            self.bypasses += 1
+            return None
+
+        entry = self._entries.get(symbol)
+        if entry is None or time.monotonic() - entry[0] > max_age:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(symbol)
+        self.hits += 1
+        return dict(entry[1])
+
+    def put(self, symbol: str, quote: Dict):
+        """Store a freshly fetched quote, evicting the least recently used"""
+        self._entries[symbol] = (time.monotonic(), dict(quote))
+        self._entries.move_to_end(symbol)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, symbol: str):
+        """Drop a cached quote"""
+        self._entries.pop(symbol, None)
+
+    def clear(self):
+        """Drop all cached quotes"""
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters (hit_rate excludes forced-fresh reads)"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+# Export
+__all__ = ["QuoteCache"]
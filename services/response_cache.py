@@ -0,0 +1,100 @@
+"""
+Response Cache
+Per-user cache of pre-encoded JSON responses with ETags and write-driven invalidation
+"""
+
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+@dataclass(slots=True)
+class CachedResponse:
+    """Encoded response body and its strong ETag"""
+    body: bytes
+    etag: str
+
+class ResponseCache:
+    """
+    LRU cache of encoded responses, grouped per user and keyed by endpoint
+
+    Entries never expire on their own; writes that change what a user
+    sees call invalidate_user. A per-user version guards against caching
+    a payload that was built while an invalidation happened.
+    """
+
+    def __init__(self, max_users: int = 100000):
+        self.max_users = max_users
+        self._entries: "OrderedDict[str, Dict[str, CachedResponse]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return sum(len(responses) for responses in self._entries.values())
+
+    @staticmethod
+    def make_etag(body: bytes) -> str:
+        """Strong ETag derived from the encoded body"""
+        return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+    @staticmethod
+    def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+        """Whether an If-None-Match header value matches an ETag"""
+        if not if_none_match:
+            return False
+        for candidate in if_none_match.split(","):
+            candidate = candidate.strip()
+            if candidate == "*" or candidate.removeprefix("W/") == etag:
+                return True
+        return False
+
+    def version(self, user_id: str) -> int:
+        """Current invalidation version for a user"""
+        return self._versions.get(user_id, 0)
+
+    def get(self, user_id: str, endpoint: str) -> Optional[CachedResponse]:
+        """Get a cached response"""
+        responses = self._entries.get(user_id)
+        entry = responses.get(endpoint) if responses is not None else None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry
+
+    def put(self, user_id: str, endpoint: str, body: bytes, version: int) -> CachedResponse:
+        """
+        Store an encoded response built at the given user version
+
+        The entry is returned but not stored if the user was invalidated
+        while the payload was being built.
+        """
+        entry = CachedResponse(body=body, etag=self.make_etag(body))
+        if version != self.version(user_id):
+            return entry
+
+        self._entries.setdefault(user_id, {})[endpoint] = entry
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+        return entry
+
+    def invalidate_user(self, user_id: str):
+        """Drop every cached response for a user"""
+        self._versions[user_id] = self.version(user_id) + 1
+        self._entries.pop(user_id, None)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "users": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+# Export
+__all__ = ["ResponseCache", "CachedResponse"]
@@ -0,0 +1,157 @@
+"""
+Revaluation Engine
+Incremental mark-to-market of holdings and portfolio aggregates on price ticks
+"""
+
+import asyncio
+from typing import List, Dict, Callable
+from datetime import datetime
+
+from models.entities import Holding
+from services.portfolio_repository import PortfolioRepository
+from services.market_data_hub import MarketDataHub
+
+class RevaluationEngine:
+    """
+    Incremental holding revaluation
+
+    A price update for a symbol touches only the holdings of that symbol
+    (via the repository's symbol index) and applies the value/gain deltas
+    to their portfolios' running aggregates, so cost is proportional to
+    the affected positions rather than to every portfolio.
+
+    Portfolio.total_value is holdings market value plus cash_balance;
+    total_gain_loss and total_gain_loss_percent are relative to the
+    holdings' cost basis.
+    """
+
+    def __init__(self, repository: PortfolioRepository):
+        self.repository = repository
+        # Running per-portfolio aggregates
+        self._market_value: Dict[str, float] = {}
+        self._cost_basis: Dict[str, float] = {}
+        self.last_prices: Dict[str, float] = {}
+        # Called with the IDs of portfolios whose values changed
+        self.listeners: List[Callable[[List[str]], None]] = []
+        # symbol -> task consuming the market data hub's ticks
+        self._tracking: Dict[str, asyncio.Task] = {}
+
+    def _mark(self, holding: Holding, price: float, now: datetime):
+        """Recompute one holding's derived fields (and its columnar row) at a price"""
+        cost = holding.shares * holding.average_cost
+        holding.current_price = price
+        holding.total_value = holding.shares * price
+        holding.total_gain_loss = holding.total_value - cost
+        holding.total_gain_loss_percent = (holding.total_gain_loss / cost) * 100 if cost else 0.0
+        holding.updated_date = now
+        self.repository.columns.mark(holding.id, price, holding.total_value)
+
+    def _publish_portfolio(self, portfolio_id: str, now: datetime):
+        """Copy running aggregates onto the Portfolio entity"""
+        portfolio = self.repository.portfolios.get(portfolio_id)
+        if portfolio is None:
+            return
+        market_value = self._market_value.get(portfolio_id, 0.0)
+        cost_basis = self._cost_basis.get(portfolio_id, 0.0)
+        gain_loss = market_value - cost_basis
+
+        portfolio.total_value = market_value + portfolio.cash_balance
+        portfolio.total_gain_loss = gain_loss
+        portfolio.total_gain_loss_percent = (gain_loss / cost_basis) * 100 if cost_basis else 0.0
+        portfolio.updated_date = now
+
+    def revalue_portfolio(self, portfolio_id: str):
+        """
+        Recompute one portfolio's aggregates from its holdings
+
+        Call after holdings are added, removed or change shares/cost.
+        """
+        self._revalue(portfolio_id, datetime.now())
+        self._notify([portfolio_id])
+
+    def _revalue(self, portfolio_id: str, now: datetime):
+        market_value = 0.0
+        cost_basis = 0.0
+        for holding in self.repository.get_portfolio_holdings(portfolio_id):
+            price = self.last_prices.get(holding.symbol, holding.current_price)
+            self._mark(holding, price, now)
+            market_value += holding.total_value
+            cost_basis += holding.shares * holding.average_cost
+
+        self._market_value[portfolio_id] = market_value
+        self._cost_basis[portfolio_id] = cost_basis
+        self._publish_portfolio(portfolio_id, now)
+
+    def revalue_all(self):
+        """Full rebuild of every portfolio (startup or periodic drift correction)"""
+        for portfolio_id in list(self.repository.portfolios):
+            self.revalue_portfolio(portfolio_id)
+
+    def update_price(self, symbol: str, price: float) -> List[str]:
+        """
+        Apply a price tick to the holdings of one symbol
+
+        Returns:
+            IDs of portfolios whose aggregates changed
+        """
+        self.last_prices[symbol] = price
+        now = datetime.now()
+        affected = {}
+
+        for holding in self.repository.get_symbol_holdings(symbol):
+            old_value = holding.total_value
+            self._mark(holding, price, now)
+            delta = holding.total_value - old_value
+            if delta == 0:
+                continue
+
+            portfolio_id = holding.portfolio_id
+            if portfolio_id not in self._market_value:
+                # Aggregates not built yet for this portfolio
+                self._revalue(portfolio_id, now)
+                affected[portfolio_id] = None
+                continue
+            self._market_value[portfolio_id] += delta
+            affected[portfolio_id] = None
+
+        for portfolio_id in affected:
+            self._publish_portfolio(portfolio_id, now)
+        self._notify(list(affected))
+
+        return list(affected)
+
+    def _notify(self, portfolio_ids: List[str]):
+        """Tell listeners which portfolios were revalued"""
+        if portfolio_ids:
+            for listener in self.listeners:
+                listener(portfolio_ids)
+
+    async def track(self, hub: MarketDataHub, symbol: str):
+        """Revalue a symbol's holdings on every streamed tick"""
+        async for tick in hub.stream(symbol):
+            price = tick.get("last")
+            if price is not None:
+                self.update_price(symbol, price)
+
+    def start_tracking(self, hub: MarketDataHub) -> int:
+        """Follow the hub's ticks for every held symbol not yet tracked; returns how many were added"""
+        added = 0
+        for symbol in self.repository.held_symbols():
+            task = self._tracking.get(symbol)
+            if task is None or task.done():
+                self._tracking[symbol] = asyncio.ensure_future(self.track(hub, symbol))
+                added += 1
+        if added:
+            print(f"[REVALUE] Tracking {added} symbols")
+        return added
+
+    async def stop_tracking(self):
+        """Cancel all tick consumers (releasing their hub subscriptions)"""
+        tasks = list(self._tracking.values())
+        self._tracking.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+# Export
+__all__ = ["RevaluationEngine"]
@@ -3,23 +3,55 @@ Tax Loss Harvesting Service
 Identifies and executes tax-efficient selling strategies
 """
 
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional
 from datetime import datetime, timedelta, date
-from dataclasses import asdict
-import uuid
 
-from models.entities import TaxHarvest
+import pandas as pd
+
+from models.entities import TaxHarvest, demo_id
+from models.serializers import serialize, serialize_many
 from models.similarity_engine import SimilarityEngine
+from models.similarity_index import SimilarityIndex
 from services.ibkr_client import IBKRClient
+from services.cache import TieredCache
+from services.harvest_book import HarvestBook
+from services.historical_store import HistoricalBarStore
+from services.harvest_scanner import HarvestScanner, TaxLots
+from services.portfolio_repository import PortfolioRepository
+from services.wash_sale_index import WashSaleIndex
+from database.repository import SQLRepository
 
 class TaxHarvestService:
     """Tax loss harvesting service"""
     
-    def __init__(self, ibkr_client: IBKRClient):
+    def __init__(
+        self,
+        ibkr_client: IBKRClient,
+        cache: Optional[TieredCache] = None,
+        repository: Optional[PortfolioRepository] = None,
+        min_loss: float = 500.0,
+        wash_sales: Optional[WashSaleIndex] = None
+    ):
         self.ibkr = ibkr_client
+        self.cache = cache
+        self.store: Optional[SQLRepository] = None
+        # Holdings to scan for opportunities (shared with PortfolioService)
+        self.repository = repository
         self.similarity_engine = SimilarityEngine()
-        self.tax_harvests = {}
+        self.similarity_index: Optional[SimilarityIndex] = None
+        # Harvests indexed by portfolio and status, with running totals
+        self.book = HarvestBook()
+        self.tax_harvests = self.book.harvests
         self.tax_rate = 0.25  # 25% tax rate
+        self.scanner = HarvestScanner(tax_rate=self.tax_rate, min_loss=min_loss)
+        # Purchases / loss sales for wash-sale checks (shared with PortfolioService)
+        self.wash_sales = wash_sales or WashSaleIndex()
+        if self.wash_sales.identical is None:
+            self.wash_sales.identical = self._identical_symbols
+        # Similarity at or above which securities count as substantially identical
+        self.identical_threshold = 0.95
+        self._identical_cache: Dict[str, List[str]] = {}
+        self._identical_cache_index: Optional[SimilarityIndex] = None
         
         # Initialize demo opportunities
         self._initialize_demo_opportunities()
@@ -37,7 +69,7 @@ class TaxHarvestService:
             wash_sale_date = purchase_date + timedelta(days=30)
             
             harvest = TaxHarvest(
-                id=str(uuid.uuid4()),
+                id=demo_id("harvest", "portfolio_1", symbol),
                 portfolio_id="portfolio_1",
                 symbol=symbol,
                 shares=shares,
@@ -49,64 +81,217 @@ class TaxHarvestService:
                 status="identified",
                 wash_sale_date=wash_sale_date
             )
-            self.tax_harvests[harvest.id] = harvest
+            self.book.add(harvest)
     
-    async def get_tax_harvesting_data(self, user_id: str) -> Dict:
-        """Get tax harvesting opportunities"""
-        harvests = list(self.tax_harvests.values())
+    async def attach_store(self, store: SQLRepository):
+        """Persist writes to a SQL store, seeding it if empty, and start from its harvests"""
+        self.store = store
+        if not await store.all(TaxHarvest):
+            await store.save_many(self.tax_harvests.values())
         
-        total_savings = sum(h.tax_savings for h in harvests if h.status == "identified")
+        self.book = HarvestBook()
+        self.tax_harvests = self.book.harvests
+        for harvest in await store.all(TaxHarvest):
+            self.book.add(harvest)
+            if harvest.status == "executed":
+                self.wash_sales.record_loss_sale(
+                    harvest.portfolio_id, harvest.symbol, harvest.updated_date.date(), harvest.id
+                )
+        print(f"[TAX] Loaded {len(self.book)} tax harvests from the store")
+    
+    def _user_portfolio_ids(self, user_id: str) -> List[str]:
+        """Portfolios whose harvests a user sees (all of them without a repository)"""
+        if self.repository is None:
+            return self.book.portfolio_ids()
+        return [p.id for p in self.repository.get_user_portfolios(user_id)]
+    
+    def _cache_key(self, user_id: str) -> str:
+        return user_id if self.repository is not None else "all"
+    
+    async def _invalidate(self, portfolio_ids: Iterable[str]):
+        """Drop the cached views of the portfolios' owners"""
+        if self.cache is None:
+            return
+        if self.repository is None:
+            await self.cache.invalidate("tax_harvesting", "all")
+            return
+        owners = {
+            self.repository.portfolios[pid].user_id
+            for pid in set(portfolio_ids) if pid in self.repository.portfolios
+        }
+        for user_id in owners:
+            await self.cache.invalidate("tax_harvesting", user_id)
+    
+    async def get_tax_harvesting_data(self, user_id: str, status: Optional[str] = None) -> Dict:
+        """Get the user's tax harvesting opportunities, optionally filtered by status"""
+        if self.cache is not None and status is None:
+            return await self.cache.get_or_set(
+                "tax_harvesting", self._cache_key(user_id), lambda: self._build_tax_harvesting_data(user_id)
+            )
+        return await self._build_tax_harvesting_data(user_id, status)
+    
+    async def _build_tax_harvesting_data(self, user_id: str, status: Optional[str] = None) -> Dict:
+        portfolio_ids = self._user_portfolio_ids(user_id)
+        harvests = [
+            harvest
+            for portfolio_id in portfolio_ids
+            for harvest in self.book.get_portfolio_harvests(portfolio_id, status)
+        ]
         
         return {
-            "tax_harvests": [asdict(h) for h in harvests],
-            "total_potential_savings": total_savings,
-            "current_year_harvested": 0.0
+            "tax_harvests": serialize_many(harvests),
+            "total_potential_savings": round(self.book.potential_savings(portfolio_ids), 2),
+            "current_year_harvested": round(self.book.harvested(portfolio_ids), 2)
         }
     
     async def execute_tax_harvest(self, harvest_id: str) -> Dict:
         """Execute a tax harvest"""
+        if self.store is not None:
+            # Another worker may have executed it since startup
+            stored = await self.store.get(TaxHarvest, harvest_id)
+            if stored is not None:
+                self.book.add(stored)
         if harvest_id not in self.tax_harvests:
             return {"error": "Tax harvest not found"}
         
         harvest = self.tax_harvests[harvest_id]
+        if harvest.status == "executed":
+            return {"error": "Tax harvest already executed"}
         
-        # Execute sell order
-        market_data = await self.ibkr.get_market_data(harvest.symbol)
+        # Selling at a loss within 30 days of buying the same (or an identical) security is a wash sale
+        conflicts = self.wash_sales.sale_conflicts(
+            harvest.portfolio_id, harvest.symbol, date.today(), harvest.purchase_date
+        )
+        if conflicts:
+            return {"error": "Wash sale conflict", "conflicts": conflicts}
         
-        # Update status
-        harvest.status = "executed"
-        harvest.updated_date = datetime.now()
+        # Execute sell order (priced from a fresh quote)
+        market_data = await self.ibkr.get_market_data(harvest.symbol, max_age=0.0)
         
-        # Find replacement securities
+        # Update status (and the running totals with it)
+        self.book.set_status(harvest.id, "executed")
+        self.wash_sales.record_loss_sale(harvest.portfolio_id, harvest.symbol, date.today(), harvest.id)
+        if self.store is not None:
+            await self.store.save(harvest)
+        await self._invalidate([harvest.portfolio_id])
+        
+        # Find replacement securities (only from loaded price history)
         replacements = await self._find_replacement_securities(harvest.symbol)
         
         return {
             "success": True,
-            "harvest": asdict(harvest),
-            "replacement_suggestions": replacements
+            "harvest": serialize(harvest),
+            "replacement_suggestions": replacements,
+            "replacements_available": harvest.symbol in self._get_similarity_index()
         }
     
-    async def _find_replacement_securities(self, symbol: str) -> List[Dict]:
-        """Find similar securities for replacement"""
-        # Mock replacement suggestions
-        replacements = [
-            {
-                "symbol": f"{symbol}_ALT1",
-                "similarity_score": 0.92,
-                "reason": "High correlation, same sector"
-            },
+    def load_asset_data(self, bar_store: HistoricalBarStore, symbols: Optional[List[str]] = None) -> int:
+        """
+        Register stored daily closes with the similarity engine
+        
+        Sectors come from the shared holdings where known. Returns the
+        number of symbols loaded.
+        """
+        sectors = {}
+        if self.repository is not None:
+            sectors = {h.symbol: h.sector for h in self.repository.holdings.values() if h.sector}
+        
+        loaded = 0
+        for symbol in symbols if symbols is not None else bar_store.symbols():
+            bars = bar_store.read_frame(symbol)
+            if len(bars) < 2:
+                continue
+            prices = pd.Series(bars["close"].to_numpy(), index=bars["date"])
+            self.similarity_engine.add_asset_data(symbol, prices, sectors.get(symbol))
+            loaded += 1
+        print(f"[TAX] Loaded price history for {loaded} symbols")
+        return loaded
+    
+    def _get_similarity_index(self) -> SimilarityIndex:
+        """Get the replacement-search index, rebuilt once per trading day or on new data"""
+        if self.similarity_index is None or not self.similarity_index.is_current(self.similarity_engine):
+            self.similarity_index = SimilarityIndex(self.similarity_engine)
+        return self.similarity_index
+    
+    def _identical_symbols(self, symbol: str) -> List[str]:
+        """Securities similar enough to count as substantially identical to a symbol"""
+        index = self._get_similarity_index()
+        if index is not self._identical_cache_index:
+            self._identical_cache = {}
+            self._identical_cache_index = index
+        members = self._identical_cache.get(symbol)
+        if members is None:
+            matches = index.query(symbol, top_k=10, min_similarity=self.identical_threshold)
+            members = self._identical_cache[symbol] = [symbol] + [m.symbol for m in matches]
+        return members
+    
+    async def _find_replacement_securities(
+        self,
+        symbol: str,
+        top_k: int = 5,
+        min_similarity: float = 0.7
+    ) -> List[Dict]:
+        """Find similar securities for replacement (none without price history for the symbol)"""
+        index = self._get_similarity_index()
+        if symbol not in index:
+            return []
+        matches = index.query(symbol, top_k=top_k, min_similarity=min_similarity)
+        
+        return [
             {
-                "symbol": f"{symbol}_ALT2",
-                "similarity_score": 0.88,
-                "reason": "Similar volatility and beta"
+                "symbol": match.symbol,
+                "similarity_score": match.similarity_score,
+                "reason": ", ".join(match.reasons) or "Similar overall profile"
             }
+            for match in matches
         ]
-        return replacements
     
     async def identify_opportunities(self, portfolio_id: str) -> List[TaxHarvest]:
-        """Identify new tax loss harvesting opportunities"""
-        # TODO: Implement opportunity identification logic
-        return list(self.tax_harvests.values())
+        """Identify new tax loss harvesting opportunities in one portfolio"""
+        if self.repository is None:
+            return []
+        return await self._scan(self.repository.get_portfolio_holdings(portfolio_id))
+    
+    async def scan_all_portfolios(self, as_of: Optional[date] = None) -> List[TaxHarvest]:
+        """Nightly sweep: scan every holding of every portfolio in one batch"""
+        if self.repository is None:
+            return []
+        return await self._scan(self.repository.holdings.values(), as_of)
+    
+    async def _scan(self, holdings, as_of: Optional[date] = None) -> List[TaxHarvest]:
+        """Price the lots with one bulk quote call, scan them, and record what was found"""
+        lots = TaxLots.from_holdings(holdings)
+        if not len(lots):
+            return []
+        quotes = await self.ibkr.get_market_data_bulk(lots.symbols.tolist(), max_age=60.0)
+        prices = {symbol: quote["last"] for symbol, quote in quotes.items()}
+        
+        harvests = self.scanner.scan(lots, prices, as_of)
+        found = await self._record_opportunities(harvests)
+        print(f"[TAX] Scanned {len(lots)} lots, {len(found)} harvest opportunities")
+        return found
+    
+    async def _record_opportunities(self, harvests: List[TaxHarvest]) -> List[TaxHarvest]:
+        """Store new opportunities, refreshing ones already identified for the same lot"""
+        portfolio_ids = {h.portfolio_id for h in harvests}
+        existing = {
+            (h.portfolio_id, h.symbol, h.purchase_date): h
+            for portfolio_id in portfolio_ids
+            for h in self.book.get_portfolio_harvests(portfolio_id, "identified")
+        }
+        recorded = []
+        for harvest in harvests:
+            current = existing.get((harvest.portfolio_id, harvest.symbol, harvest.purchase_date))
+            if current is not None:
+                harvest.id = current.id
+                harvest.created_date = current.created_date
+            self.book.add(harvest)
+            recorded.append(harvest)
+        
+        if self.store is not None and recorded:
+            await self.store.save_many(recorded)
+        await self._invalidate(portfolio_ids)
+        return recorded
 
 # Export
 __all__ = ["TaxHarvestService"]
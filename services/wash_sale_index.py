@@ -0,0 +1,95 @@
+"""
+Wash-Sale Index
+Per-account, per-symbol sorted purchase and loss-sale dates for ±30-day conflict checks
+"""
+
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from models.entities import Trade
+from services.harvest_scanner import WASH_SALE_DAYS
+
+# (account, symbol) -> sorted [(date, ref)]
+_Events = Dict[Tuple[str, str], List[Tuple[date, str]]]
+
+class WashSaleIndex:
+    """
+    Interval index of purchases and loss sales
+
+    Events are kept per (account, symbol) as sorted (date, ref) lists, so
+    "any event within ±30 days" is two bisects per symbol. A symbol's
+    substantially identical securities come from the identical callback
+    (by default just the symbol itself); checks cover every member.
+
+    - A loss sale on day d conflicts with purchases in [d - 30, d + 30]
+      (other than the lot being sold).
+    - A purchase on day d conflicts with loss sales in [d - 30, d].
+    """
+
+    def __init__(self, identical: Optional[Callable[[str], Iterable[str]]] = None):
+        self.identical = identical
+        self._purchases: _Events = {}
+        self._loss_sales: _Events = {}
+
+    # ===== Recording =====
+
+    @staticmethod
+    def _day(value) -> date:
+        return value.date() if isinstance(value, datetime) else value
+
+    def record_purchase(self, account: str, symbol: str, day, ref: str = ""):
+        """Record a buy"""
+        insort(self._purchases.setdefault((account, symbol), []), (self._day(day), ref))
+
+    def record_loss_sale(self, account: str, symbol: str, day, ref: str = ""):
+        """Record a sale that realized a loss"""
+        insort(self._loss_sales.setdefault((account, symbol), []), (self._day(day), ref))
+
+    def record_trade(self, trade: Trade):
+        """Record an executed buy"""
+        if trade.trade_type == "buy" and trade.status == "executed":
+            self.record_purchase(trade.portfolio_id, trade.symbol, trade.executed_at or trade.created_date, trade.id)
+
+    # ===== Queries =====
+
+    def _members(self, symbol: str) -> List[str]:
+        members = list(self.identical(symbol)) if self.identical else []
+        return members if symbol in members else [symbol] + members
+
+    def _window(self, events: _Events, account: str, symbol: str, start: date, end: date,
+                exclude_day: Optional[date] = None) -> List[Dict]:
+        found = []
+        for member in self._members(symbol):
+            series = events.get((account, member))
+            if not series:
+                continue
+            lo = bisect_left(series, (start, ""))
+            hi = bisect_right(series, (end, "\uffff"))
+            for day, ref in series[lo:hi]:
+                if member == symbol and day == exclude_day:
+                    continue
+                found.append({"symbol": member, "date": day.isoformat(), "ref": ref})
+        return found
+
+    def sale_conflicts(self, account: str, symbol: str, day, lot_purchase_date: Optional[date] = None) -> List[Dict]:
+        """
+        Purchases that would make a loss sale on this day a wash sale
+
+        Args:
+            account: Account (portfolio) ID
+            symbol: Symbol being sold
+            day: Sale date
+            lot_purchase_date: Purchase date of the lot being sold (ignored as a conflict)
+        """
+        day = self._day(day)
+        window = timedelta(days=WASH_SALE_DAYS)
+        return self._window(self._purchases, account, symbol, day - window, day + window, lot_purchase_date)
+
+    def purchase_conflicts(self, account: str, symbol: str, day) -> List[Dict]:
+        """Loss sales that a purchase on this day would turn into wash sales"""
+        day = self._day(day)
+        return self._window(self._loss_sales, account, symbol, day - timedelta(days=WASH_SALE_DAYS), day)
+
+# Export
+__all__ = ["WashSaleIndex"]
@@ -0,0 +1,94 @@
+"""
+Batch Trade Tests
+"""
+
+import asyncio
+import pytest
+import sys
+sys.path.insert(0, '..')
+
+from services.ibkr_client import IBKRClient
+from services.portfolio_service import PortfolioService
+
+class SlowOrderClient(IBKRClient):
+    """Client with order latency that rejects one symbol and tracks concurrency"""
+
+    def __init__(self, reject: str = "", latency: float = 0.02, **kwargs):
+        super().__init__(**kwargs)
+        self.reject = reject
+        self.latency = latency
+        self.quote_calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def _fetch_market_data(self, symbol: str):
+        self.quote_calls += 1
+        return await super()._fetch_market_data(symbol)
+
+    async def place_order(self, trade):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            if trade.symbol == self.reject:
+                raise RuntimeError("Order rejected")
+            return await super().place_order(trade)
+        finally:
+            self.in_flight -= 1
+
+class PartialQuoteClient(IBKRClient):
+    """Client whose bulk quotes leave out one symbol"""
+
+    def __init__(self, missing: str, **kwargs):
+        super().__init__(**kwargs)
+        self.missing = missing
+
+    async def get_market_data_bulk(self, symbols, max_age: float = 0.0):
+        quotes = await super().get_market_data_bulk(symbols, max_age=max_age)
+        quotes.pop(self.missing, None)
+        return quotes
+
+class TestBatchTrades:
+    """Test batched trade submission"""
+
+    @pytest.mark.asyncio
+    async def test_batch_prices_once_and_bounds_concurrency(self):
+        """One quote per symbol, bounded parallel orders, per-order failures"""
+        client = SlowOrderClient(reject="TSLA")
+        service = PortfolioService(client, max_concurrent_orders=4)
+        symbols = ["AAPL", "MSFT", "TSLA", "JPM", "GOOGL", "AAPL"] * 2
+        requests = [
+            {"portfolio_id": "portfolio_1", "symbol": s, "trade_type": "buy", "order_type": "market", "shares": 1}
+            for s in symbols
+        ]
+
+        result = await service.create_trades_batch(requests)
+
+        assert client.quote_calls == 5
+        assert client.peak_in_flight == 4
+        assert [r["trade"]["symbol"] for r in result["results"]] == symbols
+        assert result["failed_count"] == 2
+        failed = [r for r in result["results"] if not r["success"]]
+        assert all(r["trade"]["status"] == "failed" and r["error"] == "Order rejected" for r in failed)
+
+        history = await service.get_trade_history("user_1", limit=500)
+        assert len(history["trades"]) == len(symbols)
+
+    @pytest.mark.asyncio
+    async def test_batch_fails_trades_without_a_quote(self):
+        """A symbol missing from the bulk quotes fails only its own trade"""
+        client = PartialQuoteClient(missing="TSLA")
+        service = PortfolioService(client)
+        symbols = ["AAPL", "TSLA", "MSFT"]
+        requests = [
+            {"portfolio_id": "portfolio_1", "symbol": s, "trade_type": "buy", "order_type": "market", "shares": 1}
+            for s in symbols
+        ]
+
+        result = await service.create_trades_batch(requests)
+
+        assert [r["success"] for r in result["results"]] == [True, False, True]
+        failed = result["results"][1]
+        assert failed["trade"]["status"] == "failed"
+        assert failed["error"] == "No quote for TSLA"
+        assert service.orders.get_trade(failed["trade"]["id"]).status == "failed"
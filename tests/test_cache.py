@@ -0,0 +1,321 @@
+"""
+Tiered Cache Tests
+"""
+
+import asyncio
+import time
+import pytest
+import sys
+sys.path.insert(0, '..')
+
+from services.cache import TieredCache, CacheBackend, LocalLRUBackend, RedisBackend
+from services.ai_recommendations import AIRecommendationEngine
+
+class FakeRedisServer:
+    """Minimal RESP2/RESP3 server supporting HELLO, GET, SET (PX), DEL and PING"""
+
+    def __init__(self):
+        self.data = {}
+        self.commands = []
+        self.server = None
+        self.port = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _read_command(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        count = int(line[1:].strip())
+        args = []
+        for _ in range(count):
+            length = int((await reader.readline())[1:].strip())
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    async def _handle(self, reader, writer):
+        session = {"protocol": 2}
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if args is None:
+                    break
+                writer.write(self._execute(args, session))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _execute(self, args, session):
+        name = args[0].decode().upper()
+        self.commands.append(name)
+        if name == "HELLO":
+            session["protocol"] = int(args[1]) if len(args) > 1 else 2
+            return b"%%1\r\n$5\r\nproto\r\n:%d\r\n" % session["protocol"]
+        if name == "GET":
+            entry = self.data.get(args[1])
+            if entry is None or (entry[1] is not None and time.monotonic() >= entry[1]):
+                self.data.pop(args[1], None)
+                return b"_\r\n" if session["protocol"] == 3 else b"$-1\r\n"
+            return b"$%d\r\n%s\r\n" % (len(entry[0]), entry[0])
+        if name == "SET":
+            expires = None
+            options = [a.decode().upper() for a in args[3:]]
+            if "PX" in options:
+                expires = time.monotonic() + int(options[options.index("PX") + 1]) / 1000
+            self.data[args[1]] = (args[2], expires)
+            return b"+OK\r\n"
+        if name == "DEL":
+            removed = sum(self.data.pop(key, None) is not None for key in args[1:])
+            return b":%d\r\n" % removed
+        if name == "PING":
+            return b"+PONG\r\n"
+        # CLIENT SETINFO and other handshake commands
+        return b"+OK\r\n"
+
+class CountingLoader:
+    """Loader that counts calls and takes a little time"""
+
+    def __init__(self, latency: float = 0.01):
+        self.latency = latency
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return {"calls": self.calls}
+
+class FlakyRemote(CacheBackend):
+    """In-memory remote tier that can be switched off"""
+
+    def __init__(self):
+        self.data = {}
+        self.down = False
+
+    def _check(self):
+        if self.down:
+            raise ConnectionError("remote unavailable")
+
+    async def get(self, key):
+        self._check()
+        return self.data.get(key)
+
+    async def set(self, key, value, ttl):
+        self._check()
+        self.data[key] = value
+
+    async def delete(self, key):
+        self._check()
+        self.data.pop(key, None)
+
+class TestLocalLRUBackend:
+    """Test the in-process tier"""
+
+    def test_evicts_least_recently_used(self):
+        """Touched keys survive eviction"""
+        local = LocalLRUBackend(max_size=2)
+        local.set("a", {"value": 1}, 60)
+        local.set("b", {"value": 2}, 60)
+        local.get("a")
+        local.set("c", {"value": 3}, 60)
+
+        assert local.get("a") == {"value": 1}
+        assert local.get("b") is None
+        assert len(local) == 2
+
+    def test_expires_entries(self):
+        """Entries past their TTL are dropped"""
+        local = LocalLRUBackend()
+        local.set("a", {"value": 1}, 0.01)
+        time.sleep(0.02)
+
+        assert local.get("a") is None
+
+class TestTieredCache:
+    """Test cache-aside behaviour without a remote tier"""
+
+    @pytest.mark.asyncio
+    async def test_hits_after_first_load(self):
+        """Second lookup is served locally"""
+        cache = TieredCache()
+        loader = CountingLoader()
+
+        first = await cache.get_or_set("ns", "key", loader)
+        second = await cache.get_or_set("ns", "key", loader)
+
+        assert first == second == {"calls": 1}
+        assert loader.calls == 1
+        stats = cache.stats()
+        assert stats["local_hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_coalesce(self):
+        """A burst of misses runs the loader once"""
+        cache = TieredCache()
+        loader = CountingLoader(latency=0.05)
+
+        results = await asyncio.gather(*(cache.get_or_set("ns", "key", loader) for _ in range(50)))
+
+        assert loader.calls == 1
+        assert all(r == {"calls": 1} for r in results)
+        assert cache.stats()["coalesced"] == 49
+
+    @pytest.mark.asyncio
+    async def test_early_refresh_serves_stale_value(self):
+        """Entries near expiry are refreshed in the background once"""
+        cache = TieredCache(beta=1e9)
+        loader = CountingLoader()
+        await cache.get_or_set("ns", "key", loader, ttl=60)
+
+        # A huge beta makes every lookup an early refresh
+        results = await asyncio.gather(*(cache.get_or_set("ns", "key", loader, ttl=60) for _ in range(10)))
+        await asyncio.sleep(0.05)
+
+        assert all(r == {"calls": 1} for r in results)
+        assert loader.calls == 2
+        assert cache.stats()["early_refreshes"] == 1
+        assert await cache.get_or_set("ns", "key", loader, ttl=60) == {"calls": 2}
+
+    @pytest.mark.asyncio
+    async def test_invalidate(self):
+        """Invalidated keys are reloaded; other namespaces are untouched"""
+        cache = TieredCache()
+        loader = CountingLoader()
+        await cache.get_or_set("ns", "key", loader)
+        await cache.get_or_set("other", "key", loader)
+
+        await cache.invalidate("ns", "key")
+
+        assert await cache.get_or_set("ns", "key", loader) == {"calls": 3}
+        assert await cache.get_or_set("other", "key", loader) == {"calls": 2}
+
+    @pytest.mark.asyncio
+    async def test_invalidate_fences_inflight_load(self):
+        """A load that started before an invalidation is not stored"""
+        cache = TieredCache()
+        loader = CountingLoader(latency=0.05)
+
+        stale = asyncio.ensure_future(cache.get_or_set("ns", "key", loader))
+        await asyncio.sleep(0.01)
+        await cache.invalidate("ns", "key")
+
+        assert await stale == {"calls": 1}
+        assert await cache.get_or_set("ns", "key", loader) == {"calls": 2}
+        assert await cache.get_or_set("ns", "key", loader) == {"calls": 2}
+
+    @pytest.mark.asyncio
+    async def test_failed_background_refresh_is_logged(self, capsys):
+        """Early-refresh failures are reported and the current value still served"""
+        cache = TieredCache(beta=1e9)
+        await cache.get_or_set("ns", "key", CountingLoader(), ttl=60)
+
+        async def failing():
+            raise RuntimeError("backend down")
+
+        assert await cache.get_or_set("ns", "key", failing, ttl=60) == {"calls": 1}
+        await asyncio.sleep(0.01)
+
+        assert "backend down" in capsys.readouterr().out
+
+    @pytest.mark.asyncio
+    async def test_recommendations_invalidated_on_update(self):
+        """Status updates are visible through the cache"""
+        engine = AIRecommendationEngine(cache=TieredCache())
+        before = await engine.get_recommendations("user_1")
+        rec_id = before["recommendations"][0]["id"]
+
+        await engine.update_recommendation_status(rec_id, "dismissed")
+        after = await engine.get_recommendations("user_1")
+
+        assert after["active_count"] == before["active_count"] - 1
+
+class TestRemoteTierFailures:
+    """Test invalidation and reads while the remote tier misbehaves"""
+
+    @pytest.mark.asyncio
+    async def test_invalidation_replayed_after_outage(self):
+        """A delete missed during an outage reaches the remote tier once it is back"""
+        remote = FlakyRemote()
+        first = TieredCache(remote=remote, remote_retry_after=0.02)
+        second = TieredCache(remote=remote)
+        await first.get_or_set("ns", "key", CountingLoader(), ttl=60)
+
+        remote.down = True
+        await first.invalidate("ns", "key")
+        assert first.stats()["pending_remote_deletes"] == 1
+
+        remote.down = False
+        await asyncio.sleep(0.1)
+        assert first.stats()["pending_remote_deletes"] == 0
+        assert "wealthalloc:ns:key" not in remote.data
+        assert await second.get_or_set("ns", "key", CountingLoader(), ttl=60) == {"calls": 1}
+        assert second.stats()["misses"] == 1
+        await first.close()
+
+    @pytest.mark.asyncio
+    async def test_corrupt_remote_entry_is_a_miss(self):
+        """An undecodable remote value is reloaded instead of raising"""
+        remote = FlakyRemote()
+        remote.data["wealthalloc:ns:key"] = b"{not json"
+        cache = TieredCache(remote=remote)
+
+        assert await cache.get_or_set("ns", "key", CountingLoader(), ttl=60) == {"calls": 1}
+        assert cache.stats()["remote_decode_errors"] == 1
+        assert await TieredCache(remote=remote).get_or_set("ns", "key", CountingLoader(), ttl=60) == {"calls": 1}
+
+class TestRedisTier:
+    """Test the remote tier against a local RESP server"""
+
+    @pytest.mark.asyncio
+    async def test_shared_between_instances(self):
+        """A value loaded by one process is a remote hit for another"""
+        pytest.importorskip("redis")
+        server = FakeRedisServer()
+        await server.start()
+        try:
+            url = f"redis://127.0.0.1:{server.port}/0"
+            first = TieredCache(remote=RedisBackend.from_url(url))
+            second = TieredCache(remote=RedisBackend.from_url(url))
+            loader = CountingLoader()
+
+            await first.get_or_set("ns", "key", loader, ttl=60)
+            value = await second.get_or_set("ns", "key", loader, ttl=60)
+
+            assert value == {"calls": 1}
+            assert loader.calls == 1
+            assert second.stats()["remote_hits"] == 1
+            assert b"wealthalloc:ns:key" in server.data
+
+            await second.invalidate("ns", "key")
+            assert b"wealthalloc:ns:key" not in server.data
+
+            await first.close()
+            await second.close()
+        finally:
+            await server.stop()
+
+    @pytest.mark.asyncio
+    async def test_remote_failure_falls_back_to_local(self):
+        """An unreachable remote tier is bypassed, not fatal"""
+        pytest.importorskip("redis")
+        server = FakeRedisServer()
+        await server.start()
+        port = server.port
+        await server.stop()
+
+        cache = TieredCache(remote=RedisBackend.from_url(f"redis://127.0.0.1:{port}/0"))
+        loader = CountingLoader()
+
+        assert await cache.get_or_set("ns", "key", loader) == {"calls": 1}
+        assert await cache.get_or_set("ns", "key", loader) == {"calls": 1}
+        assert cache.stats()["remote_errors"] == 1
+        await cache.close()
@@ -0,0 +1,104 @@
+"""
+Encoder Inference Service Tests
+"""
+
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+sys.path.insert(0, '..')
+
+from models.lstm_autoencoder import LSTMAutoencoder
+from models.model_registry import ModelRegistry
+from services.ai_recommendations import AIRecommendationEngine
+from services.encoder_inference import EncoderInferenceService
+from services.historical_store import HistoricalBarStore
+
+SYMBOLS = ["AAPL", "MSFT", "TSLA", "NFLX"]
+
+@pytest.fixture(scope="module")
+def trained():
+    """A small autoencoder trained for one epoch, with its returns frame"""
+    values = np.random.default_rng(3).normal(scale=0.01, size=(60, len(SYMBOLS)))
+    model = LSTMAutoencoder(sequence_length=10, encoding_dim=4)
+    model.train(values, epochs=1, batch_size=16)
+    returns = pd.DataFrame(values, index=pd.bdate_range("2024-01-01", periods=60), columns=SYMBOLS)
+    return model, returns
+
+class TestEncoderInference:
+    """Test micro-batched scoring and caching"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_batch(self, trained):
+        """Scores for several dates come from one forward pass and match predict()"""
+        model, returns = trained
+        service = EncoderInferenceService(model, returns, batch_window=0.05)
+        dates = [d.date() for d in returns.index[-5:]]
+
+        results = await asyncio.gather(*(service.score_symbols(SYMBOLS, d) for d in dates))
+        assert service.batches_run == 1
+
+        normalized = ((returns.to_numpy() - model.returns_mean) / model.returns_std).astype(np.float32)
+        window = normalized[-10:][None]
+        expected = np.mean((window - model.autoencoder.predict(window, verbose=0)) ** 2, axis=1)[0]
+        errors = [results[-1][s]["reconstruction_error"] for s in SYMBOLS]
+        np.testing.assert_allclose(errors, expected, rtol=1e-4)
+
+        await service.score_symbols(["AAPL", "UNKNOWN"], dates[-1])
+        assert service.batches_run == 1
+        assert await service.score_symbols(SYMBOLS, returns.index[3].date()) == {}
+        assert (await service.embedding(dates[-1])).shape == (4,)
+
+    @pytest.mark.asyncio
+    async def test_results_delivered_despite_eviction(self, trained):
+        """Dates batched into a cache smaller than one batch still all get results"""
+        model, returns = trained
+        service = EncoderInferenceService(model, returns, batch_window=0.05, cache_size=1)
+        dates = [d.date() for d in returns.index[-6:]]
+
+        embeddings = await asyncio.gather(*(service.embedding(d) for d in dates))
+        scores = await asyncio.gather(*(service.score_symbols(SYMBOLS, d) for d in dates))
+
+        assert [e.shape for e in embeddings] == [(4,)] * 6
+        assert all(list(s) == SYMBOLS for s in scores)
+        assert len(service._cache) == len(SYMBOLS)
+        assert service.batches_run == 2
+
+    @pytest.mark.asyncio
+    async def test_portfolio_risk_flags_anomalies(self, trained):
+        """Holdings above the anomaly threshold are reported"""
+        model, returns = trained
+        engine = AIRecommendationEngine(inference=EncoderInferenceService(model, returns, anomaly_threshold=1e-6))
+
+        result = await engine.analyze_portfolio_risk([
+            {"symbol": "AAPL", "total_value": 1000.0},
+            {"symbol": "GOOG", "total_value": 500.0}
+        ])
+
+        assert result["anomaly_detected"]
+        assert [r["symbol"] for r in result["recommendations"]] == ["AAPL"]
+        assert result["risk_score"] == 100.0
+        assert (await AIRecommendationEngine().analyze_portfolio_risk([]))["risk_score"] == 55.0
+
+    @pytest.mark.asyncio
+    async def test_from_registry_scores_stored_bars(self, trained, tmp_path):
+        """A worker serves the latest saved model against the bar store"""
+        model, returns = trained
+        registry = ModelRegistry(str(tmp_path / "registry"))
+        bar_store = HistoricalBarStore(str(tmp_path / "bars"))
+        assert EncoderInferenceService.from_registry(registry, bar_store) is None
+
+        model.symbols = SYMBOLS
+        registry.save(model)
+        closes = 100 * np.cumprod(1 + returns.to_numpy(), axis=0)
+        for j, symbol in enumerate(SYMBOLS):
+            bar_store.append(symbol, pd.DataFrame({
+                "date": returns.index, "open": closes[:, j], "high": closes[:, j],
+                "low": closes[:, j], "close": closes[:, j], "volume": 1000.0
+            }))
+
+        service = EncoderInferenceService.from_registry(registry, bar_store)
+        scores = await service.score_symbols(SYMBOLS)
+        assert set(scores) == set(SYMBOLS)
+        assert service.dates[-1] == returns.index[-1]
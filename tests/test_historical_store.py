@@ -0,0 +1,73 @@
+"""
+Historical Bar Store Tests
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+from datetime import date, timedelta
+sys.path.insert(0, '..')
+
+from services.ibkr_client import IBKRClient
+from services.historical_store import HistoricalBarStore
+
+def make_bars(dates, start_price=100.0):
+    """Bars DataFrame with increasing close prices"""
+    close = start_price + np.arange(len(dates), dtype=float)
+    return pd.DataFrame({
+        "date": dates,
+        "open": close,
+        "high": close + 1,
+        "low": close - 1,
+        "close": close,
+        "volume": np.full(len(dates), 1000.0)
+    })
+
+class TestHistoricalBarStore:
+    """Test columnar history store"""
+
+    def test_append_only_adds_missing_days(self, tmp_path):
+        """Overlapping appends keep one row per day"""
+        store = HistoricalBarStore(str(tmp_path))
+        dates = pd.bdate_range("2024-01-01", periods=10)
+
+        assert store.append("AAPL", make_bars(dates[:6])) == 6
+        assert store.append("AAPL", make_bars(dates[3:], start_price=103.0)) == 4
+        assert store.append("AAPL", make_bars(dates)) == 0
+
+        frame = store.read_frame("AAPL")
+        assert len(frame) == 10
+        assert frame["close"].tolist() == [100.0 + i for i in range(10)]
+        assert store.last_date("AAPL") == dates[-1].date()
+
+    def test_load_aligned_range(self, tmp_path):
+        """Range queries align many symbols on common dates with NaN gaps"""
+        store = HistoricalBarStore(str(tmp_path))
+        dates = pd.bdate_range("2024-01-01", periods=10)
+        store.append("AAPL", make_bars(dates))
+        store.append("MSFT", make_bars(dates[5:]))
+
+        all_dates, values = store.load_aligned(
+            ["AAPL", "MSFT", "MISSING"], start=dates[3].date(), end=dates[7].date()
+        )
+
+        assert len(all_dates) == 5
+        assert values.shape == (5, 3)
+        assert values[:, 0].tolist() == [103.0, 104.0, 105.0, 106.0, 107.0]
+        assert np.isnan(values[:2, 1]).all() and values[2, 1] == 100.0
+        assert np.isnan(values[:, 2]).all()
+
+    @pytest.mark.asyncio
+    async def test_sync_fetches_incrementally(self, tmp_path):
+        """A second sync only requests the days since the last stored bar"""
+        store = HistoricalBarStore(str(tmp_path), IBKRClient())
+        first_end = date.today() - timedelta(days=14)
+
+        await store.sync(["AAPL"], end=first_end)
+        assert store.last_date("AAPL") <= first_end
+
+        appended = await store.sync(["AAPL"])
+        assert 0 < appended["AAPL"] <= 10
+        dates = store.read_bars("AAPL")["date"]
+        assert (np.diff(dates.astype("int64")) > 0).all()
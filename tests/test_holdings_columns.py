@@ -0,0 +1,91 @@
+"""
+Columnar Holdings Store Tests
+"""
+
+import pytest
+import sys
+sys.path.insert(0, '..')
+
+from models.entities import Holding, Portfolio
+from services.holdings_columns import ColumnarHoldings
+from services.portfolio_repository import PortfolioRepository
+from services.revaluation_engine import RevaluationEngine
+
+def make_holdings():
+    return [
+        Holding(id="h1", portfolio_id="p1", symbol="AAPL", shares=10, average_cost=100.0,
+                current_price=150.0, total_value=1500.0, sector="Technology"),
+        Holding(id="h2", portfolio_id="p1", symbol="JPM", shares=10, average_cost=50.0,
+                current_price=50.0, total_value=500.0, sector="Financial"),
+        Holding(id="h3", portfolio_id="p2", symbol="AAPL", shares=2, average_cost=100.0,
+                current_price=150.0, total_value=300.0, sector="Technology"),
+        Holding(id="h4", portfolio_id="p2", symbol="BND", shares=1, average_cost=100.0,
+                current_price=100.0, total_value=100.0, sector="", asset_class="bonds"),
+    ]
+
+class TestColumnarHoldings:
+    """Test vectorized aggregates"""
+
+    def test_allocation_matches_dict_loop(self):
+        """Per-sector sums equal the per-holding loop, in first-seen order"""
+        holdings = make_holdings()
+        store = ColumnarHoldings.from_holdings(holdings)
+
+        expected = {}
+        for h in holdings:
+            expected[h.sector or "Other"] = expected.get(h.sector or "Other", 0.0) + h.total_value
+
+        assert store.sector_allocation() == expected
+        assert list(store.sector_allocation()) == list(expected)
+        assert store.sector_allocation("p1") == {"Technology": 1500.0, "Financial": 500.0}
+        assert store.allocation("asset_class", "p2") == {"stocks": 300.0, "bonds": 100.0}
+
+    def test_totals_follow_marks(self):
+        """P&L totals follow marked prices"""
+        store = ColumnarHoldings.from_holdings(make_holdings())
+        assert store.totals("p1")["total_gain_loss"] == pytest.approx(500.0)
+
+        store.mark("h1", 200.0, 2000.0)
+        totals = store.totals("p1")
+        assert totals["total_value"] == pytest.approx(2500.0)
+        assert totals["total_gain_loss_percent"] == pytest.approx(100 * 1000.0 / 1500.0)
+
+    def test_rebalance_scan_across_portfolios(self):
+        """One batch scan flags portfolios drifting from target weights"""
+        store = ColumnarHoldings.from_holdings(make_holdings())
+        ids, labels, matrix = store.allocation_matrix()
+        assert ids == ["p1", "p2"]
+        assert matrix.shape == (2, len(labels))
+
+        drifts = store.rebalance_candidates({"Technology": 0.75, "Financial": 0.25}, threshold=0.05)
+        assert list(drifts) == ["p2"]
+        assert drifts["p2"] == pytest.approx(0.25)
+
+    def test_remove_keeps_remaining_rows(self):
+        """Removing a row moves the last row into its slot"""
+        store = ColumnarHoldings.from_holdings(make_holdings())
+        assert store.remove("h1")
+        assert not store.remove("h1")
+
+        assert len(store) == 3
+        assert store.sector_allocation("p1") == {"Financial": 500.0}
+        store.mark("h4", 120.0, 120.0)
+        assert store.allocation("asset_class", "p2") == {"stocks": 300.0, "bonds": 120.0}
+
+class TestRepositoryColumns:
+    """Test the repository-maintained columnar store"""
+
+    def test_columns_follow_writes_and_price_ticks(self):
+        """Adds, removals and revaluation keep the columns in step"""
+        repo = PortfolioRepository()
+        repo.add_portfolio(Portfolio(id="p1", user_id="u1"))
+        for holding in make_holdings()[:2]:
+            repo.add_holding(holding)
+        engine = RevaluationEngine(repo)
+        engine.revalue_all()
+
+        engine.update_price("AAPL", 200.0)
+        assert repo.columns.sector_allocation("p1") == {"Technology": 2000.0, "Financial": 500.0}
+
+        repo.remove_holding("h2")
+        assert repo.columns.sector_allocation("p1") == {"Technology": 2000.0}
@@ -0,0 +1,98 @@
+"""
+IBKR Client Tests
+"""
+
+import asyncio
+import pytest
+import sys
+sys.path.insert(0, '..')
+
+from services.ibkr_client import IBKRClient
+from services.quote_cache import QuoteCache
+
+class SlowGatewayClient(IBKRClient):
+    """Client with an injected gateway latency that tracks concurrency"""
+
+    def __init__(self, latency: float = 0.02, **kwargs):
+        super().__init__(**kwargs)
+        self.latency = latency
+        self.gateway_calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def _fetch_market_data(self, symbol: str):
+        self.gateway_calls += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            return await super()._fetch_market_data(symbol)
+        finally:
+            self.in_flight -= 1
+
+class TestMarketDataBulk:
+    """Test concurrent, coalesced market data requests"""
+
+    @pytest.mark.asyncio
+    async def test_bulk_respects_in_flight_limit(self):
+        """Bulk requests fan out but never exceed max_in_flight"""
+        client = SlowGatewayClient(max_in_flight=4)
+        symbols = [f"SYM{i}" for i in range(20)] + ["SYM0"]
+
+        data = await client.get_market_data_bulk(symbols)
+
+        assert list(data) == [f"SYM{i}" for i in range(20)]
+        assert data["SYM3"]["symbol"] == "SYM3"
+        assert client.gateway_calls == 20
+        assert client.peak_in_flight == 4
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_request(self):
+        """Same-symbol callers are coalesced into one gateway call"""
+        client = SlowGatewayClient()
+
+        quotes = await asyncio.gather(*(client.get_market_data("AAPL") for _ in range(10)))
+
+        assert client.gateway_calls == 1
+        assert all(q["symbol"] == "AAPL" for q in quotes)
+        # Each caller gets its own copy
+        quotes[0]["last"] = 0.0
+        assert quotes[1]["last"] != 0.0
+
+        # Completed requests are not reused
+        await client.get_market_data("AAPL")
+        assert client.gateway_calls == 2
+
+class TestQuoteCache:
+    """Test staleness-budgeted quote caching"""
+
+    @pytest.mark.asyncio
+    async def test_staleness_budget(self):
+        """Display reads reuse recent quotes, trade reads always go upstream"""
+        client = SlowGatewayClient(latency=0)
+
+        await client.get_market_data("AAPL", max_age=2.0)
+        await client.get_market_data("AAPL", max_age=2.0)
+        assert client.gateway_calls == 1
+
+        await client.get_market_data("AAPL", max_age=0.0)
+        assert client.gateway_calls == 2
+
+        stats = client.quote_cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["bypasses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_lru_eviction(self):
+        """Least recently used symbols are evicted past max_size"""
+        cache = QuoteCache(max_size=2)
+        cache.put("AAPL", {"last": 1.0})
+        cache.put("MSFT", {"last": 2.0})
+        assert cache.get("AAPL", max_age=60) == {"last": 1.0}
+
+        cache.put("TSLA", {"last": 3.0})
+
+        assert cache.get("MSFT", max_age=60) is None
+        assert cache.get("AAPL", max_age=60) is not None
+        assert cache.stats()["evictions"] == 1
@@ -0,0 +1,128 @@
+"""
+LSTM Autoencoder Tests
+"""
+
+import numpy as np
+import pytest
+import sys
+from datetime import date
+sys.path.insert(0, '..')
+
+from models.lstm_autoencoder import LSTMAutoencoder, window_dataset
+from models.model_registry import ModelRegistry
+import tensorflow as tf
+
+def loop_windows(values, sequence_length):
+    return np.array([values[i:i + sequence_length] for i in range(len(values) - sequence_length + 1)])
+
+class TestSequenceWindows:
+    """Test the tf.data window pipeline used for training"""
+
+    def test_window_dataset_batches_match_slices(self):
+        """Batches gathered from the buffer equal the sliced windows"""
+        values = np.random.default_rng(1).normal(size=(40, 3)).astype(np.float32)
+        dataset = window_dataset(tf.constant(values), 8, 5, 30, batch_size=7)
+
+        batches = [x.numpy() for x, y in dataset]
+        assert [len(b) for b in batches] == [7, 7, 7, 4]
+        np.testing.assert_array_equal(np.concatenate(batches), loop_windows(values, 8)[5:30])
+
+    def test_shuffled_dataset_yields_each_window_once(self):
+        """Shuffling reorders windows without dropping or repeating any"""
+        values = np.arange(60, dtype=np.float32).reshape(30, 2)
+        dataset = window_dataset(tf.constant(values), 5, 0, 26, batch_size=4, shuffle=True)
+
+        windows = np.concatenate([x.numpy() for x, y in dataset])
+        order = np.argsort(windows[:, 0, 0])
+        np.testing.assert_array_equal(windows[order], loop_windows(values, 5))
+        assert all(np.array_equal(x, y) for x, y in dataset.unbatch().take(3))
+
+class TestLSTMAutoencoder:
+    """Test training end to end on a small universe"""
+
+    def test_train_extracts_correlation_matrix(self):
+        """Training on windows yields a stock x stock correlation matrix"""
+        returns = np.random.default_rng(2).normal(scale=0.01, size=(80, 4))
+        model = LSTMAutoencoder(sequence_length=10, encoding_dim=4)
+
+        history = model.train(returns, epochs=1, batch_size=16)
+
+        assert "val_loss" in history.history
+        assert model.correlation_matrix.shape == (4, 4)
+        np.testing.assert_allclose(np.diag(model.correlation_matrix), 1.0, rtol=1e-5)
+
+    def test_update_folds_new_days_into_stats_and_replay_buffer(self):
+        """Running stats match the full history; the buffer keeps recent days"""
+        rng = np.random.default_rng(5)
+        history, new_days = rng.normal(scale=0.01, size=(40, 3)), rng.normal(scale=0.02, size=(2, 3))
+        model = LSTMAutoencoder(sequence_length=10, encoding_dim=4, replay_days=30)
+        model.train(history, epochs=1, batch_size=16)
+        weights = model.encoder.get_weights()[0].copy()
+
+        result = model.update(new_days, epochs=2)
+
+        full = np.concatenate([history, new_days])
+        np.testing.assert_allclose(model.returns_mean, full.mean(axis=0))
+        np.testing.assert_allclose(model.returns_std, full.std(axis=0))
+        assert model.returns_count == 42
+        np.testing.assert_array_equal(model.replay_buffer, full[-30:])
+        assert len(result.history["loss"]) == 2
+        assert not np.array_equal(model.encoder.get_weights()[0], weights)
+
+    def test_constant_column_normalizes_without_nan(self):
+        """A zero-variance stock is centred rather than divided by zero"""
+        returns = np.random.default_rng(7).normal(scale=0.01, size=(40, 3))
+        returns[:, 1] = 0.0
+        model = LSTMAutoencoder(sequence_length=10, encoding_dim=4)
+
+        history = model.train(returns, epochs=1, batch_size=16)
+
+        assert np.isfinite(history.history["loss"]).all()
+        assert np.isfinite(model.normalize(returns)).all()
+
+    def test_update_requires_a_trained_model(self):
+        """A fresh model cannot be warm-started, and a trained one needs new days"""
+        rng = np.random.default_rng(6)
+        model = LSTMAutoencoder(sequence_length=10, encoding_dim=4)
+
+        with pytest.raises(ValueError):
+            model.update(rng.normal(scale=0.01, size=(5, 3)), epochs=1)
+        with pytest.raises(ValueError):
+            model.train(rng.normal(scale=0.01, size=(10, 3)), epochs=1)
+
+        model.train(rng.normal(scale=0.01, size=(30, 3)), epochs=1, batch_size=16)
+        with pytest.raises(ValueError):
+            model.update(np.empty((0, 3)), epochs=1)
+        assert model.returns_count == 30
+
+class TestModelRegistry:
+    """Test versioned save/load"""
+
+    def test_load_restores_a_trained_model(self, tmp_path):
+        """A loaded version predicts like the saved model, with memory-mapped arrays"""
+        returns = np.random.default_rng(4).normal(scale=0.01, size=(60, 3))
+        model = LSTMAutoencoder(sequence_length=10, encoding_dim=4)
+        model.train(returns, epochs=1, batch_size=16)
+        model.symbols = ["AAPL", "MSFT", "TSLA"]
+        model.last_date = date(2024, 3, 28)
+        registry = ModelRegistry(str(tmp_path))
+
+        assert registry.latest_version("lstmae") is None
+        assert registry.save(model, metadata={"universe": "test"}) == 1
+        assert registry.save(model) == 2
+        assert registry.versions("lstmae") == [1, 2]
+
+        loaded = registry.load("lstmae")
+        window = loop_windows(returns.astype(np.float32), 10)[:2]
+        np.testing.assert_allclose(
+            loaded.autoencoder.predict(window, verbose=0), model.autoencoder.predict(window, verbose=0), rtol=1e-5
+        )
+        assert isinstance(loaded.correlation_matrix, np.memmap)
+        np.testing.assert_array_equal(loaded.correlation_matrix, model.correlation_matrix)
+        np.testing.assert_array_equal(loaded.returns_std, model.returns_std)
+        assert loaded.symbols == model.symbols and loaded.version == 2
+        assert loaded.returns_count == 60 and loaded.last_date == date(2024, 3, 28)
+        np.testing.assert_array_equal(loaded.replay_buffer, model.replay_buffer)
+        loaded.update(returns[-1:], epochs=1)
+        assert loaded.returns_count == 61
+        assert registry.manifest("lstmae", 1)["metadata"] == {"universe": "test"}
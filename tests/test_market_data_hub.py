@@ -0,0 +1,98 @@
+"""
+Market Data Hub Tests
+"""
+
+import asyncio
+import pytest
+import sys
+sys.path.insert(0, '..')
+
+from services.ibkr_client import IBKRClient
+from services.market_data_hub import MarketDataHub
+
+class CountingStreamClient(IBKRClient):
+    """Client that counts upstream stream subscriptions"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.streams_opened = 0
+
+    async def stream_market_data(self, symbol: str, interval: float = 1.0):
+        self.streams_opened += 1
+        async for quote in super().stream_market_data(symbol, interval=interval):
+            yield quote
+
+class EndingStreamClient(IBKRClient):
+    """Client whose upstream stream ends after one tick"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.streams_opened = 0
+
+    async def stream_market_data(self, symbol: str, interval: float = 1.0):
+        self.streams_opened += 1
+        yield await self.get_market_data(symbol)
+
+class TestMarketDataHub:
+    """Test subscription fan-out and reference counting"""
+
+    @pytest.mark.asyncio
+    async def test_one_upstream_feed_per_symbol(self):
+        """Many consumers of a symbol share one upstream stream"""
+        client = CountingStreamClient()
+        hub = MarketDataHub(client, tick_interval=0.01)
+
+        queues = [hub.subscribe("AAPL") for _ in range(5)]
+        ticks = await asyncio.gather(*(asyncio.wait_for(q.get(), 1.0) for q in queues))
+
+        assert client.streams_opened == 1
+        assert all(t["symbol"] == "AAPL" for t in ticks)
+        assert hub.subscriber_count("AAPL") == 5
+        await hub.close()
+
+    @pytest.mark.asyncio
+    async def test_last_unsubscribe_cancels_feed(self):
+        """Upstream subscription is dropped once nobody is watching"""
+        client = CountingStreamClient()
+        hub = MarketDataHub(client, tick_interval=0.01)
+
+        async def consume(n):
+            ticks = []
+            async for tick in hub.stream("MSFT"):
+                ticks.append(tick)
+                if len(ticks) == n:
+                    break
+            return ticks
+
+        await asyncio.gather(consume(2), consume(3))
+
+        assert hub.active_symbols == set()
+        assert hub.subscriber_count("MSFT") == 0
+        assert client.streams_opened == 1
+
+    @pytest.mark.asyncio
+    async def test_ended_feed_reconnects_after_delay(self):
+        """A stream that ends cleanly is reopened only after the reconnect delay"""
+        client = EndingStreamClient()
+        hub = MarketDataHub(client, reconnect_delay=0.05)
+
+        hub.subscribe("AAPL")
+        await asyncio.sleep(0.12)
+
+        assert 2 <= client.streams_opened <= 4
+        await hub.close()
+
+    @pytest.mark.asyncio
+    async def test_streams_capped_per_client(self):
+        """A client at its cap gets no further streams until one closes"""
+        hub = MarketDataHub(CountingStreamClient(), tick_interval=0.01, max_streams_per_client=1)
+
+        first = hub.stream("AAPL", client_id="user_1")
+        await asyncio.wait_for(first.__anext__(), 1.0)
+        assert not hub.stream_allowed("user_1")
+        assert [tick async for tick in hub.stream("MSFT", client_id="user_1")] == []
+        assert hub.stream_allowed("user_2")
+
+        await first.aclose()
+        assert hub.stream_allowed("user_1")
+        await hub.close()
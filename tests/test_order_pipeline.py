@@ -0,0 +1,145 @@
+"""
+Order Pipeline Tests
+"""
+
+import asyncio
+import pytest
+import sys
+sys.path.insert(0, '..')
+
+from models.entities import Trade
+from services.ibkr_client import IBKRClient
+from services.order_pipeline import OrderPipeline, OrderQueue
+from services.portfolio_repository import PortfolioRepository
+from services.portfolio_service import PortfolioService
+
+class GatedGatewayClient(IBKRClient):
+    """Client whose orders block until released and can be rejected"""
+
+    def __init__(self, reject: str = "", **kwargs):
+        super().__init__(**kwargs)
+        self.reject = reject
+        self.release = asyncio.Event()
+        self.orders = []
+
+    async def place_order(self, trade):
+        await self.release.wait()
+        if trade.symbol == self.reject:
+            raise RuntimeError("Insufficient buying power")
+        self.orders.append(trade.id)
+        return await super().place_order(trade)
+
+class TestOrderPipeline:
+    """Test queued order submission and status transitions"""
+
+    @pytest.mark.asyncio
+    async def test_trades_advance_from_pending(self):
+        """Submitted trades are pending until a worker places them"""
+        client = GatedGatewayClient(reject="TSLA")
+        pipeline = OrderPipeline(client, PortfolioRepository(), workers=2)
+        updates = []
+
+        async def record(trade):
+            updates.append((trade.id, trade.status))
+        pipeline.listeners.append(record)
+
+        good = await pipeline.submit(Trade(id="t1", portfolio_id="p1", symbol="AAPL", shares=1))
+        bad = await pipeline.submit(Trade(id="t2", portfolio_id="p1", symbol="TSLA", shares=1))
+        await asyncio.sleep(0.01)
+        assert good.status == "pending" and bad.status == "pending"
+
+        client.release.set()
+        outcomes = await pipeline.wait(["t1", "t2"])
+
+        assert good.status == "executed" and good.executed_at is not None
+        assert bad.status == "failed"
+        assert outcomes["t1"]["order_id"].startswith("IBKR_")
+        assert outcomes["t2"]["error"] == "Insufficient buying power"
+        assert updates == [("t1", "pending"), ("t2", "pending"), ("t1", "executed"), ("t2", "failed")]
+        await pipeline.stop()
+
+    @pytest.mark.asyncio
+    async def test_recover_requeues_pending_trades(self):
+        """Pending trades found in the repository are placed after restart"""
+        repo = PortfolioRepository()
+        repo.add_trade(Trade(id="t1", portfolio_id="p1", symbol="AAPL", status="pending"))
+        repo.add_trade(Trade(id="t2", portfolio_id="p1", symbol="MSFT", status="executed"))
+        client = GatedGatewayClient()
+        client.release.set()
+        pipeline = OrderPipeline(client, repo)
+
+        assert await pipeline.recover() == 1
+        await pipeline.wait(["t1"])
+
+        assert client.orders == ["t1"]
+        assert repo.trades["t1"].status == "executed"
+        await pipeline.stop()
+
+    @pytest.mark.asyncio
+    async def test_wait_times_out_and_stop_releases_waiters(self):
+        """wait() gives up after its timeout; stop() answers remaining waiters"""
+        client = GatedGatewayClient()
+        pipeline = OrderPipeline(client, PortfolioRepository(), workers=1)
+        trade = await pipeline.submit(Trade(id="t1", portfolio_id="p1", symbol="AAPL", shares=1))
+
+        assert await pipeline.wait(["t1"], timeout=0.01) == {}
+        waiter = asyncio.ensure_future(pipeline.wait(["t1"]))
+        await asyncio.sleep(0)
+        await pipeline.stop()
+
+        outcome = (await asyncio.wait_for(waiter, timeout=1.0))["t1"]
+        assert outcome["error"].startswith("Order pipeline stopped")
+        assert trade.status == "pending"
+
+    @pytest.mark.asyncio
+    async def test_listener_failure_is_not_an_order_error(self):
+        """A placed order whose update cannot be recorded still reports its order"""
+        client = GatedGatewayClient()
+        client.release.set()
+        pipeline = OrderPipeline(client, PortfolioRepository())
+
+        async def flaky_store(trade):
+            if trade.status == "executed":
+                raise ConnectionError("database unavailable")
+        pipeline.listeners.append(flaky_store)
+
+        trade = await pipeline.submit(Trade(id="t1", portfolio_id="p1", symbol="AAPL", shares=1))
+        outcome = (await pipeline.wait(["t1"]))["t1"]
+
+        assert trade.status == "executed"
+        assert outcome["order_id"].startswith("IBKR_")
+        assert outcome["error"] is None
+        assert outcome["listener_error"] == "database unavailable"
+        await pipeline.stop()
+
+    def test_order_queue_is_abstract(self):
+        """Queues must implement put, get and task_done"""
+        with pytest.raises(TypeError):
+            OrderQueue()
+
+class TestTradeEndpoints:
+    """Test the service's non-blocking trade path"""
+
+    @pytest.mark.asyncio
+    async def test_create_trade_returns_pending(self):
+        """create_trade does not wait for the broker"""
+        client = GatedGatewayClient()
+        service = PortfolioService(client)
+
+        result = await asyncio.wait_for(service.create_trade({
+            "portfolio_id": "portfolio_1",
+            "symbol": "AAPL",
+            "trade_type": "buy",
+            "order_type": "market",
+            "shares": 3
+        }), timeout=1.0)
+        trade_id = result["trade"]["id"]
+        assert result["trade"]["status"] == "pending"
+
+        client.release.set()
+        await service.orders.wait([trade_id])
+
+        status = await service.get_trade_status("user_1", trade_id)
+        assert status["trade"]["status"] == "executed"
+        assert "error" in await service.get_trade_status("someone_else", trade_id)
+        await service.orders.stop()
@@ -0,0 +1,115 @@
+"""
+Portfolio Repository Tests
+"""
+
+import json
+import pytest
+import sys
+from datetime import datetime, timedelta
+sys.path.insert(0, '..')
+
+from models.entities import Portfolio, Holding, Trade
+from services.ibkr_client import IBKRClient
+from services.portfolio_repository import PortfolioRepository
+from services.portfolio_service import PortfolioService
+
+class TestPortfolioRepository:
+    """Test secondary index maintenance"""
+
+    def test_user_and_portfolio_indexes(self):
+        """Lookups only return the owner's rows"""
+        repo = PortfolioRepository()
+        repo.add_portfolio(Portfolio(id="p1", user_id="u1"))
+        repo.add_portfolio(Portfolio(id="p2", user_id="u2"))
+        repo.add_holding(Holding(id="h1", portfolio_id="p1", symbol="AAPL"))
+        repo.add_holding(Holding(id="h2", portfolio_id="p2", symbol="MSFT"))
+        repo.add_trade(Trade(id="t1", portfolio_id="p1", symbol="AAPL"))
+
+        assert repo.get_user_portfolio("u1").id == "p1"
+        assert repo.get_user_portfolio("missing") is None
+        assert [h.id for h in repo.get_portfolio_holdings("p1")] == ["h1"]
+        assert [t.id for t in repo.get_portfolio_trades("p1")] == ["t1"]
+        assert repo.get_portfolio_trades("p2") == []
+
+    def test_reassign_and_remove(self):
+        """Replacing or removing rows keeps indexes consistent"""
+        repo = PortfolioRepository()
+        repo.add_portfolio(Portfolio(id="p1", user_id="u1"))
+        repo.add_portfolio(Portfolio(id="p2", user_id="u1"))
+        repo.add_holding(Holding(id="h1", portfolio_id="p1"))
+
+        # Move holding to another portfolio
+        repo.add_holding(Holding(id="h1", portfolio_id="p2"))
+        assert repo.get_portfolio_holdings("p1") == []
+        assert [h.id for h in repo.get_portfolio_holdings("p2")] == ["h1"]
+
+        repo.remove_portfolio("p2")
+        assert "h1" not in repo.holdings
+        assert [p.id for p in repo.get_user_portfolios("u1")] == ["p1"]
+
+    def test_trade_pages_follow_time_order(self):
+        """Keyset pages are newest first regardless of insertion order"""
+        repo = PortfolioRepository()
+        start = datetime(2024, 1, 1)
+        for i in [3, 0, 4, 1, 2, 5, 6]:
+            repo.add_trade(Trade(id=f"t{i}", portfolio_id="p1", created_date=start + timedelta(hours=i // 2)))
+
+        page, cursor = repo.get_trade_page("p1", limit=3)
+        assert [t.id for t in page] == ["t6", "t5", "t4"]
+        page, cursor = repo.get_trade_page("p1", limit=3, cursor=cursor)
+        assert [t.id for t in page] == ["t3", "t2", "t1"]
+        page, cursor = repo.get_trade_page("p1", limit=3, cursor=cursor)
+        assert [t.id for t in page] == ["t0"]
+        assert cursor is None
+
+        repo.remove_trade("t6")
+        assert [t.id for t in repo.get_trade_page("p1", limit=1)[0]] == ["t5"]
+
+class TestPortfolioServiceIndexes:
+    """Test PortfolioService reads and writes go through the indexes"""
+
+    @pytest.mark.asyncio
+    async def test_created_trade_appears_in_history(self):
+        """create_trade updates the portfolio -> trades index"""
+        service = PortfolioService(IBKRClient())
+        result = await service.create_trade({
+            "portfolio_id": "portfolio_1",
+            "symbol": "AAPL",
+            "trade_type": "buy",
+            "order_type": "market",
+            "shares": 10
+        })
+
+        history = await service.get_trade_history("user_1")
+        assert [t["id"] for t in history["trades"]] == [result["trade"]["id"]]
+
+        data = await service.get_portfolio_data("user_1")
+        assert len(data["holdings"]) == 5
+
+    @pytest.mark.asyncio
+    async def test_trade_history_cursor_and_export(self):
+        """Cursors walk the whole history; the NDJSON export matches it"""
+        service = PortfolioService(IBKRClient())
+        for shares in range(1, 6):
+            await service.create_trade({
+                "portfolio_id": "portfolio_1",
+                "symbol": "AAPL",
+                "trade_type": "buy",
+                "order_type": "market",
+                "shares": shares
+            })
+
+        seen, cursor = [], None
+        while True:
+            page = await service.get_trade_history("user_1", limit=2, cursor=cursor)
+            seen.extend(t["shares"] for t in page["trades"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert seen == [5, 4, 3, 2, 1]
+
+        chunks = [chunk async for chunk in service.stream_trade_history("user_1", page_size=2)]
+        lines = b"".join(chunks).splitlines()
+        assert [json.loads(line)["shares"] for line in lines] == seen
+
+        assert "error" in await service.get_trade_history("user_1", cursor="not-a-cursor")
@@ -0,0 +1,65 @@
+"""
+Response Cache Tests
+"""
+
+import pytest
+import sys
+sys.path.insert(0, '..')
+
+from fastapi.testclient import TestClient
+
+from services.response_cache import ResponseCache
+
+class TestResponseCache:
+    """Test per-user encoded response caching"""
+
+    def test_invalidation_and_version_guard(self):
+        """Invalidated users miss, and stale builds are not stored"""
+        cache = ResponseCache()
+        version = cache.version("u1")
+        cache.put("u1", "dashboard", b'{"a":1}', version)
+        assert cache.get("u1", "dashboard").body == b'{"a":1}'
+
+        cache.invalidate_user("u1")
+        assert cache.get("u1", "dashboard") is None
+
+        # Built before the invalidation -> not cached
+        cache.put("u1", "dashboard", b'{"a":0}', version)
+        assert cache.get("u1", "dashboard") is None
+
+    def test_etag_matching(self):
+        """If-None-Match handles lists, weak validators and wildcards"""
+        etag = ResponseCache.make_etag(b"body")
+        assert ResponseCache.etag_matches(f'"other", W/{etag}', etag)
+        assert ResponseCache.etag_matches("*", etag)
+        assert not ResponseCache.etag_matches(None, etag)
+        assert not ResponseCache.etag_matches('"other"', etag)
+
+class TestCachedEndpoints:
+    """Test ETag / 304 behaviour on the dashboard and portfolio endpoints"""
+
+    def test_conditional_requests_and_write_invalidation(self):
+        """Unchanged data returns 304; a trade invalidates the cached payload"""
+        import main
+
+        with TestClient(main.app) as client:
+            first = client.get("/api/v1/portfolio")
+            etag = first.headers["etag"]
+            assert first.status_code == 200
+
+            cached = client.get("/api/v1/portfolio", headers={"If-None-Match": etag})
+            assert cached.status_code == 304
+            assert main.portfolio_service.response_cache.hits >= 1
+
+            client.post("/api/v1/trade", json={
+                "portfolio_id": "portfolio_1",
+                "symbol": "AAPL",
+                "trade_type": "buy",
+                "order_type": "market",
+                "shares": 1
+            })
+
+            after_trade = client.get("/api/v1/portfolio", headers={"If-None-Match": etag})
+            assert after_trade.status_code == 200
+            assert after_trade.headers["etag"] != etag
+            assert after_trade.json()["portfolio"]["id"] == "portfolio_1"
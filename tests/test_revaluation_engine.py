@@ -0,0 +1,96 @@
+"""
+Revaluation Engine Tests
+"""
+
+import asyncio
+import pytest
+import sys
+sys.path.insert(0, '..')
+
+from models.entities import Portfolio, Holding
+from services.ibkr_client import IBKRClient
+from services.market_data_hub import MarketDataHub
+from services.portfolio_repository import PortfolioRepository
+from services.revaluation_engine import RevaluationEngine
+
+def build_engine():
+    """Two portfolios sharing AAPL"""
+    repo = PortfolioRepository()
+    repo.add_portfolio(Portfolio(id="p1", user_id="u1", cash_balance=1000.0))
+    repo.add_portfolio(Portfolio(id="p2", user_id="u2"))
+    repo.add_holding(Holding(id="h1", portfolio_id="p1", symbol="AAPL", shares=10, average_cost=100.0, current_price=100.0))
+    repo.add_holding(Holding(id="h2", portfolio_id="p1", symbol="MSFT", shares=5, average_cost=200.0, current_price=200.0))
+    repo.add_holding(Holding(id="h3", portfolio_id="p2", symbol="AAPL", shares=1, average_cost=50.0, current_price=100.0))
+
+    engine = RevaluationEngine(repo)
+    engine.revalue_all()
+    return repo, engine
+
+class TestRevaluationEngine:
+    """Test incremental mark-to-market"""
+
+    def test_aggregates_from_holdings(self):
+        """Portfolio totals are derived from holdings plus cash"""
+        repo, _ = build_engine()
+        p1 = repo.portfolios["p1"]
+
+        assert p1.total_value == pytest.approx(10 * 100 + 5 * 200 + 1000)
+        assert p1.total_gain_loss == pytest.approx(0.0)
+        assert repo.portfolios["p2"].total_gain_loss_percent == pytest.approx(100.0)
+
+    def test_price_tick_updates_only_affected(self):
+        """A tick revalues the symbol's holdings and their portfolios only"""
+        repo, engine = build_engine()
+        msft_updated = repo.holdings["h2"].updated_date
+
+        affected = engine.update_price("AAPL", 110.0)
+
+        assert sorted(affected) == ["p1", "p2"]
+        assert repo.holdings["h1"].total_value == pytest.approx(1100.0)
+        assert repo.holdings["h1"].total_gain_loss_percent == pytest.approx(10.0)
+        assert repo.holdings["h2"].updated_date == msft_updated
+        assert repo.portfolios["p1"].total_value == pytest.approx(1100 + 1000 + 1000)
+        assert repo.portfolios["p1"].total_gain_loss == pytest.approx(100.0)
+        assert repo.portfolios["p1"].total_gain_loss_percent == pytest.approx(5.0)
+
+        assert engine.update_price("TSLA", 250.0) == []
+
+    def test_incremental_matches_full_rebuild(self):
+        """Many ticks leave the same totals as a full recompute"""
+        repo, engine = build_engine()
+        for price in (101.0, 99.5, 120.25, 87.0):
+            engine.update_price("AAPL", price)
+            engine.update_price("MSFT", price * 2)
+        incremental = repo.portfolios["p1"].total_value
+
+        engine.revalue_all()
+        assert repo.portfolios["p1"].total_value == pytest.approx(incremental)
+
+    def test_first_tick_notifies_once(self):
+        """A tick that builds a portfolio's aggregates notifies it once"""
+        repo = PortfolioRepository()
+        repo.add_portfolio(Portfolio(id="p1", user_id="u1"))
+        repo.add_holding(Holding(id="h1", portfolio_id="p1", symbol="AAPL", shares=10, average_cost=100.0, current_price=100.0))
+        engine = RevaluationEngine(repo)
+        calls = []
+        engine.listeners.append(calls.append)
+
+        engine.update_price("AAPL", 110.0)
+
+        assert calls == [["p1"]]
+
+    @pytest.mark.asyncio
+    async def test_hub_ticks_revalue_held_symbols(self):
+        """Tracking held symbols applies streamed prices"""
+        repo, engine = build_engine()
+        hub = MarketDataHub(IBKRClient(), tick_interval=0.01)
+
+        assert engine.start_tracking(hub) == 2
+        assert engine.start_tracking(hub) == 0
+        await asyncio.sleep(0.05)
+
+        assert hub.active_symbols == {"AAPL", "MSFT"}
+        assert repo.holdings["h1"].current_price != 100.0
+        await engine.stop_tracking()
+        await hub.close()
+        assert hub.active_symbols == set()
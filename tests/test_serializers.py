@@ -0,0 +1,44 @@
+"""
+Entity Serializer Tests
+"""
+
+import json
+import pytest
+import sys
+from dataclasses import asdict
+from datetime import date, datetime
+sys.path.insert(0, '..')
+
+from models.entities import Holding, Trade, TaxHarvest, EducationalVideo, User
+from models.serializers import serialize, serialize_many, dumps
+
+class TestSerializers:
+    """Test precompiled entity serializers"""
+
+    @pytest.mark.parametrize("entity", [
+        Holding(symbol="AAPL", shares=10, sector="Technology"),
+        Trade(symbol="MSFT", executed_at=datetime(2024, 5, 1, 9, 30)),
+        TaxHarvest(symbol="TSLA", purchase_date=date(2024, 1, 15)),
+        EducationalVideo(title="Intro", tags=["basics"]),
+        User(email="demo@wealthalloc.com"),
+    ])
+    def test_matches_asdict_json(self, entity):
+        """Output equals asdict with datetimes rendered as ISO strings"""
+        expected = json.loads(json.dumps(asdict(entity), default=lambda v: v.isoformat()))
+        assert serialize(entity) == expected
+        assert json.loads(dumps(entity)) == expected
+
+    def test_serialize_many_and_optional_dates(self):
+        """None dates stay None and lists are copied"""
+        video = EducationalVideo(tags=["a"])
+        data = serialize_many([video, TaxHarvest()])
+
+        assert data[0]["tags"] == ["a"] and data[0]["tags"] is not video.tags
+        assert data[1]["purchase_date"] is None
+
+    def test_entities_are_slotted(self):
+        """Entities carry no per-instance __dict__"""
+        holding = Holding()
+        assert not hasattr(holding, "__dict__")
+        with pytest.raises(AttributeError):
+            holding.unknown_field = 1
@@ -0,0 +1,113 @@
+"""
+Similarity Engine Tests
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+sys.path.insert(0, '..')
+
+from models.similarity_engine import SimilarityEngine
+from models.similarity_index import SimilarityIndex
+
+def build_engine(n_assets=20, n_days=120, seed=0):
+    """Engine with random walks, some on shorter or shifted date ranges"""
+    rng = np.random.default_rng(seed)
+    engine = SimilarityEngine()
+    dates = pd.date_range("2024-01-01", periods=n_days, freq="D")
+    sectors = ["Technology", "Financial", None]
+
+    for i in range(n_assets):
+        idx = dates if i % 3 else dates[i % 7: n_days - 20 + i % 11]
+        prices = pd.Series(100 + np.cumsum(rng.normal(size=len(idx))), index=idx)
+        engine.add_asset_data(f"SYM{i}", prices, sector=sectors[i % 3], beta=rng.uniform(-0.5, 2.0))
+
+    return engine
+
+class TestBatchSimilarityMatrix:
+    """Test vectorized similarity matrix"""
+
+    def test_matches_scalar_path(self):
+        """Vectorized matrix equals the pairwise calculate_overall_similarity loop"""
+        engine = build_engine()
+        symbols = [f"SYM{i}" for i in range(20)] + ["UNKNOWN"]
+
+        vectorized = engine.batch_similarity_matrix(symbols)
+        scalar = engine.batch_similarity_matrix(symbols, vectorized=False)
+
+        assert list(vectorized.index) == symbols
+        np.testing.assert_allclose(vectorized.values, scalar.values, atol=1e-10)
+
+    def test_components_match_scalar_methods(self):
+        """Each component matrix matches its scalar calculate_* method"""
+        engine = build_engine(n_assets=6)
+        symbols = [f"SYM{i}" for i in range(6)]
+        components = engine.similarity_component_matrices(symbols)
+
+        assert components["returns"][0, 1] == pytest.approx(
+            engine.calculate_returns_correlation("SYM0", "SYM1"))
+        assert components["volatility"][2, 4] == pytest.approx(
+            engine.calculate_volatility_similarity("SYM2", "SYM4"))
+        assert components["beta"][1, 3] == pytest.approx(
+            engine.calculate_beta_similarity("SYM1", "SYM3"))
+        assert components["sector"][0, 3] == engine.calculate_sector_similarity("SYM0", "SYM3")
+
+class TestAssetFeatureCache:
+    """Test cached per-asset features"""
+
+    def test_cached_correlations_match_pandas(self):
+        """Cached unit-vector path equals a fresh pandas computation"""
+        engine = build_engine(n_assets=4)
+        prices1 = engine.price_data["SYM1"]
+        prices2 = engine.price_data["SYM2"]
+
+        assert engine.calculate_price_correlation("SYM1", "SYM2") == pytest.approx(prices1.corr(prices2))
+        assert engine.calculate_returns_correlation("SYM1", "SYM2") == pytest.approx(
+            prices1.pct_change().dropna().corr(prices2.pct_change().dropna()))
+
+    def test_replacing_asset_invalidates_only_its_features(self):
+        """add_asset_data recomputes features for the replaced symbol only"""
+        engine = build_engine(n_assets=4)
+        untouched = engine.asset_features["SYM1"]
+        old = engine.asset_features["SYM2"]
+
+        prices = engine.price_data["SYM2"] * 2 + np.arange(len(engine.price_data["SYM2"]))
+        engine.add_asset_data("SYM2", prices, sector="Technology")
+
+        assert engine.asset_features["SYM1"] is untouched
+        assert engine.asset_features["SYM2"] is not old
+        assert engine.asset_features["SYM2"].volatility == pytest.approx(prices.pct_change().dropna().std())
+
+class TestSimilarityIndex:
+    """Test top-k replacement index"""
+
+    def test_query_matches_linear_scan(self):
+        """Index top-k equals find_similar_assets on an aligned universe"""
+        engine = SimilarityEngine()
+        rng = np.random.default_rng(1)
+        dates = pd.date_range("2024-01-01", periods=200, freq="D")
+        base = np.cumsum(rng.normal(size=(4, 200)), axis=1)
+        for i in range(60):
+            prices = 100 + base[i % 4] + 0.5 * np.cumsum(rng.normal(size=200))
+            engine.add_asset_data(f"SYM{i}", pd.Series(prices, index=dates),
+                                  sector=f"S{i % 3}", beta=rng.uniform(0.5, 1.5))
+
+        index = SimilarityIndex(engine)
+        expected = engine.find_similar_assets("SYM0", list(engine.price_data), min_similarity=0.5, top_k=5)
+        actual = index.query("SYM0", top_k=5, min_similarity=0.5)
+
+        assert [r.symbol for r in actual] == [r.symbol for r in expected]
+        np.testing.assert_allclose(
+            [r.similarity_score for r in actual], [r.similarity_score for r in expected])
+        assert all(r.symbol != "SYM0" for r in actual)
+        assert index.query("UNKNOWN") == []
+
+    def test_rebuild_needed_after_new_data(self):
+        """Index reports stale once the engine receives new data"""
+        engine = build_engine(n_assets=4)
+        index = SimilarityIndex(engine)
+        assert index.is_current(engine)
+
+        engine.add_asset_data("NEW", engine.price_data["SYM1"], sector="Technology")
+        assert not index.is_current(engine)
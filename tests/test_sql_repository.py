@@ -0,0 +1,228 @@
+"""
+SQL Repository Tests (SQLite via aiosqlite)
+"""
+
+import pytest
+import pytest_asyncio
+import sys
+from datetime import datetime, timedelta
+sys.path.insert(0, '..')
+
+pytest.importorskip("aiosqlite")
+
+from database import make_engine
+from database.repository import SQLRepository
+from models.entities import Portfolio, Holding, Trade, EducationalVideo, User, TaxHarvest, AIRecommendation
+from services.ibkr_client import IBKRClient
+from services.portfolio_service import PortfolioService
+from services.tax_harvest_service import TaxHarvestService
+from services.ai_recommendations import AIRecommendationEngine
+from services.order_pipeline import OrderPipeline
+from services.portfolio_repository import PortfolioRepository
+
+class CountingOrderClient(IBKRClient):
+    """Client that records the trades it places"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.orders = []
+
+    async def place_order(self, trade):
+        self.orders.append(trade.id)
+        return await super().place_order(trade)
+
+@pytest_asyncio.fixture
+async def repository(tmp_path):
+    engine = make_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    repo = SQLRepository(engine)
+    await repo.create_tables()
+    yield repo
+    await engine.dispose()
+
+class TestSQLRepository:
+    """Test persistence and indexed lookups"""
+
+    @pytest.mark.asyncio
+    async def test_save_round_trips_entities(self, repository):
+        """Saved entities load back unchanged"""
+        user = User(id="u1", email="a@example.com", full_name="A")
+        video = EducationalVideo(title="Intro", description="d", tags=["basics", "tax"])
+        await repository.save_many([user, video])
+
+        assert await repository.get_user("u1") == user
+        loaded = await repository.get(EducationalVideo, video.id)
+        assert loaded.tags == ["basics", "tax"]
+        assert loaded.created_date == video.created_date
+
+    @pytest.mark.asyncio
+    async def test_save_updates_in_place(self, repository):
+        """Saving an existing id updates the row"""
+        portfolio = Portfolio(id="p1", user_id="u1", name="Main")
+        await repository.save(portfolio)
+        portfolio.cash_balance = 250.0
+        await repository.save(portfolio)
+
+        portfolios = await repository.get_user_portfolios("u1")
+        assert len(portfolios) == 1
+        assert portfolios[0].cash_balance == 250.0
+
+    @pytest.mark.asyncio
+    async def test_indexed_lookups(self, repository):
+        """Holdings are found by portfolio and by symbol"""
+        await repository.save_many([
+            Holding(id="h1", portfolio_id="p1", symbol="AAPL", shares=1, average_cost=1),
+            Holding(id="h2", portfolio_id="p1", symbol="MSFT", shares=1, average_cost=1),
+            Holding(id="h3", portfolio_id="p2", symbol="AAPL", shares=1, average_cost=1),
+        ])
+
+        assert [h.id for h in await repository.get_portfolio_holdings("p1")] == ["h1", "h2"]
+        assert {h.id for h in await repository.get_symbol_holdings("AAPL")} == {"h1", "h3"}
+        assert await repository.delete(Holding, "h1")
+        assert [h.id for h in await repository.get_symbol_holdings("AAPL")] == ["h3"]
+
+    @pytest.mark.asyncio
+    async def test_trade_keyset_pagination(self, repository):
+        """Pages walk trades newest first without gaps or repeats"""
+        start = datetime(2024, 1, 1)
+        trades = [
+            # Pairs share a timestamp so the id tie-breaker is exercised
+            Trade(id=f"t{i:03d}", portfolio_id="p1", symbol="AAPL", shares=1,
+                  created_date=start + timedelta(minutes=i // 2))
+            for i in range(25)
+        ]
+        await repository.save_many(trades + [Trade(portfolio_id="p2", symbol="X", shares=1)])
+
+        seen, cursor = [], None
+        while True:
+            page, cursor = await repository.get_trade_page("p1", limit=10, cursor=cursor)
+            seen.extend(t.id for t in page)
+            if cursor is None:
+                break
+
+        expected = [t.id for t in sorted(trades, key=lambda t: (t.created_date, t.id), reverse=True)]
+        assert seen == expected
+
+    @pytest.mark.asyncio
+    async def test_portfolio_service_writes_through(self, repository):
+        """Trades and profile updates reach the store"""
+        service = PortfolioService(IBKRClient())
+        await service.attach_store(repository)
+
+        result = await service.create_trade({
+            "portfolio_id": "portfolio_1",
+            "symbol": "AAPL",
+            "trade_type": "buy",
+            "order_type": "market",
+            "shares": 2
+        })
+        await service.update_user_profile("user_1", {"phone": "555-0100"})
+
+        page, _ = await repository.get_trade_page("portfolio_1")
+        assert [t.id for t in page] == [result["trade"]["id"]]
+        assert (await repository.get_user("user_1")).phone == "555-0100"
+        assert len(await repository.get_portfolio_holdings("portfolio_1")) == 5
+
+    @pytest.mark.asyncio
+    async def test_workers_start_from_the_store(self, repository):
+        """A worker attaching later serves the rows another worker wrote"""
+        first = PortfolioService(IBKRClient())
+        await first.attach_store(repository)
+        result = await first.create_trade({
+            "portfolio_id": "portfolio_1",
+            "symbol": "AAPL",
+            "trade_type": "buy",
+            "order_type": "market",
+            "shares": 2
+        })
+        await first.update_user_profile("user_1", {"phone": "555-0100"})
+
+        second = PortfolioService(IBKRClient())
+        await second.attach_store(repository)
+
+        assert result["trade"]["id"] in second.trades
+        assert second.users["user_1"].phone == "555-0100"
+        assert set(second.holdings) == set(first.holdings)
+        assert len(await repository.all(Holding)) == 5
+
+        for engine in (AIRecommendationEngine(), AIRecommendationEngine()):
+            await engine.attach_store(repository)
+        assert len(await repository.all(AIRecommendation)) == 4
+
+    @pytest.mark.asyncio
+    async def test_harvests_shared_across_workers(self, repository):
+        """Workers see the same harvest ids and a harvest executes once"""
+        first, second = TaxHarvestService(IBKRClient()), TaxHarvestService(IBKRClient())
+        await first.attach_store(repository)
+        await second.attach_store(repository)
+        assert set(first.tax_harvests) == set(second.tax_harvests)
+
+        harvest_id = next(iter(first.tax_harvests))
+        assert (await first.execute_tax_harvest(harvest_id))["success"]
+        assert (await second.execute_tax_harvest(harvest_id))["error"] == "Tax harvest already executed"
+
+        harvests = await repository.all(TaxHarvest)
+        assert len(harvests) == 2
+        assert [h.status for h in harvests if h.id == harvest_id] == ["executed"]
+
+    @pytest.mark.asyncio
+    async def test_pending_trades_recovered_once_from_store(self, repository):
+        """Workers recovering from the store place each pending order once"""
+        await repository.save_many([
+            Trade(id="t1", portfolio_id="p1", symbol="AAPL", shares=1, status="pending"),
+            Trade(id="t2", portfolio_id="p1", symbol="MSFT", shares=1, status="executed")
+        ])
+        client = CountingOrderClient()
+        pipelines = [OrderPipeline(client, PortfolioRepository(), store=repository) for _ in range(2)]
+        for pipeline in pipelines:
+            pipeline.listeners.append(repository.save)
+
+        assert [await p.recover() for p in pipelines] == [1, 1]
+        for pipeline in pipelines:
+            await pipeline.wait(["t1"])
+            await pipeline.stop()
+
+        assert client.orders == ["t1"]
+        assert len(await repository.get_pending_trades()) == 0
+
+    @pytest.mark.asyncio
+    async def test_views_read_through_the_store(self, repository):
+        """Profile, portfolio and history views pick up other workers' writes"""
+        first, second = PortfolioService(IBKRClient()), PortfolioService(IBKRClient())
+        await first.attach_store(repository)
+        await second.attach_store(repository)
+        before = await second.get_portfolio_data("user_1")
+
+        await first.update_user_profile("user_1", {"phone": "555-0100"})
+        await repository.save(Holding(
+            id="h_new", portfolio_id="portfolio_1", symbol="NVDA", shares=10,
+            average_cost=100.0, current_price=120.0, total_value=1200.0, sector="Technology"
+        ))
+        trade = (await first.create_trade({
+            "portfolio_id": "portfolio_1", "symbol": "AAPL", "trade_type": "buy",
+            "order_type": "market", "shares": 1
+        }))["trade"]
+
+        after = await second.get_portfolio_data("user_1")
+        assert (await second.get_user_profile("user_1"))["phone"] == "555-0100"
+        assert "NVDA" in [h["symbol"] for h in after["holdings"]]
+        assert after["portfolio"]["total_value"] == pytest.approx(before["portfolio"]["total_value"] + 1200.0)
+        assert trade["id"] in [t["id"] for t in (await second.get_trade_history("user_1"))["trades"]]
+        await first.orders.stop()
+
+    @pytest.mark.asyncio
+    async def test_trade_status_read_from_store(self, repository):
+        """A trade placed by another worker reports its stored status"""
+        first, second = PortfolioService(IBKRClient()), PortfolioService(IBKRClient())
+        await first.attach_store(repository)
+        await second.attach_store(repository)
+
+        trade_id = (await first.create_trade({
+            "portfolio_id": "portfolio_1", "symbol": "AAPL", "trade_type": "buy",
+            "order_type": "market", "shares": 1
+        }))["trade"]["id"]
+        await first.orders.wait([trade_id])
+
+        status = await second.get_trade_status("user_1", trade_id)
+        assert status["trade"]["status"] == "executed"
+        assert "error" in await second.get_trade_status("someone_else", trade_id)
+        await first.orders.stop()
@@ -0,0 +1,155 @@
+"""
+Tax Harvest Service Tests
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import sys
+from datetime import date, timedelta
+sys.path.insert(0, '..')
+
+from models.entities import TaxHarvest
+from services.harvest_book import HarvestBook
+from services.historical_store import HistoricalBarStore
+from services.ibkr_client import IBKRClient
+from services.harvest_scanner import HarvestScanner, TaxLots
+from services.portfolio_service import PortfolioService
+from services.tax_harvest_service import TaxHarvestService
+
+class TestReplacementSecurities:
+    """Test replacement-security search"""
+
+    @pytest.mark.asyncio
+    async def test_replacements_come_from_similarity_index(self):
+        """Replacements are real indexed symbols above the threshold"""
+        service = TaxHarvestService(IBKRClient())
+        rng = np.random.default_rng(0)
+        dates = pd.date_range("2024-01-01", periods=120, freq="D")
+        base = 100 + np.cumsum(rng.normal(size=120))
+
+        service.similarity_engine.add_asset_data("TSLA", pd.Series(base, index=dates), "Automotive", 1.8)
+        service.similarity_engine.add_asset_data("RIVN", pd.Series(base * 0.3 + 1, index=dates), "Automotive", 1.7)
+        service.similarity_engine.add_asset_data(
+            "KO", pd.Series(50 + np.cumsum(rng.normal(size=120)), index=dates), "Consumer", 0.6)
+
+        replacements = await service._find_replacement_securities("TSLA")
+
+        assert [r["symbol"] for r in replacements] == ["RIVN"]
+        assert replacements[0]["similarity_score"] >= 0.7
+        assert "Same sector" in replacements[0]["reason"]
+
+    @pytest.mark.asyncio
+    async def test_asset_data_loads_from_bar_store(self, tmp_path):
+        """Stored closes feed the index; without them there are no suggestions"""
+        service = TaxHarvestService(IBKRClient())
+        store = HistoricalBarStore(str(tmp_path))
+        rng = np.random.default_rng(1)
+        dates = pd.bdate_range("2024-01-01", periods=120)
+        base = 100 + np.cumsum(rng.normal(size=120))
+        for symbol, closes in (("TSLA", base), ("RIVN", base * 0.3 + 1)):
+            store.append(symbol, pd.DataFrame({
+                "date": dates, "open": closes, "high": closes, "low": closes, "close": closes, "volume": 1.0
+            }))
+
+        assert [r["symbol"] for r in await service._find_replacement_securities("TSLA")] == []
+        assert service.load_asset_data(store) == 2
+        assert [r["symbol"] for r in await service._find_replacement_securities("TSLA")] == ["RIVN"]
+
+class TestHarvestScanner:
+    """Test the vectorized opportunity scan"""
+
+    def test_scan_matches_per_lot_arithmetic(self):
+        """Vectorized losses match a scalar loop over random lots"""
+        rng = np.random.default_rng(1)
+        n = 2000
+        symbols = [f"S{i}" for i in rng.integers(0, 50, n)]
+        portfolios = [f"p{i}" for i in rng.integers(0, 100, n)]
+        shares = rng.uniform(1, 100, n)
+        cost = rng.uniform(10, 200, n)
+        as_of = date(2024, 6, 1)
+        purchased = [as_of - timedelta(days=int(d)) for d in rng.integers(60, 900, n)]
+        prices = {f"S{i}": float(rng.uniform(10, 200)) for i in range(50)}
+
+        scanner = HarvestScanner(tax_rate=0.25, min_loss=500.0)
+        harvests = scanner.scan(TaxLots(portfolios, symbols, shares, cost, purchased), prices, as_of)
+
+        expected = [
+            i for i in range(n)
+            if (cost[i] - prices[symbols[i]]) * shares[i] >= 500.0
+        ]
+        assert len(harvests) == len(expected)
+        for harvest, i in zip(harvests, expected):
+            assert harvest.symbol == symbols[i] and harvest.portfolio_id == portfolios[i]
+            assert harvest.loss_amount == pytest.approx((cost[i] - prices[symbols[i]]) * shares[i])
+            assert harvest.tax_savings == pytest.approx(harvest.loss_amount * 0.25)
+            assert harvest.wash_sale_date == as_of + timedelta(days=30)
+
+    def test_recent_purchase_blocks_wash_sale(self):
+        """A lot is skipped if another lot of the symbol was bought in the last 30 days"""
+        as_of = date(2024, 6, 1)
+        lots = TaxLots(
+            ["p1", "p1", "p2", "p3"],
+            ["TSLA", "TSLA", "TSLA", "NFLX"],
+            [100, 4, 100, 100],
+            [300.0, 300.0, 300.0, 300.0],
+            [date(2023, 1, 1), as_of - timedelta(days=10), date(2023, 1, 1), date(2023, 1, 1)]
+        )
+
+        harvests = HarvestScanner(min_loss=500.0).scan(lots, {"TSLA": 200.0}, as_of)
+
+        # p1's old lot is blocked by its recent buy; the recent lot's own loss is below threshold;
+        # NFLX has no price
+        assert [(h.portfolio_id, h.shares) for h in harvests] == [("p2", 100.0)]
+
+    @pytest.mark.asyncio
+    async def test_service_scans_shared_holdings(self):
+        """The service scans PortfolioService holdings and refreshes existing records"""
+        portfolio_service = PortfolioService(IBKRClient())
+        service = TaxHarvestService(IBKRClient(), repository=portfolio_service.repository)
+
+        found = await service.identify_opportunities("portfolio_1")
+        # Mock quotes are 150.02: GOOGL, MSFT and TSLA are below cost
+        assert sorted(h.symbol for h in found) == ["GOOGL", "MSFT", "TSLA"]
+
+        again = await service.scan_all_portfolios()
+        assert {h.id for h in again} == {h.id for h in found}
+
+class TestHarvestViews:
+    """Test per-user harvest views and running totals"""
+
+    @pytest.mark.asyncio
+    async def test_views_are_scoped_to_the_users_portfolios(self):
+        """Only the user's portfolios are listed; totals follow status changes"""
+        portfolio_service = PortfolioService(IBKRClient())
+        service = TaxHarvestService(IBKRClient(), repository=portfolio_service.repository)
+        service.book.add(TaxHarvest(portfolio_id="portfolio_other", symbol="AMD", loss_amount=800.0, tax_savings=200.0))
+
+        data = await service.get_tax_harvesting_data("user_1")
+        demo = [h for h in service.tax_harvests.values() if h.portfolio_id == "portfolio_1"]
+        assert {h["symbol"] for h in data["tax_harvests"]} == {"TSLA", "NFLX"}
+        assert data["total_potential_savings"] == pytest.approx(sum(h.tax_savings for h in demo))
+        assert data["current_year_harvested"] == 0.0
+        assert (await service.get_tax_harvesting_data("someone_else"))["tax_harvests"] == []
+
+        nflx = next(h for h in demo if h.symbol == "NFLX")
+        assert (await service.execute_tax_harvest(nflx.id))["success"]
+
+        data = await service.get_tax_harvesting_data("user_1")
+        assert data["current_year_harvested"] == pytest.approx(nflx.loss_amount)
+        assert data["total_potential_savings"] == pytest.approx(sum(h.tax_savings for h in demo if h is not nflx))
+        executed = await service.get_tax_harvesting_data("user_1", status="executed")
+        assert [h["id"] for h in executed["tax_harvests"]] == [nflx.id]
+
+    def test_replacing_a_harvest_adjusts_totals(self):
+        """Re-adding a harvest replaces its previous contribution"""
+        book = HarvestBook()
+        book.add(TaxHarvest(id="h1", portfolio_id="p1", tax_savings=100.0))
+        book.add(TaxHarvest(id="h1", portfolio_id="p1", tax_savings=150.0))
+        book.add(TaxHarvest(id="h2", portfolio_id="p2", tax_savings=50.0))
+
+        assert book.potential_savings(["p1"]) == 150.0
+        book.set_status("h1", "expired")
+        assert book.potential_savings(["p1", "p2"]) == 50.0
+        assert book.get_portfolio_harvests("p1", "identified") == []
+        assert [h.id for h in book.get_portfolio_harvests("p1", "expired")] == ["h1"]
@@ -0,0 +1,117 @@
+"""
+Training Driver Tests
+"""
+
+import json
+import numpy as np
+import os
+import pandas as pd
+import pytest
+import sys
+sys.path.insert(0, '..')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from models.model_registry import ModelRegistry
+from services.historical_store import HistoricalBarStore
+from train_lstmae import refresh_model, train_universe, train_universes
+
+def make_bars(dates, seed):
+    """Bars DataFrame with a random walk of closes"""
+    close = 100.0 * np.cumprod(1 + np.random.default_rng(seed).normal(scale=0.01, size=len(dates)))
+    return pd.DataFrame({
+        "date": dates,
+        "open": close,
+        "high": close,
+        "low": close,
+        "close": close,
+        "volume": np.full(len(dates), 1000.0)
+    })
+
+class TestTrainUniverses:
+    """Test parallel training from a manifest"""
+
+    def test_two_universes_train_in_parallel(self, tmp_path):
+        """Each universe gets a registry version and a line in the timing report"""
+        manifest_path = tmp_path / "universes.json"
+        manifest_path.write_text(json.dumps({
+            "defaults": {"sequence_length": 10, "encoding_dim": 4, "epochs": 1, "batch_size": 16},
+            "universes": [
+                {"name": "small", "n_stocks": 3, "n_days": 50},
+                {"name": "wide", "n_stocks": 4, "n_days": 60, "seed": 1}
+            ]
+        }))
+        registry_dir = str(tmp_path / "registry")
+
+        train_universes(str(manifest_path), registry_dir, workers=2)
+
+        registry = ModelRegistry(registry_dir)
+        assert registry.versions("small") == [1]
+        assert registry.versions("wide") == [1]
+        assert registry.manifest("wide")["n_features"] == 4
+
+        with open(os.path.join(registry_dir, "training_report.json")) as f:
+            report = json.load(f)
+        assert report["workers"] == 2
+        assert {"wall_seconds", "intra_op_threads", "inter_op_threads"} <= set(report)
+        assert [u["name"] for u in report["universes"]] == ["small", "wide"]
+        for universe in report["universes"]:
+            assert "error" not in universe
+            assert universe["version"] == 1 and universe["epochs"] == 1
+            assert universe["train_seconds"] > 0 and universe["windows_per_second"] > 0
+            assert {"n_stocks", "n_days", "final_loss", "pid"} <= set(universe)
+
+class TestTrainUniverse:
+    """Test training one universe from the bar store"""
+
+    def test_symbols_without_bars_are_dropped(self, tmp_path, monkeypatch):
+        """Only symbols with stored history become model columns"""
+        monkeypatch.setenv("HISTORICAL_DATA_DIR", str(tmp_path / "bars"))
+        store = HistoricalBarStore(str(tmp_path / "bars"))
+        dates = pd.bdate_range("2024-01-01", periods=30)
+        store.append("AAPL", make_bars(dates, seed=0))
+        store.append("MSFT", make_bars(dates, seed=1))
+        registry_dir = str(tmp_path / "registry")
+        universe = {"name": "tech", "symbols": ["AAPL", "DELISTED", "MSFT"],
+                    "sequence_length": 10, "encoding_dim": 4, "epochs": 1, "batch_size": 16}
+
+        result = train_universe(universe, registry_dir)
+
+        assert result["n_stocks"] == 2 and np.isfinite(result["final_loss"])
+        manifest = ModelRegistry(registry_dir).manifest("tech")
+        assert manifest["symbols"] == ["AAPL", "MSFT"] and manifest["n_features"] == 2
+
+        with pytest.raises(ValueError):
+            train_universe({**universe, "symbols": ["DELISTED"]}, registry_dir)
+
+class TestRefreshModel:
+    """Test nightly warm-start refresh from the bar store"""
+
+    def test_refresh_folds_in_only_days_after_last_date(self, tmp_path, monkeypatch):
+        """Each stored day is counted once; a refresh with no new bars is rejected"""
+        monkeypatch.setenv("HISTORICAL_DATA_DIR", str(tmp_path / "bars"))
+        store = HistoricalBarStore(str(tmp_path / "bars"))
+        dates = pd.bdate_range("2024-01-01", periods=45)
+        for i, symbol in enumerate(["AAPL", "MSFT", "NVDA"]):
+            store.append(symbol, make_bars(dates[:40], seed=i))
+        registry_dir = str(tmp_path / "registry")
+        universe = {"name": "tech", "symbols": ["AAPL", "MSFT", "NVDA"],
+                    "sequence_length": 10, "encoding_dim": 4, "epochs": 1, "batch_size": 16}
+
+        train_universe(universe, registry_dir)
+        registry = ModelRegistry(registry_dir)
+        assert registry.manifest("tech")["last_date"] == "2024-02-23"
+        assert registry.manifest("tech")["returns_count"] == 39
+
+        with pytest.raises(ValueError):
+            refresh_model(registry_dir, "tech", epochs=1)
+
+        for i, symbol in enumerate(["AAPL", "MSFT", "NVDA"]):
+            store.append(symbol, make_bars(dates, seed=i))
+        assert refresh_model(registry_dir, "tech", epochs=1) == 2
+        manifest = registry.manifest("tech")
+        assert manifest["returns_count"] == 44 and manifest["last_date"] == "2024-03-01"
+        assert manifest["metadata"]["refreshed_from"] == 1
+
+        with pytest.raises(ValueError):
+            refresh_model(registry_dir, "tech", epochs=1)
+        assert registry.versions("tech") == [1, 2]
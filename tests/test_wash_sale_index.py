@@ -0,0 +1,80 @@
+"""
+Wash-Sale Index Tests
+"""
+
+import pytest
+import sys
+from datetime import date, timedelta
+sys.path.insert(0, '..')
+
+from services.ibkr_client import IBKRClient
+from services.portfolio_service import PortfolioService
+from services.tax_harvest_service import TaxHarvestService
+from services.wash_sale_index import WashSaleIndex
+
+class TestWashSaleIndex:
+    """Test ±30-day conflict windows"""
+
+    def test_sale_window_is_inclusive_30_days(self):
+        """Purchases 30 days either side conflict; 31 days do not"""
+        index = WashSaleIndex()
+        sale = date(2024, 6, 1)
+        index.record_purchase("p1", "TSLA", sale - timedelta(days=31), "old")
+        index.record_purchase("p1", "TSLA", sale - timedelta(days=30), "edge")
+        index.record_purchase("p1", "TSLA", sale + timedelta(days=31), "late")
+        index.record_purchase("p2", "TSLA", sale, "other_account")
+
+        assert [c["ref"] for c in index.sale_conflicts("p1", "TSLA", sale)] == ["edge"]
+        # The lot being sold is not its own conflict
+        assert index.sale_conflicts("p1", "TSLA", sale, lot_purchase_date=sale - timedelta(days=30)) == []
+
+    def test_purchase_checks_recent_loss_sales_of_identical_securities(self):
+        """Buying an identical security after a loss sale conflicts"""
+        index = WashSaleIndex(identical=lambda s: {"SPY": ["SPY", "IVV"], "IVV": ["IVV", "SPY"]}.get(s, [s]))
+        index.record_loss_sale("p1", "SPY", date(2024, 6, 1), "h1")
+
+        assert [c["symbol"] for c in index.purchase_conflicts("p1", "IVV", date(2024, 6, 20))] == ["SPY"]
+        assert index.purchase_conflicts("p1", "IVV", date(2024, 7, 2)) == []
+        assert index.purchase_conflicts("p1", "QQQ", date(2024, 6, 20)) == []
+
+class TestWashSaleChecks:
+    """Test the index on the harvest and trade paths"""
+
+    @pytest.mark.asyncio
+    async def test_recent_buy_blocks_harvest_and_harvest_flags_buy(self):
+        """A fresh TSLA buy blocks the TSLA harvest; a harvest flags a later buy"""
+        wash_sales = WashSaleIndex()
+        portfolio_service = PortfolioService(IBKRClient(), wash_sales=wash_sales)
+        tax_service = TaxHarvestService(IBKRClient(), wash_sales=wash_sales)
+        buy = {"portfolio_id": "portfolio_1", "trade_type": "buy", "order_type": "market", "shares": 1}
+        harvest_ids = {h.symbol: h.id for h in tax_service.tax_harvests.values()}
+
+        trade = await portfolio_service.create_trade(dict(buy, symbol="TSLA"))
+        await portfolio_service.orders.wait([trade["trade"]["id"]])
+
+        blocked = await tax_service.execute_tax_harvest(harvest_ids["TSLA"])
+        assert blocked["error"] == "Wash sale conflict"
+        assert blocked["conflicts"][0]["ref"] == trade["trade"]["id"]
+        assert tax_service.tax_harvests[harvest_ids["TSLA"]].status == "identified"
+
+        executed = await tax_service.execute_tax_harvest(harvest_ids["NFLX"])
+        assert executed["success"]
+        flagged = await portfolio_service.create_trade(dict(buy, symbol="NFLX"))
+        assert flagged["wash_sale_conflicts"][0]["ref"] == harvest_ids["NFLX"]
+        await portfolio_service.orders.stop()
+
+    @pytest.mark.asyncio
+    async def test_loss_sell_through_trades_flags_later_buy(self):
+        """A sell below average cost placed as a trade counts as a loss sale"""
+        portfolio_service = PortfolioService(IBKRClient())
+        order = {"portfolio_id": "portfolio_1", "order_type": "market", "shares": 1}
+
+        # Demo TSLA lots cost 250; the quote comes back around 150
+        sale = await portfolio_service.create_trade(dict(order, symbol="TSLA", trade_type="sell"))
+        await portfolio_service.orders.wait([sale["trade"]["id"]])
+
+        flagged = await portfolio_service.create_trade(dict(order, symbol="TSLA", trade_type="buy"))
+        assert flagged["wash_sale_conflicts"][0]["ref"] == sale["trade"]["id"]
+        unflagged = await portfolio_service.create_trade(dict(order, symbol="AAPL", trade_type="buy"))
+        assert "wash_sale_conflicts" not in unflagged
+        await portfolio_service.orders.stop()